@@ -53,6 +53,7 @@ from .models import User
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
+    cursor_ordering = ('-date_joined', '-id')
     permission_classes = [permissions.IsAuthenticated]
 
 class RoleListView(APIView):
@@ -1,5 +1,8 @@
-from django.contrib import admin
-from .models import Payment, Expense, ExchangeRate, ExpenseCategory
+from django.contrib import admin, messages
+from django.db import transaction
+from .models import Payment, Expense, ExchangeRate, ExchangeRateHistory, ExpenseCategory, can_review_expenses
+from .rates import invalidate_rates
+from apps.operations.models import Trip
 
 @admin.register(ExpenseCategory)
 class ExpenseCategoryAdmin(admin.ModelAdmin):
@@ -26,15 +29,53 @@ class ExchangeRateAdmin(admin.ModelAdmin):
         obj.updated_by = request.user
         super().save_model(request, obj, form, change)
 
+    def delete_queryset(self, request, queryset):
+        # Bulk deletes skip ExchangeRate.delete, so publish the change here
+        super().delete_queryset(request, queryset)
+        transaction.on_commit(invalidate_rates)
+
+@admin.register(ExchangeRateHistory)
+class ExchangeRateHistoryAdmin(admin.ModelAdmin):
+    list_display = ('from_currency', 'to_currency', 'rate', 'valid_from')
+    list_filter = ('from_currency', 'to_currency')
+    date_hierarchy = 'valid_from'
+    ordering = ('-valid_from',)
+
 @admin.register(Payment)
 class PaymentAdmin(admin.ModelAdmin):
     list_display = ('trip', 'amount', 'currency', 'date', 'type')
     search_fields = ('trip__description', 'type')
     list_filter = ('date', 'type', 'currency')
 
+    def delete_queryset(self, request, queryset):
+        # Bulk deletes skip Payment.delete, so recompute the trips' paid amounts here
+        with transaction.atomic():
+            trip_ids = set(queryset.values_list('trip_id', flat=True))
+            super().delete_queryset(request, queryset)
+            Trip.reconcile_payments(trip_ids)
+
 @admin.register(Expense)
 class ExpenseAdmin(admin.ModelAdmin):
-    list_display = ('category', 'amount', 'currency', 'exchangeRate', 'date', 'expenseType', 'vehicle', 'trip')
+    list_display = ('category', 'amount', 'currency', 'exchangeRate', 'date', 'expenseType', 'vehicle', 'trip', 'status')
     search_fields = ('category', 'description', 'vehicle__licensePlate', 'trip__description')
-    list_filter = ('date', 'expenseType', 'category', 'currency')
-    readonly_fields = ('exchangeRate', 'createdAt')
+    list_filter = ('status', 'date', 'expenseType', 'category', 'currency')
+    readonly_fields = ('exchangeRate', 'amountUsd', 'amountRwf', 'createdAt')
+    actions = ('approve_selected', 'reject_selected')
+
+    @admin.action(description='Approve selected pending expenses')
+    def approve_selected(self, request, queryset):
+        self._review(request, queryset, 'APPROVED')
+
+    @admin.action(description='Reject selected pending expenses')
+    def reject_selected(self, request, queryset):
+        self._review(request, queryset, 'REJECTED')
+
+    def _review(self, request, queryset, status):
+        if not can_review_expenses(request.user):
+            self.message_user(request, 'Only managers can review expenses.', messages.ERROR)
+            return
+        outcomes = Expense.review_pending(queryset.values_list('pk', flat=True), request.user, status)
+        updated = sum(1 for outcome in outcomes.values() if outcome == status)
+        self.message_user(request, f'{updated} expense(s) {status.lower()}.', messages.SUCCESS)
+        if updated < len(outcomes):
+            self.message_user(request, f'{len(outcomes) - updated} expense(s) were not pending.', messages.WARNING)
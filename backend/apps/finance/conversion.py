@@ -0,0 +1,100 @@
+from django.db.models import Case, DecimalField, F, Value, When
+from rest_framework import serializers
+from .rates import get_rate_graph
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def conversion_factors(target_currency):
+    """Return ``{currency: rate}`` for converting every rated currency into target_currency"""
+    graph = get_rate_graph()
+
+    factors = {}
+    for currency in graph.currencies() | {target_currency}:
+        try:
+            factors[currency] = graph.rate(currency, target_currency)
+        except ValueError:
+            logger.warning(f"No exchange rate from {currency} to {target_currency}")
+    return factors
+
+
+def converted(field, factors, currency_field='currency'):
+    """SQL expression converting ``field`` into the currency ``factors`` was built for.
+
+    Amounts in a currency without a rate are left unconverted, matching
+    ``get_converted_amount``.
+    """
+    return Case(
+        *[
+            When(**{currency_field: currency}, then=F(field) * Value(rate))
+            for currency, rate in factors.items()
+            if rate != 1
+        ],
+        default=F(field),
+        output_field=DecimalField(max_digits=20, decimal_places=2),
+    )
+
+
+def display_conversion(context):
+    """Return ``(display_currency, factors)`` for a serializer context, built once and kept in it.
+
+    Viewsets using DisplayCurrencyMixin put it in the context up front; any
+    other context builds it from the request's ``display_currency`` (default
+    USD) on first use. Nested and list serializers share their parent's
+    context, so every row of a response uses the same matrix.
+    """
+    if 'conversion' not in context:
+        request = context.get('request')
+        currency = request.query_params.get('display_currency', 'USD') if request else 'USD'
+        context['conversion'] = (currency, conversion_factors(currency))
+    return context['conversion']
+
+
+class ConvertedAmountField(serializers.Field):
+    """Read-only amount in the request's display currency.
+
+    Multiplies by the per-request factor matrix, so converting a list costs
+    no queries. Amounts in a currency without a rate are returned
+    unconverted, as ``get_converted_amount`` does.
+    """
+
+    def __init__(self, amount_field='amount', currency_field='currency', **kwargs):
+        self.amount_field = amount_field
+        self.currency_field = currency_field
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        amount = getattr(instance, self.amount_field)
+        _, factors = display_conversion(self.context)
+        return float(amount * factors.get(getattr(instance, self.currency_field), 1))
+
+
+class DisplayCurrencyMixin:
+    """Viewset mixin sharing one ``display_currency`` factor matrix across a request.
+
+    Paginated list responses also carry ``conversion_rates`` (the display
+    currency and the factor for every currency with a rate), so clients need
+    no separate rates_map call. Unpaginated lists stay bare arrays.
+    """
+
+    def get_conversion(self):
+        if not hasattr(self, '_conversion'):
+            self._conversion = display_conversion({'request': self.request})
+        return self._conversion
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['conversion'] = self.get_conversion()
+        return context
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        currency, factors = self.get_conversion()
+        response.data['conversion_rates'] = {
+            'currency': currency,
+            'rates': {code: float(factor) for code, factor in sorted(factors.items())},
+        }
+        return response
@@ -0,0 +1,76 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.finance.models import Expense, ExchangeRateHistory, Payment, base_currency_amounts
+from apps.loans.models import LoanPayment
+from apps.operations.models import Trip
+
+# model, amount field, date field, USD field, RWF field
+TARGETS = {
+    'trip': (Trip, 'totalPrice', 'startDate', 'totalPriceUsd', 'totalPriceRwf'),
+    'payment': (Payment, 'amount', 'date', 'amountUsd', 'amountRwf'),
+    'expense': (Expense, 'amount', 'date', 'amountUsd', 'amountRwf'),
+    'loan-payment': (LoanPayment, 'amount', 'date', 'amount_usd', 'amount_rwf'),
+}
+
+
+class Command(BaseCommand):
+    help = 'Fill the USD/RWF amount columns of existing trips, payments, expenses and loan payments'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            choices=sorted(TARGETS),
+            action='append',
+            help='Only backfill this model (repeatable; default: all)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Rows converted and written per transaction (default: 2000)',
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Recompute rows that already have base amounts, e.g. after correcting rate history',
+        )
+
+    def handle(self, *args, **options):
+        for name in options['model'] or TARGETS:
+            updated, missing = self.backfill(*TARGETS[name], options['chunk_size'], options['all'])
+            self.stdout.write(self.style.SUCCESS(f'{name}: updated {updated} row(s)'))
+            if missing:
+                self.stdout.write(self.style.WARNING(f'{name}: {missing} row(s) have no rate for their date'))
+
+    def backfill(self, model, amount_field, date_field, usd_field, rwf_field, chunk_size, recompute):
+        queryset = model.objects.all()
+        if not recompute:
+            queryset = queryset.filter(**{f'{usd_field}__isnull': True})
+
+        updated = missing = 0
+        last_pk = 0
+        while True:
+            # Keyset pagination on pk, so rows that stay unconvertible are not revisited
+            rows = list(
+                queryset.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .values_list('pk', amount_field, 'currency', date_field)[:chunk_size]
+            )
+            if not rows:
+                break
+            last_pk = rows[-1][0]
+
+            timeline = ExchangeRateHistory.timeline(max(row[3] for row in rows))
+            changed = []
+            for pk, amount, currency, when in rows:
+                usd, rwf = base_currency_amounts(amount, currency, timeline.graph_at(when))
+                if usd is None or rwf is None:
+                    missing += 1
+                changed.append(model(pk=pk, **{usd_field: usd, rwf_field: rwf}))
+
+            with transaction.atomic():
+                model.objects.bulk_update(changed, [usd_field, rwf_field])
+            updated += len(changed)
+            self.stdout.write(f'  {model.__name__}: {updated} row(s) so far')
+
+        return updated, missing
@@ -0,0 +1,139 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+from apps.finance.models import Expense, Payment
+from apps.finance.views import ExpenseViewSet, PaymentViewSet
+from apps.fleet.models import Vehicle
+from apps.operations.models import Customer, Trip
+from apps.operations.views import TripViewSet
+from fleet_management.filters import apply_list_filters
+import json
+import random
+import time
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Show the query plan and timing of each list filter (EXPLAIN ANALYZE), optionally on seeded data'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Insert this many synthetic trips (with payments and expenses) first; rolled back afterwards',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=30,
+            help='Width of the date range used by the range filters (default: 30)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                if options['seed']:
+                    self.seed(options['seed'])
+                self.report(options['days'])
+                if options['seed']:
+                    raise Rollback
+        except Rollback:
+            self.stdout.write('Seeded rows rolled back')
+
+    def seed(self, count):
+        started = time.perf_counter()
+        vehicles = Vehicle.objects.bulk_create(
+            Vehicle(make='Bench', model='Truck', year=2020, licensePlate=f'BENCH{i:05d}')
+            for i in range(max(count // 500, 2))
+        )
+        customers = Customer.objects.bulk_create(
+            Customer(name=f'Bench customer {i}') for i in range(max(count // 200, 2))
+        )
+        now = timezone.now()
+        trips = Trip.objects.bulk_create(
+            (
+                Trip(
+                    customer=random.choice(customers), vehicle=random.choice(vehicles),
+                    description='Benchmark trip', startDate=now - timedelta(minutes=random.randrange(3 * 365 * 24 * 60)),
+                    endDate=now, totalPrice=Decimal('500'),
+                )
+                for _ in range(count)
+            ),
+            batch_size=5000,
+        )
+        Payment.objects.bulk_create(
+            (
+                Payment(trip=trip, amount=Decimal('250'), date=trip.startDate + timedelta(days=2), type='Cash')
+                for trip in trips
+            ),
+            batch_size=5000,
+        )
+        Expense.objects.bulk_create(
+            (
+                Expense(
+                    vehicle=trip.vehicle, trip=trip, expenseType='trip', category=random.choice(['Fuel', 'Tolls', 'Repairs']),
+                    amount=Decimal('80'), date=trip.startDate + timedelta(hours=6),
+                    status=random.choice(['PENDING', 'APPROVED', 'APPROVED', 'APPROVED', 'REJECTED']),
+                )
+                for trip in trips
+                for _ in range(2)
+            ),
+            batch_size=5000,
+        )
+        with connection.cursor() as cursor:
+            for model in (Vehicle, Customer, Trip, Payment, Expense):
+                cursor.execute(f'ANALYZE {model._meta.db_table}')
+        self.stdout.write(f'Seeded {count} trips in {time.perf_counter() - started:.1f}s')
+
+    def report(self, days):
+        latest = Expense.objects.aggregate(latest=Max('date'))['latest'] or timezone.now()
+        date_range = {
+            'from': timezone.localdate(latest - timedelta(days=days)).isoformat(),
+            'to': timezone.localdate(latest).isoformat(),
+        }
+        vehicle = self.busiest(Expense, 'vehicle')
+        customer = self.busiest(Trip, 'customer')
+        trip = self.busiest(Payment, 'trip')
+
+        cases = [
+            ('expenses vehicle + range', ExpenseViewSet, {'vehicle': vehicle, **date_range}),
+            ('expenses status + range', ExpenseViewSet, {'status': 'PENDING', **date_range}),
+            ('expenses customer + range', ExpenseViewSet, {'customer': customer, **date_range}),
+            ('expenses category + range', ExpenseViewSet, {'category': 'Fuel', **date_range}),
+            ('expenses range', ExpenseViewSet, date_range),
+            ('trips vehicle + range', TripViewSet, {'vehicle': vehicle, **date_range}),
+            ('trips customer + range', TripViewSet, {'customer': customer, **date_range}),
+            ('trips range', TripViewSet, date_range),
+            ('payments trip', PaymentViewSet, {'trip': trip}),
+            ('payments vehicle + range', PaymentViewSet, {'vehicle': vehicle, **date_range}),
+            ('payments range', PaymentViewSet, date_range),
+        ]
+        for label, viewset, params in cases:
+            queryset = apply_list_filters(viewset.queryset.model.objects.all(), params, viewset.list_filters)
+            plan = queryset.explain(format='json', analyze=True)
+            self.stdout.write(f'{label:<28} {self.describe(plan)}')
+
+    def busiest(self, model, field):
+        row = model.objects.values(field).annotate(rows=Count('id')).order_by('-rows').first()
+        return str(row[field]) if row and row[field] else '0'
+
+    def describe(self, plan):
+        root = json.loads(plan)[0]
+        scans = []
+
+        def walk(node):
+            if 'Scan' in node['Node Type']:
+                target = node.get('Index Name') or node.get('Relation Name')
+                scans.append(f"{node['Node Type']} on {target}")
+            for child in node.get('Plans', []):
+                walk(child)
+
+        walk(root['Plan'])
+        return f"{root['Execution Time']:8.2f} ms  {root['Plan']['Actual Rows']:>7} rows  {'; '.join(scans)}"
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from apps.finance.models import Expense
+from apps.finance.receipts import PROCESSED_PREFIX
+from apps.finance.tasks import process_receipt
+
+
+class Command(BaseCommand):
+    help = 'Recompress, thumbnail and deduplicate receipts uploaded before the receipt pipeline existed'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--queue',
+            action='store_true',
+            help='Queue one Celery task per receipt instead of processing them here',
+        )
+
+    def handle(self, *args, **options):
+        expense_ids = list(
+            Expense.objects.exclude(receipt_file='').exclude(receipt_file__isnull=True)
+            .exclude(receipt_file__startswith=PROCESSED_PREFIX)
+            .order_by('pk').values_list('pk', flat=True)
+        )
+        stored = 0
+        for expense_id in expense_ids:
+            if options['queue']:
+                process_receipt.delay(expense_id)
+            elif process_receipt(expense_id):
+                stored += 1
+
+        if options['queue']:
+            self.stdout.write(self.style.SUCCESS(f'Queued {len(expense_ids)} receipt(s)'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Processed {stored} of {len(expense_ids)} receipt(s)'))
@@ -0,0 +1,78 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils.dateparse import parse_date
+from apps.finance.models import Expense, Payment
+from apps.finance.rollup import local_day, rebuild_rollup, verify_rollup
+from apps.operations.models import Trip
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily financial rollup for a date range, or diff it against the source tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='start', help='First day, YYYY-MM-DD (default: earliest data)')
+        parser.add_argument('--to', dest='end', help='Last day, YYYY-MM-DD (default: latest data)')
+        parser.add_argument(
+            '--days-per-batch',
+            type=int,
+            default=31,
+            help='Days recomputed per transaction (default: 31)',
+        )
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Report differences between the rollup and a full recomputation without writing',
+        )
+
+    def handle(self, *args, **options):
+        start, end = self.date_range(options['start'], options['end'])
+        if start is None:
+            self.stdout.write('No trips, payments or expenses to roll up')
+            return
+
+        step = timedelta(days=options['days_per_batch'])
+        differences = 0
+        day = start
+        while day <= end:
+            batch_end = min(day + step - timedelta(days=1), end)
+            if options['verify']:
+                for key, stored, expected in verify_rollup(day, batch_end):
+                    differences += 1
+                    self.stdout.write(self.style.WARNING(f'{key}: stored {stored}, expected {expected}'))
+            else:
+                rows = rebuild_rollup(day, batch_end)
+                self.stdout.write(f'{day} to {batch_end}: {rows} row(s)')
+            day = batch_end + timedelta(days=1)
+
+        if not options['verify']:
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt the financial rollup from {start} to {end}'))
+        elif differences:
+            raise CommandError(f'{differences} rollup row(s) differ from the source tables')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Rollup matches the source tables from {start} to {end}'))
+
+    def date_range(self, start, end):
+        start = self.parse(start, '--from')
+        end = self.parse(end, '--to')
+        if start is None or end is None:
+            bounds = [
+                Trip.objects.aggregate(first=Min('startDate'), last=Max('startDate')),
+                Payment.objects.aggregate(first=Min('date'), last=Max('date')),
+                Expense.objects.aggregate(first=Min('date'), last=Max('date')),
+            ]
+            firsts = [local_day(b['first']) for b in bounds if b['first']]
+            lasts = [local_day(b['last']) for b in bounds if b['last']]
+            if not firsts:
+                return None, None
+            start = start or min(firsts)
+            end = end or max(lasts)
+        return start, end
+
+    def parse(self, value, option):
+        if not value:
+            return None
+        parsed = parse_date(value)
+        if parsed is None:
+            raise CommandError(f'{option} must be a date in YYYY-MM-DD format')
+        return parsed
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from apps.operations.models import Trip
+
+
+class Command(BaseCommand):
+    help = "Recompute every trip's paidAmount, balance and paymentStatus from its payments"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Trips locked and recomputed per transaction (default: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        checked = corrected = 0
+        last_pk = 0
+        while True:
+            # Keyset pagination on pk; each chunk is its own transaction
+            trip_ids = list(
+                Trip.objects.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:options['chunk_size']]
+            )
+            if not trip_ids:
+                break
+            last_pk = trip_ids[-1]
+            corrected += Trip.reconcile_payments(trip_ids)
+            checked += len(trip_ids)
+            self.stdout.write(f'  {checked} trip(s) checked so far')
+
+        self.stdout.write(self.style.SUCCESS(f'Corrected {corrected} of {checked} trip(s)'))
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:20
+
+from datetime import datetime, timezone
+from django.db import migrations, models
+
+
+def backfill_history(apps, schema_editor):
+    """Seed the history from existing rates.
+
+    It is unknown when a pair's first rate took effect, and older amounts were
+    always converted at it, so each pair's earliest rate is recorded as valid
+    from the epoch.
+    """
+    ExchangeRate = apps.get_model('finance', 'ExchangeRate')
+    ExchangeRateHistory = apps.get_model('finance', 'ExchangeRateHistory')
+
+    epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    seen = set()
+    history = []
+    for rate in ExchangeRate.objects.order_by('effective_date', 'id'):
+        pair = (rate.from_currency, rate.to_currency)
+        history.append(ExchangeRateHistory(
+            from_currency=rate.from_currency,
+            to_currency=rate.to_currency,
+            rate=rate.rate,
+            valid_from=rate.effective_date if pair in seen else epoch,
+        ))
+        seen.add(pair)
+    ExchangeRateHistory.objects.bulk_create(history, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0011_expense_approved_at_expense_approved_by_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExchangeRateHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_currency', models.CharField(max_length=3)),
+                ('to_currency', models.CharField(max_length=3)),
+                ('rate', models.DecimalField(decimal_places=6, max_digits=10)),
+                ('valid_from', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name_plural': 'Exchange rate history',
+                'ordering': ['-valid_from'],
+                'indexes': [models.Index(fields=['valid_from'], name='finance_exc_valid_f_4b3481_idx')],
+                'unique_together': {('from_currency', 'to_currency', 'valid_from')},
+            },
+        ),
+        migrations.RunPython(backfill_history, migrations.RunPython.noop),
+    ]
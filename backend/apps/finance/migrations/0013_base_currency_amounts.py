@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0012_exchangeratehistory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expense',
+            name='amountUsd',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='amountRwf',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='amountUsd',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=20, null=True),
+        ),
+        migrations.AlterField(
+            model_name='expense',
+            name='amountRwf',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=20, null=True),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0013_base_currency_amounts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyFinancialRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('vehicleId', models.IntegerField(default=0)),
+                ('customerId', models.IntegerField(default=0)),
+                ('category', models.CharField(blank=True, default='', max_length=100)),
+                ('currency', models.CharField(max_length=3)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('tripCount', models.PositiveIntegerField(default=0)),
+                ('payments', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('paymentCount', models.PositiveIntegerField(default=0)),
+                ('expenses', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('expenseCount', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['vehicleId', 'day'], name='finance_dai_vehicle_dd58c8_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'vehicleId', 'customerId', 'category', 'currency'), name='finance_rollup_key')],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0014_dailyfinancialrollup'),
+        ('fleet', '0006_cursor_pagination_indexes'),
+        ('operations', '0003_cursor_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['date', 'id'], name='finance_expense_cursor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['date', 'id'], name='finance_payment_cursor_idx'),
+        ),
+    ]
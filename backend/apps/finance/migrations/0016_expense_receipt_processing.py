@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0015_cursor_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expense',
+            name='receipt_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='expense',
+            name='receipt_thumbnail',
+            field=models.FileField(blank=True, null=True, upload_to='receipts/thumbnails/'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0016_expense_receipt_processing'),
+        ('fleet', '0006_cursor_pagination_indexes'),
+        ('operations', '0003_cursor_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['vehicle', 'date'], name='finance_expense_vehicle_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['status', 'date'], name='finance_expense_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['trip', 'date'], name='finance_payment_trip_idx'),
+        ),
+    ]
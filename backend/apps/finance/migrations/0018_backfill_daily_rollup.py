@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.db import migrations
+
+# Same grouping as apps.finance.rollup.compute_rollup: trips on their local
+# startDate, payments and expenses on their local date, with the customer
+# taken from the trip and 0 / '' for a missing vehicle, customer or category
+BACKFILL_SQL = '''
+INSERT INTO finance_dailyfinancialrollup (
+    day, "vehicleId", "customerId", category, currency,
+    revenue, "tripCount", payments, "paymentCount", expenses, "expenseCount"
+)
+SELECT day, vehicle, customer, category, currency,
+       SUM(revenue), SUM(trips), SUM(payments), SUM(payment_count), SUM(expenses), SUM(expense_count)
+FROM (
+    SELECT (trip."startDate" AT TIME ZONE %(tz)s)::date AS day,
+           COALESCE(trip.vehicle_id, 0) AS vehicle, COALESCE(trip.customer_id, 0) AS customer,
+           '' AS category, trip.currency,
+           trip."totalPrice" AS revenue, 1 AS trips, 0 AS payments, 0 AS payment_count, 0 AS expenses, 0 AS expense_count
+    FROM operations_trip AS trip
+    UNION ALL
+    SELECT (payment.date AT TIME ZONE %(tz)s)::date,
+           COALESCE(trip.vehicle_id, 0), COALESCE(trip.customer_id, 0),
+           '', payment.currency,
+           0, 0, payment.amount, 1, 0, 0
+    FROM finance_payment AS payment
+    JOIN operations_trip AS trip ON trip.id = payment.trip_id
+    UNION ALL
+    SELECT (expense.date AT TIME ZONE %(tz)s)::date,
+           COALESCE(expense.vehicle_id, 0), COALESCE(trip.customer_id, 0),
+           COALESCE(expense.category, ''), expense.currency,
+           0, 0, 0, 0, expense.amount, 1
+    FROM finance_expense AS expense
+    LEFT JOIN operations_trip AS trip ON trip.id = expense.trip_id
+) AS source
+GROUP BY day, vehicle, customer, category, currency
+'''
+
+
+def backfill_rollup(apps, schema_editor):
+    """Fill the rollup from existing data so reports are correct right after deploy"""
+    DailyFinancialRollup = apps.get_model('finance', 'DailyFinancialRollup')
+    if DailyFinancialRollup.objects.exists():
+        # Already built by rebuild_financial_rollup
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(BACKFILL_SQL, {'tz': settings.TIME_ZONE})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0017_list_filter_indexes'),
+        ('operations', '0004_list_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rollup, migrations.RunPython.noop),
+    ]
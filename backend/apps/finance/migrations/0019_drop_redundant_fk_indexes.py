@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0018_backfill_daily_rollup'),
+        ('fleet', '0006_cursor_pagination_indexes'),
+        ('operations', '0005_trip_payment_state'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='expense',
+            name='vehicle',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='expenses', to='fleet.vehicle'),
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='trip',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='payments', to='operations.trip'),
+        ),
+    ]
@@ -1,7 +1,17 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.core.validators import FileExtensionValidator
+from django.utils import timezone
 from decimal import Decimal
+from .rates import RateGraph, RateTimeline, as_of_moment, get_rate_graph, invalidate_rates
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Currencies every amount is also stored in, so totals are plain SQL sums
+BASE_CURRENCIES = ('USD', 'RWF')
+CENT = Decimal('0.01')
 
 class ExchangeRate(models.Model):
     """Store exchange rates between currencies"""
@@ -20,38 +30,39 @@ class ExchangeRate(models.Model):
         return f"1 {self.from_currency} = {self.rate} {self.to_currency}"
     
     @classmethod
-    def get_rate(cls, from_currency, to_currency):
-        """Get the active exchange rate between two currencies"""
-        if from_currency == to_currency:
-            return Decimal('1.0')
-        
-        # Try direct conversion
-        try:
-            rate = cls.objects.get(
-                from_currency=from_currency,
-                to_currency=to_currency,
-                is_active=True
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_rate = (instance.__dict__.get('rate'), instance.__dict__.get('is_active'))
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Record a history entry whenever an active rate is created or changed"""
+        rate_changed = self.is_active and (self.rate, self.is_active) != getattr(self, '_loaded_rate', None)
+        super().save(*args, **kwargs)
+        self._loaded_rate = (self.rate, self.is_active)
+
+        if rate_changed:
+            ExchangeRateHistory.objects.create(
+                from_currency=self.from_currency,
+                to_currency=self.to_currency,
+                rate=self.rate,
+                valid_from=timezone.now(),
             )
-            return rate.rate
-        except cls.DoesNotExist:
-            # Try inverse conversion (e.g., if we have RWF->USD, calculate USD->RWF)
-            try:
-                rate = cls.objects.get(
-                    from_currency=to_currency,
-                    to_currency=from_currency,
-                    is_active=True
-                )
-                return Decimal('1.0') / rate.rate
-            except cls.DoesNotExist:
-                # Fallback: convert through USD as base currency
-                if from_currency != 'USD' and to_currency != 'USD':
-                    try:
-                        from_to_usd = cls.get_rate(from_currency, 'USD')
-                        usd_to_target = cls.get_rate('USD', to_currency)
-                        return from_to_usd * usd_to_target
-                    except:
-                        pass
-                raise ValueError(f"No exchange rate found for {from_currency} to {to_currency}")
+        transaction.on_commit(invalidate_rates)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        transaction.on_commit(invalidate_rates)
+        return result
+
+    @classmethod
+    def get_rate(cls, from_currency, to_currency):
+        """Get the active exchange rate between two currencies.
+
+        Direct, inverse and multi-hop cross rates are resolved from the
+        in-memory rate graph, so lookups normally cost no query.
+        """
+        return get_rate_graph().rate(from_currency, to_currency)
     
     @classmethod
     def convert(cls, amount, from_currency, to_currency):
@@ -63,6 +74,93 @@ class ExchangeRate(models.Model):
         return amount * rate
 
 
+class ExchangeRateHistory(models.Model):
+    """Every rate a currency pair has had, each valid until the pair's next entry"""
+    from_currency = models.CharField(max_length=3)
+    to_currency = models.CharField(max_length=3)
+    rate = models.DecimalField(max_digits=10, decimal_places=6)
+    valid_from = models.DateTimeField()
+
+    class Meta:
+        # The unique index serves per-pair as-of lookups, valid_from the batch range scans
+        unique_together = ['from_currency', 'to_currency', 'valid_from']
+        indexes = [
+            models.Index(fields=['valid_from']),
+        ]
+        ordering = ['-valid_from']
+        verbose_name_plural = "Exchange rate history"
+
+    def __str__(self):
+        return f"1 {self.from_currency} = {self.rate} {self.to_currency} from {self.valid_from}"
+
+    @classmethod
+    def graph_as_of(cls, as_of):
+        """Load the rates in effect at a date or datetime as a RateGraph, in one query"""
+        return RateGraph(
+            cls.objects.filter(valid_from__lte=as_of_moment(as_of))
+            .order_by('from_currency', 'to_currency', '-valid_from')
+            .distinct('from_currency', 'to_currency')
+            .values_list('from_currency', 'to_currency', 'rate')
+        )
+
+    @classmethod
+    def rate_as_of(cls, from_currency, to_currency, as_of):
+        """Get the rate between two currencies in effect at a date or datetime.
+
+        Inverse and cross rates resolve the same way as ExchangeRate.get_rate.
+        """
+        if from_currency == to_currency:
+            return Decimal('1.0')
+        return cls.graph_as_of(as_of).rate(from_currency, to_currency)
+
+    @classmethod
+    def timeline(cls, until):
+        """Load every rate change up to ``until`` as a RateTimeline, in one range query"""
+        return RateTimeline(
+            cls.objects.filter(valid_from__lte=as_of_moment(until))
+            .order_by('valid_from')
+            .values_list('from_currency', 'to_currency', 'rate', 'valid_from')
+        )
+
+    @classmethod
+    def convert_many(cls, items, to_currency):
+        """Convert ``(amount, currency, date)`` tuples into to_currency at their historical rates.
+
+        Uses one range query over the history however many items there are;
+        raises ValueError if an item has no rate at its date.
+        """
+        items = list(items)
+        moments = [as_of_moment(when) for amount, currency, when in items]
+        if not moments:
+            return []
+
+        timeline = cls.timeline(max(moments))
+        return [
+            amount if currency == to_currency else amount * timeline.rate(currency, to_currency, moment)
+            for (amount, currency, when), moment in zip(items, moments)
+        ]
+
+
+def can_review_expenses(user):
+    """Managers, admins and superusers may approve or reject expenses"""
+    return getattr(user, 'role', '') in ['manager', 'admin'] or user.is_superuser
+
+
+def base_currency_amounts(amount, currency, rates):
+    """Return ``(usd, rwf)`` for an amount using ``rates``, a RateGraph.
+
+    Either value is None when the graph has no path to that currency.
+    """
+    amount = Decimal(str(amount))
+    amounts = []
+    for base_currency in BASE_CURRENCIES:
+        try:
+            amounts.append((amount * rates.rate(currency, base_currency)).quantize(CENT))
+        except ValueError:
+            logger.warning(f"No exchange rate from {currency} to {base_currency}")
+            amounts.append(None)
+    return tuple(amounts)
+
 
 class ExpenseCategory(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -77,16 +175,101 @@ class ExpenseCategory(models.Model):
 
 
 class Payment(models.Model):
-    trip = models.ForeignKey('operations.Trip', on_delete=models.CASCADE, related_name='payments')
+    # Served by the (trip, date) index below
+    trip = models.ForeignKey('operations.Trip', on_delete=models.CASCADE, related_name='payments', db_index=False)
     amount = models.DecimalField(max_digits=20, decimal_places=2)
     currency = models.CharField(max_length=3, default='USD')
     date = models.DateTimeField()
     type = models.CharField(max_length=50) # e.g., Cash, Transfer
+    # amount in the base currencies at the rate in effect on date, set on save
+    amountUsd = models.DecimalField(max_digits=20, decimal_places=2, blank=True, null=True)
+    amountRwf = models.DecimalField(max_digits=20, decimal_places=2, blank=True, null=True)
     createdAt = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination order
+            models.Index(fields=['date', 'id'], name='finance_payment_cursor_idx'),
+            # List filter, combined with a date range
+            models.Index(fields=['trip', 'date'], name='finance_payment_trip_idx'),
+        ]
+
     def __str__(self):
         return f"{self.amount} {self.currency} for {self.trip}"
-    
+
+    def save(self, *args, **kwargs):
+        self.amountUsd, self.amountRwf = base_currency_amounts(
+            self.amount, self.currency, ExchangeRateHistory.graph_as_of(self.date)
+        )
+        Trip = self._meta.get_field('trip').related_model
+        with transaction.atomic():
+            previous = None
+            if not self._state.adding:
+                previous = Payment.objects.select_for_update().filter(pk=self.pk).first()
+            # Raises ValueError before writing when there is no rate into the trip currency
+            contribution = self.amount_in(self.trip_currency())
+            super().save(*args, **kwargs)
+            # Move this payment's contribution on the trips' paidAmount
+            if previous is None:
+                Trip.add_paid(self.trip_id, contribution)
+            elif not previous.remove_from_trip():
+                Trip.reconcile_payments([previous.trip_id, self.trip_id])
+            else:
+                Trip.add_paid(self.trip_id, contribution)
+
+    def delete(self, *args, **kwargs):
+        Trip = self._meta.get_field('trip').related_model
+        with transaction.atomic():
+            stored = Payment.objects.select_for_update().filter(pk=self.pk).first()
+            result = super().delete(*args, **kwargs)
+            if stored is not None and not stored.remove_from_trip():
+                Trip.reconcile_payments([stored.trip_id])
+        return result
+
+    def clean(self):
+        if self.trip_id is None or self.date is None:
+            return
+        trip_currency = self.trip.currency
+        if self.currency != trip_currency:
+            try:
+                ExchangeRateHistory.rate_as_of(self.currency, trip_currency, self.date)
+            except ValueError:
+                raise ValidationError({
+                    'currency': f"No exchange rate from {self.currency} to the trip currency {trip_currency} on this date",
+                })
+
+    def remove_from_trip(self):
+        """Subtract this stored payment from its trip's paidAmount; False if it can no longer be converted"""
+        Trip = self._meta.get_field('trip').related_model
+        try:
+            Trip.add_paid(self.trip_id, -self.amount_in(self.trip_currency()))
+        except ValueError:
+            return False
+        return True
+
+    def trip_currency(self):
+        """The stored currency of this payment's trip"""
+        Trip = self._meta.get_field('trip').related_model
+        return Trip.objects.filter(pk=self.trip_id).values_list('currency', flat=True).first() or self.currency
+
+    def amount_in(self, currency, timeline=None):
+        """The amount in currency at the rate on the payment date, for the trip's paidAmount.
+
+        The stored base amounts are used for USD and RWF; other currencies are
+        looked up in ``timeline`` (a RateTimeline) or the rate history.
+        Raises ValueError when there is no rate, rather than mixing currencies.
+        """
+        if currency == self.currency:
+            return self.amount
+        stored = {'USD': self.amountUsd, 'RWF': self.amountRwf}.get(currency)
+        if stored is not None:
+            return stored
+        if timeline is not None:
+            rate = timeline.rate(self.currency, currency, self.date)
+        else:
+            rate = ExchangeRateHistory.rate_as_of(self.currency, currency, self.date)
+        return (self.amount * rate).quantize(CENT)
+
     def get_converted_amount(self, target_currency='USD'):
         """Get the payment amount converted to target currency"""
         try:
@@ -101,13 +284,15 @@ class Expense(models.Model):
         ('vehicle', 'Vehicle Expense'),
     )
     
-    vehicle = models.ForeignKey('fleet.Vehicle', on_delete=models.CASCADE, related_name='expenses')
+    # Served by the (vehicle, date) index below
+    vehicle = models.ForeignKey('fleet.Vehicle', on_delete=models.CASCADE, related_name='expenses', db_index=False)
     trip = models.ForeignKey('operations.Trip', on_delete=models.SET_NULL, null=True, blank=True, related_name='expenses')
     expenseType = models.CharField(max_length=20, choices=EXPENSE_TYPE_CHOICES, default='vehicle')
     category = models.CharField(max_length=100)
     amount = models.DecimalField(max_digits=20, decimal_places=2)
     currency = models.CharField(max_length=3, default='USD')
-    amountRwf = models.DecimalField(max_digits=12, decimal_places=2, blank=True, null=True)
+    amountUsd = models.DecimalField(max_digits=20, decimal_places=2, blank=True, null=True)
+    amountRwf = models.DecimalField(max_digits=20, decimal_places=2, blank=True, null=True)
     exchangeRate = models.DecimalField(max_digits=10, decimal_places=4, blank=True, null=True)
     vendor = models.CharField(max_length=200, blank=True, null=True)
     description = models.TextField(blank=True, null=True)
@@ -119,6 +304,9 @@ class Expense(models.Model):
         validators=[FileExtensionValidator(allowed_extensions=['pdf', 'jpg', 'jpeg', 'png', 'gif'])],
         help_text="Upload receipt image or PDF (optional)"
     )
+    # Set by the process_receipt task, which moves receipt_file under its content hash
+    receipt_thumbnail = models.FileField(upload_to='receipts/thumbnails/', blank=True, null=True)
+    receipt_hash = models.CharField(max_length=64, blank=True, default='')
     createdBy = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
     date = models.DateTimeField()
     
@@ -134,6 +322,15 @@ class Expense(models.Model):
     
     createdAt = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination order
+            models.Index(fields=['date', 'id'], name='finance_expense_cursor_idx'),
+            # List filters, each combined with a date range
+            models.Index(fields=['vehicle', 'date'], name='finance_expense_vehicle_idx'),
+            models.Index(fields=['status', 'date'], name='finance_expense_status_idx'),
+        ]
+
     def __str__(self):
         return f"{self.category} - {self.amount} {self.currency}"
     
@@ -146,15 +343,76 @@ class Expense(models.Model):
             return self.amount
     
     def save(self, *args, **kwargs):
-        """Auto-populate exchangeRate field when saving"""
+        """Auto-populate exchangeRate and the base currency amounts when saving"""
         if self.currency and self.currency != 'USD':
             try:
                 self.exchangeRate = ExchangeRate.get_rate(self.currency, 'USD')
             except ValueError:
                 pass
+        self.amountUsd, self.amountRwf = base_currency_amounts(
+            self.amount, self.currency, ExchangeRateHistory.graph_as_of(self.date)
+        )
         
         # New expenses should be pending by default
         if not self.pk and not self.status:
             self.status = 'PENDING'
             
         super().save(*args, **kwargs)
+
+    @classmethod
+    def review_pending(cls, ids, user, status, reason=''):
+        """Approve or reject the pending expenses among ``ids`` with a single UPDATE.
+
+        Skips save(), which would recompute amounts that a review does not
+        change. Returns ``{id: outcome}`` where outcome is the new status,
+        ``'NOT_PENDING'`` or ``'NOT_FOUND'``.
+        """
+        ids = set(ids)
+        changes = {'status': status, 'approved_by': user, 'approved_at': timezone.now()}
+        if status == 'REJECTED':
+            changes['rejection_reason'] = reason
+        with transaction.atomic():
+            # Lock the rows so the outcomes match what the UPDATE changed
+            current = dict(cls.objects.select_for_update().filter(pk__in=ids).values_list('pk', 'status'))
+            pending = [pk for pk, current_status in current.items() if current_status == 'PENDING']
+            cls.objects.filter(pk__in=pending, status='PENDING').update(**changes)
+        return {
+            pk: status if pk in pending else ('NOT_PENDING' if pk in current else 'NOT_FOUND')
+            for pk in sorted(ids)
+        }
+
+
+class DailyFinancialRollup(models.Model):
+    """Per-day money totals by vehicle, customer, expense category and currency.
+
+    Maintained from Trip, Payment and Expense saves and deletes (see
+    apps.finance.signals) and rebuilt with ``rebuild_financial_rollup``.
+    vehicleId and customerId are plain ids, 0 when the row has none, so the
+    whole key can be unique; category is '' for trip and payment totals.
+    """
+    day = models.DateField()
+    vehicleId = models.IntegerField(default=0)
+    customerId = models.IntegerField(default=0)
+    category = models.CharField(max_length=100, blank=True, default='')
+    currency = models.CharField(max_length=3)
+    revenue = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    tripCount = models.PositiveIntegerField(default=0)
+    payments = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    paymentCount = models.PositiveIntegerField(default=0)
+    expenses = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    expenseCount = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-day']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'vehicleId', 'customerId', 'category', 'currency'],
+                name='finance_rollup_key',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['vehicleId', 'day']),
+        ]
+
+    def __str__(self):
+        return f"{self.day} vehicle {self.vehicleId} customer {self.customerId} {self.category} {self.currency}"
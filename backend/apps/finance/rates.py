@@ -0,0 +1,159 @@
+from bisect import bisect_right
+from collections import deque
+from datetime import date, datetime, time as day_time
+from decimal import Decimal
+from django.conf import settings
+from django.utils import timezone
+from fleet_management.redis_client import get_redis_client
+from redis.exceptions import RedisError
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever an exchange rate changes so every process reloads its graph
+VERSION_KEY = 'finance:exchange-rates:version'
+
+_graph = None
+_graph_version = None
+_checked_at = 0.0
+
+
+class RateGraph:
+    """Active exchange rates as a currency graph.
+
+    Every rate is an edge in both directions (the reverse edge uses the
+    inverse rate unless that pair has its own rate). Cross rates follow the
+    path with the fewest conversions and are memoized.
+    """
+
+    def __init__(self, rates):
+        self._edges = {}
+        for from_currency, to_currency, rate in rates:
+            self._edges.setdefault(from_currency, {})[to_currency] = rate
+            self._edges.setdefault(to_currency, {}).setdefault(from_currency, Decimal('1.0') / rate)
+        self._resolved = {}
+
+    def currencies(self):
+        return set(self._edges)
+
+    def rate(self, from_currency, to_currency):
+        """Return the rate converting from_currency into to_currency, or raise ValueError"""
+        if from_currency == to_currency:
+            return Decimal('1.0')
+
+        key = (from_currency, to_currency)
+        if key not in self._resolved:
+            self._resolved[key] = self._shortest_path_rate(from_currency, to_currency)
+        rate = self._resolved[key]
+        if rate is None:
+            raise ValueError(f"No exchange rate found for {from_currency} to {to_currency}")
+        return rate
+
+    def _shortest_path_rate(self, from_currency, to_currency):
+        # Breadth-first, carrying the accumulated rate along each path
+        rates = {from_currency: Decimal('1.0')}
+        queue = deque([from_currency])
+        while queue:
+            currency = queue.popleft()
+            for neighbour, rate in self._edges.get(currency, {}).items():
+                if neighbour in rates:
+                    continue
+                rates[neighbour] = rates[currency] * rate
+                if neighbour == to_currency:
+                    return rates[neighbour]
+                queue.append(neighbour)
+        return None
+
+
+class RateTimeline:
+    """Historical rates as a sequence of rate graphs, one per change point.
+
+    ``rows`` are ``(from_currency, to_currency, rate, valid_from)`` ordered by
+    valid_from. The graph in effect at a moment is found by bisecting the
+    change points, so converting many dated amounts needs no further queries.
+    """
+
+    def __init__(self, rows):
+        self._points = []
+        self._states = []
+        current = {}
+        for from_currency, to_currency, rate, valid_from in rows:
+            current[(from_currency, to_currency)] = rate
+            if self._points and self._points[-1] == valid_from:
+                self._states[-1] = dict(current)
+            else:
+                self._points.append(valid_from)
+                self._states.append(dict(current))
+        self._graphs = {}
+
+    def graph_at(self, moment):
+        index = bisect_right(self._points, as_of_moment(moment)) - 1
+        if index < 0:
+            return RateGraph([])
+        if index not in self._graphs:
+            self._graphs[index] = RateGraph(
+                (from_currency, to_currency, rate)
+                for (from_currency, to_currency), rate in self._states[index].items()
+            )
+        return self._graphs[index]
+
+    def rate(self, from_currency, to_currency, moment):
+        return self.graph_at(moment).rate(from_currency, to_currency)
+
+
+def as_of_moment(value):
+    """Normalize a date or datetime to the aware moment rates are looked up at.
+
+    A bare date means the end of that day, so a payment dated the day a rate
+    changed uses the new rate.
+    """
+    if not isinstance(value, datetime):
+        if not isinstance(value, date):
+            raise TypeError(f"Expected a date or datetime, got {value!r}")
+        value = datetime.combine(value, day_time.max)
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def get_rate_graph():
+    """Return this process's rate graph, reloading it when another process changed a rate.
+
+    The shared version is checked at most every EXCHANGE_RATE_VERSION_CHECK_SECONDS,
+    so conversions in between cost neither a query nor a Redis round trip.
+    """
+    global _graph, _graph_version, _checked_at
+    now = time.monotonic()
+    if _graph is not None and now - _checked_at < settings.EXCHANGE_RATE_VERSION_CHECK_SECONDS:
+        return _graph
+
+    version = _shared_version()
+    if _graph is None or version is None or version != _graph_version:
+        from .models import ExchangeRate
+
+        _graph = RateGraph(
+            ExchangeRate.objects.filter(is_active=True).values_list('from_currency', 'to_currency', 'rate')
+        )
+        _graph_version = version
+    _checked_at = now
+    return _graph
+
+
+def invalidate_rates():
+    """Drop this process's graph and tell every other process to reload theirs"""
+    global _graph
+    _graph = None
+    try:
+        get_redis_client().incr(VERSION_KEY)
+    except RedisError as e:
+        logger.error(f"Failed to publish exchange rate change: {str(e)}")
+
+
+def _shared_version():
+    try:
+        return get_redis_client().get(VERSION_KEY) or b'0'
+    except RedisError as e:
+        # Without Redis we cannot tell whether rates changed, so reload
+        logger.warning(f"Could not read exchange rate version: {str(e)}")
+        return None
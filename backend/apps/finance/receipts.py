@@ -0,0 +1,170 @@
+from django.conf import settings
+from django.core import signing
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse
+from django.utils.http import content_disposition_header
+from rest_framework.permissions import BasePermission
+from urllib.parse import quote
+from PIL import Image, ImageOps
+import hashlib
+import io
+import logging
+import mimetypes
+import os
+import pypdfium2
+import time
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_SALT = 'finance.expense-receipt'
+
+# Processed receipts and thumbnails are named by the SHA-256 of the uploaded
+# bytes, so identical uploads share one stored copy
+PROCESSED_PREFIX = 'receipts/sha256/'
+THUMBNAIL_PREFIX = 'receipts/thumbnails/'
+
+
+def _link_window():
+    return int(time.time() // settings.RECEIPT_LINK_MAX_AGE)
+
+
+def sign_receipt_link(expense_id):
+    """Return a token granting download of this expense's receipt files.
+
+    Receipts are opened from plain links, which cannot carry the API token.
+    The token only changes once per RECEIPT_LINK_MAX_AGE window, so repeated
+    list loads produce the same URLs and browsers can reuse cached files; it
+    stays valid until the end of the following window.
+    """
+    signer = signing.Signer(salt=f'{SIGNATURE_SALT}:{expense_id}')
+    return signer.sign(str(_link_window()))
+
+
+def receipt_link_is_valid(expense_id, token):
+    if not token:
+        return False
+    try:
+        window = int(signing.Signer(salt=f'{SIGNATURE_SALT}:{expense_id}').unsign(token))
+    except (signing.BadSignature, ValueError):
+        return False
+    return _link_window() - window in (0, 1)
+
+
+class HasReceiptAccess(BasePermission):
+    """Authenticated users, or anyone holding a valid signed link for this expense"""
+
+    def has_permission(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return True
+        return receipt_link_is_valid(view.kwargs.get('pk'), request.query_params.get('signature'))
+
+
+def receipt_response(receipt):
+    """Serve a stored receipt file.
+
+    With RECEIPT_ACCEL_REDIRECT the response is empty and nginx sends the
+    file from its internal location, handling range and conditional requests
+    without holding a gunicorn worker. Otherwise (development) Django streams
+    it. Stored receipts are never overwritten, so browsers may cache them.
+    """
+    filename = os.path.basename(receipt.name)
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    if settings.RECEIPT_ACCEL_REDIRECT:
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.RECEIPT_ACCEL_LOCATION + quote(receipt.name)
+    else:
+        response = FileResponse(receipt.open('rb'), content_type=content_type)
+    response['Content-Disposition'] = content_disposition_header(False, filename)
+    response['Cache-Control'] = f'private, max-age={settings.RECEIPT_CACHE_SECONDS}'
+    response['X-Content-Type-Options'] = 'nosniff'
+    return response
+
+
+def is_processed(name):
+    return name.startswith(PROCESSED_PREFIX)
+
+
+def _hashed_name(prefix, digest, extension):
+    return f'{prefix}{digest[:2]}/{digest}.{extension}'
+
+
+def _store(name, data):
+    """Save data under name unless an identical upload already stored it"""
+    if default_storage.exists(name):
+        return name
+    stored = default_storage.save(name, ContentFile(data))
+    if stored != name:
+        # Another worker stored the same content since exists(); the storage
+        # picked an alternate name rather than overwrite it
+        default_storage.delete(stored)
+    return name
+
+
+def _encode(image, format, **options):
+    buffer = io.BytesIO()
+    image.save(buffer, format=format, **options)
+    return buffer.getvalue()
+
+
+def _flatten(image):
+    """RGB copy of image, with any transparency on white"""
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def _render_pdf_page(data):
+    pdf = pypdfium2.PdfDocument(data)
+    try:
+        page = pdf[0]
+        # Render just large enough for the thumbnail
+        scale = settings.RECEIPT_THUMBNAIL_SIZE / max(page.get_size())
+        return page.render(scale=max(scale, 0.1)).to_pil()
+    finally:
+        pdf.close()
+
+
+def store_receipt(data, filename):
+    """Store an uploaded receipt under its content hash and make its thumbnail.
+
+    Images are recompressed to JPEG no larger than RECEIPT_MAX_DIMENSION on
+    either side; PDFs are kept as uploaded. The thumbnail is a WebP of the
+    image or of the PDF's first page. Returns ``(receipt_name,
+    thumbnail_name, digest)``; thumbnail_name is None when the PDF cannot be
+    rendered. Raises ValueError for an image Pillow cannot read.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    is_pdf = os.path.splitext(filename)[1].lower() == '.pdf'
+    receipt_name = _hashed_name(PROCESSED_PREFIX, digest, 'pdf' if is_pdf else 'jpg')
+    thumbnail_name = _hashed_name(THUMBNAIL_PREFIX, digest, 'webp')
+    if default_storage.exists(receipt_name) and default_storage.exists(thumbnail_name):
+        return receipt_name, thumbnail_name, digest
+
+    if is_pdf:
+        receipt_name = _store(receipt_name, data)
+        try:
+            image = _flatten(_render_pdf_page(data))
+        except Exception as e:
+            logger.warning(f"Could not render a thumbnail for receipt {filename}: {str(e)}")
+            return receipt_name, None, digest
+    else:
+        try:
+            image = Image.open(io.BytesIO(data))
+            # Let the JPEG decoder downscale while decoding
+            image.draft('RGB', (settings.RECEIPT_MAX_DIMENSION, settings.RECEIPT_MAX_DIMENSION))
+            image = _flatten(image)
+        except (OSError, Image.DecompressionBombError) as e:
+            raise ValueError(f"Unreadable receipt image {filename}: {str(e)}")
+        image.thumbnail((settings.RECEIPT_MAX_DIMENSION, settings.RECEIPT_MAX_DIMENSION))
+        receipt_name = _store(receipt_name, _encode(
+            image, 'JPEG', quality=settings.RECEIPT_JPEG_QUALITY, optimize=True, progressive=True
+        ))
+
+    image.thumbnail((settings.RECEIPT_THUMBNAIL_SIZE, settings.RECEIPT_THUMBNAIL_SIZE))
+    thumbnail_name = _store(thumbnail_name, _encode(image, 'WEBP', quality=70, method=6))
+    return receipt_name, thumbnail_name, digest
@@ -0,0 +1,175 @@
+from datetime import datetime, time, timedelta
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from fleet_management.query_params import parse_date_param, parse_int_param
+from fleet_management.redis_client import get_redis_client
+from apps.operations.models import Trip
+from .models import DailyFinancialRollup, Expense, Payment
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Local days whose rollup rows must be recomputed, as ISO dates
+DIRTY_DAYS_KEY = 'finance:rollup:dirty-days'
+# Set while a refresh task is queued so a burst of saves queues only one
+REFRESH_QUEUED_KEY = 'finance:rollup:refresh-queued'
+REFRESH_DELAY = 5
+
+TOTAL_FIELDS = ('revenue', 'tripCount', 'payments', 'paymentCount', 'expenses', 'expenseCount')
+
+
+def filtered_rollup(params):
+    """Rollup rows matching the report parameters ``from``/``to``, ``vehicle`` and ``customer``"""
+    rollup = DailyFinancialRollup.objects.all()
+    start = parse_date_param(params, 'from')
+    if start:
+        rollup = rollup.filter(day__gte=start)
+    end = parse_date_param(params, 'to')
+    if end:
+        rollup = rollup.filter(day__lte=end)
+    vehicle_id = parse_int_param(params, 'vehicle')
+    if vehicle_id is not None:
+        rollup = rollup.filter(vehicleId=vehicle_id)
+    customer_id = parse_int_param(params, 'customer')
+    if customer_id is not None:
+        rollup = rollup.filter(customerId=customer_id)
+    return rollup
+
+
+def local_day(value):
+    """Return the local calendar day of a datetime (or a date unchanged)"""
+    if isinstance(value, datetime):
+        return timezone.localdate(value)
+    return value
+
+
+def _day_bounds(start, end):
+    tz = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.combine(start, time.min), tz),
+        timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz),
+    )
+
+
+def compute_rollup(start, end):
+    """Aggregate trips, payments and expenses on local days start..end from the source tables.
+
+    Returns ``{(day, vehicleId, customerId, category, currency): totals}``
+    with 0 and '' standing in for a missing vehicle, customer or category.
+    Trips count on their startDate, payments and expenses on their date;
+    payments and expenses take the customer from their trip.
+    """
+    lower, upper = _day_bounds(start, end)
+    rows = {}
+
+    def bucket(row, category=''):
+        key = (row['day'], row['vehicle'] or 0, row['customer'] or 0, category or '', row['currency'])
+        return rows.setdefault(key, dict.fromkeys(TOTAL_FIELDS, 0))
+
+    trips = (
+        Trip.objects.filter(startDate__gte=lower, startDate__lt=upper)
+        .annotate(day=TruncDate('startDate'))
+        .order_by()
+        .values('day', 'vehicle', 'customer', 'currency')
+        .annotate(total=Sum('totalPrice'), count=Count('id'))
+    )
+    for row in trips:
+        totals = bucket(row)
+        totals['revenue'] += row['total']
+        totals['tripCount'] += row['count']
+
+    payments = (
+        Payment.objects.filter(date__gte=lower, date__lt=upper)
+        .annotate(day=TruncDate('date'))
+        .order_by()
+        .values('day', 'currency', vehicle=F('trip__vehicle'), customer=F('trip__customer'))
+        .annotate(total=Sum('amount'), count=Count('id'))
+    )
+    for row in payments:
+        totals = bucket(row)
+        totals['payments'] += row['total']
+        totals['paymentCount'] += row['count']
+
+    expenses = (
+        Expense.objects.filter(date__gte=lower, date__lt=upper)
+        .annotate(day=TruncDate('date'))
+        .order_by()
+        .values('day', 'vehicle', 'category', 'currency', customer=F('trip__customer'))
+        .annotate(total=Sum('amount'), count=Count('id'))
+    )
+    for row in expenses:
+        totals = bucket(row, row['category'])
+        totals['expenses'] += row['total']
+        totals['expenseCount'] += row['count']
+
+    return rows
+
+
+def rebuild_rollup(start, end):
+    """Replace the rollup rows for local days start..end with a fresh aggregation"""
+    rows = compute_rollup(start, end)
+    with transaction.atomic():
+        DailyFinancialRollup.objects.filter(day__gte=start, day__lte=end).delete()
+        DailyFinancialRollup.objects.bulk_create(
+            (
+                DailyFinancialRollup(
+                    day=day, vehicleId=vehicle_id, customerId=customer_id,
+                    category=category, currency=currency, **totals
+                )
+                for (day, vehicle_id, customer_id, category, currency), totals in rows.items()
+            ),
+            batch_size=1000,
+        )
+    return len(rows)
+
+
+def verify_rollup(start, end):
+    """Compare the stored rollup for start..end with a full recomputation.
+
+    Returns ``(key, stored, expected)`` for every row that differs, with None
+    for a row that exists on one side only.
+    """
+    expected = compute_rollup(start, end)
+    stored = {
+        (row['day'], row['vehicleId'], row['customerId'], row['category'], row['currency']):
+            {field: row[field] for field in TOTAL_FIELDS}
+        for row in DailyFinancialRollup.objects.filter(day__gte=start, day__lte=end).values()
+    }
+    return [
+        (key, stored.get(key), expected.get(key))
+        for key in sorted(stored.keys() | expected.keys(), key=str)
+        if stored.get(key) != expected.get(key)
+    ]
+
+
+def day_ranges(days):
+    """Collapse a set of days into sorted, contiguous (start, end) ranges"""
+    ranges = []
+    for day in sorted(days):
+        if ranges and day == ranges[-1][1] + timedelta(days=1):
+            ranges[-1][1] = day
+        else:
+            ranges.append([day, day])
+    return [tuple(day_range) for day_range in ranges]
+
+
+def mark_days_dirty(days):
+    """Queue the rollup of these local days for recomputation once the transaction commits"""
+    days = {day for day in days if day is not None}
+    if days:
+        transaction.on_commit(lambda: _queue_refresh(days))
+
+
+def _queue_refresh(days):
+    from .tasks import refresh_financial_rollup
+
+    try:
+        redis = get_redis_client()
+        redis.sadd(DIRTY_DAYS_KEY, *(day.isoformat() for day in days))
+        if redis.set(REFRESH_QUEUED_KEY, 1, nx=True, ex=60):
+            refresh_financial_rollup.apply_async(countdown=REFRESH_DELAY)
+    except Exception as e:
+        # The periodic refresh or a rebuild will pick these days up
+        logger.error(f"Failed to queue financial rollup refresh for {sorted(days)}: {str(e)}")
@@ -1,5 +1,9 @@
 from rest_framework import serializers
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework.reverse import reverse
+from .conversion import ConvertedAmountField
 from .models import Payment, Expense, ExchangeRate, ExpenseCategory
+from .receipts import sign_receipt_link
 
 class ExpenseCategorySerializer(serializers.ModelSerializer):
     class Meta:
@@ -13,28 +17,32 @@ class ExchangeRateSerializer(serializers.ModelSerializer):
         read_only_fields = ['effective_date']
 
 class PaymentSerializer(serializers.ModelSerializer):
-    converted_amount = serializers.SerializerMethodField()
+    converted_amount = ConvertedAmountField()
     
     class Meta:
         model = Payment
         fields = '__all__'
-    
-    def get_converted_amount(self, obj):
-        """Return amount converted to the requested display currency"""
-        request = self.context.get('request')
-        if request:
-            display_currency = request.query_params.get('display_currency', 'USD')
-            try:
-                return float(obj.get_converted_amount(display_currency))
-            except:
-                return float(obj.amount)
-        return float(obj.amount)
+        read_only_fields = ['amountUsd', 'amountRwf']
+
+    def validate(self, data):
+        # The payment must convert into the trip currency for the trip's balance
+        payment = Payment(**{
+            field: data.get(field, getattr(self.instance, field, None))
+            for field in ('trip', 'currency', 'date')
+        })
+        payment.currency = payment.currency or 'USD'
+        try:
+            payment.clean()
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.message_dict)
+        return data
 
 class ExpenseSerializer(serializers.ModelSerializer):
     vehicleName = serializers.SerializerMethodField()
     tripDescription = serializers.CharField(source='trip.description', read_only=True)
-    converted_amount = serializers.SerializerMethodField()
+    converted_amount = ConvertedAmountField()
     receipt_file_url = serializers.SerializerMethodField()
+    receipt_thumbnail_url = serializers.SerializerMethodField()
 
     class Meta:
         model = Expense
@@ -43,27 +51,24 @@ class ExpenseSerializer(serializers.ModelSerializer):
     class Meta:
         model = Expense
         fields = '__all__'
-        read_only_fields = ['status', 'approved_by', 'approved_at', 'rejection_reason', 'createdAt']
+        read_only_fields = [
+            'status', 'approved_by', 'approved_at', 'rejection_reason', 'createdAt', 'amountUsd', 'amountRwf',
+            'receipt_thumbnail', 'receipt_hash',
+        ]
 
     def get_vehicleName(self, obj):
         return str(obj.vehicle)
     
     def get_receipt_file_url(self, obj):
-        """Return the full URL for the receipt file"""
+        """Return a signed download link for the receipt file"""
         if obj.receipt_file:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.receipt_file.url)
-            return obj.receipt_file.url
+            url = reverse('expense-receipt', args=[obj.pk], request=self.context.get('request'))
+            return f'{url}?signature={sign_receipt_link(obj.pk)}'
+        return None
+
+    def get_receipt_thumbnail_url(self, obj):
+        """Return a signed link to the receipt thumbnail, once processing has made one"""
+        if obj.receipt_thumbnail:
+            url = reverse('expense-receipt-thumbnail', args=[obj.pk], request=self.context.get('request'))
+            return f'{url}?signature={sign_receipt_link(obj.pk)}'
         return None
-    
-    def get_converted_amount(self, obj):
-        """Return amount converted to the requested display currency"""
-        request = self.context.get('request')
-        if request:
-            display_currency = request.query_params.get('display_currency', 'USD')
-            try:
-                return float(obj.get_converted_amount(display_currency))
-            except:
-                return float(obj.amount)
-        return float(obj.amount)
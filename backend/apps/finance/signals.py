@@ -0,0 +1,86 @@
+from django.db import transaction
+from django.db.models.functions import TruncDate
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from apps.fleet.models import Vehicle
+from apps.operations.models import Trip
+from .models import Expense, Payment
+from .receipts import is_processed
+from .rollup import local_day, mark_days_dirty
+
+# Keep DailyFinancialRollup in step with the rows it aggregates. Whole days are
+# recomputed, so a handler only has to say which days a change touched.
+# Queryset update()/bulk_create() bypass these; rebuild_financial_rollup
+# covers data changed that way.
+
+DATE_FIELDS = {Trip: 'startDate', Payment: 'date', Expense: 'date'}
+
+
+def _related_days(trip):
+    """Days of the payments and expenses whose rollup rows take vehicle or customer from this trip"""
+    return {
+        day
+        for queryset in (trip.payments.all(), trip.expenses.all())
+        for day in queryset.annotate(day=TruncDate('date')).values_list('day', flat=True).distinct()
+    }
+
+
+@receiver(pre_save, sender=Trip)
+@receiver(pre_save, sender=Payment)
+@receiver(pre_save, sender=Expense)
+def remember_rollup_state(sender, instance, **kwargs):
+    instance._rollup_old = None
+    if instance.pk:
+        fields = [DATE_FIELDS[sender]] + (['vehicle_id', 'customer_id'] if sender is Trip else [])
+        instance._rollup_old = sender.objects.filter(pk=instance.pk).values(*fields).first()
+
+
+@receiver(post_save, sender=Trip)
+@receiver(post_save, sender=Payment)
+@receiver(post_save, sender=Expense)
+def mark_saved_row_dirty(sender, instance, created, **kwargs):
+    date_field = DATE_FIELDS[sender]
+    days = {local_day(getattr(instance, date_field))}
+    old = getattr(instance, '_rollup_old', None)
+    if old:
+        days.add(local_day(old[date_field]))
+        if sender is Trip and (old['vehicle_id'], old['customer_id']) != (instance.vehicle_id, instance.customer_id):
+            days |= _related_days(instance)
+    mark_days_dirty(days)
+
+
+@receiver(pre_delete, sender=Trip)
+def mark_trip_expenses_dirty(sender, instance, **kwargs):
+    # Expenses survive with trip=NULL, which moves them to customer 0
+    mark_days_dirty(
+        instance.expenses.annotate(day=TruncDate('date')).values_list('day', flat=True).distinct()
+    )
+
+
+@receiver(pre_delete, sender=Vehicle)
+def mark_vehicle_trips_dirty(sender, instance, **kwargs):
+    # Its trips survive with vehicle=NULL, set by a bulk UPDATE that sends no
+    # Trip signals, which moves them and their payments to vehicle 0
+    trips = Trip.objects.filter(vehicle=instance)
+    payments = Payment.objects.filter(trip__vehicle=instance)
+    mark_days_dirty(
+        set(trips.annotate(day=TruncDate('startDate')).values_list('day', flat=True).distinct())
+        | set(payments.annotate(day=TruncDate('date')).values_list('day', flat=True).distinct())
+    )
+
+
+@receiver(post_delete, sender=Trip)
+@receiver(post_delete, sender=Payment)
+@receiver(post_delete, sender=Expense)
+def mark_deleted_row_dirty(sender, instance, **kwargs):
+    mark_days_dirty({local_day(getattr(instance, DATE_FIELDS[sender]))})
+
+
+@receiver(post_save, sender=Expense)
+def queue_receipt_processing(sender, instance, **kwargs):
+    # New uploads are stored under their upload_to path until processed
+    if instance.receipt_file and not is_processed(instance.receipt_file.name):
+        from .tasks import process_receipt
+
+        expense_id = instance.pk
+        transaction.on_commit(lambda: process_receipt.delay(expense_id))
@@ -0,0 +1,85 @@
+from celery import shared_task
+from datetime import date
+from django.core.files.storage import default_storage
+from fleet_management.redis_client import get_redis_client
+from redis.exceptions import LockError
+from .models import Expense
+from .receipts import is_processed, store_receipt
+from .rollup import DIRTY_DAYS_KEY, REFRESH_QUEUED_KEY, day_ranges, rebuild_rollup
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Days recomputed per pass while draining the dirty set
+REFRESH_BATCH_SIZE = 100
+REFRESH_LOCK_KEY = 'finance:rollup:refresh-lock'
+REFRESH_LOCK_TIMEOUT = 10 * 60
+
+
+@shared_task
+def refresh_financial_rollup():
+    """Recompute the rollup for every day marked dirty by a trip, payment or expense change"""
+    redis = get_redis_client()
+    # Changes arriving from now on queue a new run
+    redis.delete(REFRESH_QUEUED_KEY)
+
+    lock = redis.lock(REFRESH_LOCK_KEY, timeout=REFRESH_LOCK_TIMEOUT)
+    if not lock.acquire(blocking=False):
+        logger.info("Another financial rollup refresh is running, leaving the queue to it")
+        return 0
+
+    refreshed = 0
+    try:
+        while True:
+            days = {date.fromisoformat(day.decode()) for day in redis.spop(DIRTY_DAYS_KEY, REFRESH_BATCH_SIZE)}
+            if not days:
+                break
+            try:
+                for start, end in day_ranges(days):
+                    rebuild_rollup(start, end)
+            except Exception:
+                # Put the days back so the next run retries them
+                redis.sadd(DIRTY_DAYS_KEY, *(day.isoformat() for day in days))
+                raise
+            refreshed += len(days)
+    finally:
+        try:
+            lock.release()
+        except LockError:
+            # The lock timed out mid-run and may now belong to another refresh
+            logger.warning("Financial rollup refresh outlived its lock")
+
+    if refreshed:
+        logger.info(f"Refreshed financial rollup for {refreshed} day(s)")
+    return refreshed
+
+
+@shared_task
+def process_receipt(expense_id):
+    """Recompress an uploaded receipt, thumbnail it and move it under its content hash.
+
+    The original upload is deleted once no expense refers to it. Returns the
+    stored receipt name, or None when there was nothing to do.
+    """
+    expense = Expense.objects.filter(pk=expense_id).only('receipt_file').first()
+    if expense is None or not expense.receipt_file or is_processed(expense.receipt_file.name):
+        return None
+
+    original = expense.receipt_file.name
+    try:
+        with default_storage.open(original, 'rb') as upload:
+            data = upload.read()
+        receipt_name, thumbnail_name, digest = store_receipt(data, original)
+    except (OSError, ValueError) as e:
+        logger.error(f"Failed to process receipt {original} of expense {expense_id}: {str(e)}")
+        return None
+
+    # update() keeps this out of the save signals; the filter skips the row if
+    # the receipt was replaced while we worked
+    updated = Expense.objects.filter(pk=expense_id, receipt_file=original).update(
+        receipt_file=receipt_name, receipt_thumbnail=thumbnail_name, receipt_hash=digest
+    )
+    if updated and not Expense.objects.filter(receipt_file=original).exists():
+        default_storage.delete(original)
+    logger.info(f"Stored receipt of expense {expense_id} as {receipt_name} ({len(data)} bytes uploaded)")
+    return receipt_name
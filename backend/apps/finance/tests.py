@@ -1,3 +1,611 @@
-from django.test import TestCase
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from fleet_management.testing import ListQueryBudgetMixin, create_trip, use_exchange_rates
+from .models import DailyFinancialRollup, Expense, ExchangeRate, ExchangeRateHistory, Payment
+from .receipts import PROCESSED_PREFIX, store_receipt
+from .rates import RateGraph, get_rate_graph, invalidate_rates
+from .rollup import rebuild_rollup, verify_rollup
+from .tasks import process_receipt
+from PIL import Image
+import io
+import os
+import shutil
+import tempfile
 
-# Create your tests here.
+
+class ExpenseListQueryTests(ListQueryBudgetMixin, APITestCase):
+    def seed(self, count):
+        for _ in range(count):
+            trip = create_trip()
+            Expense.objects.create(
+                vehicle=trip.vehicle, trip=trip, expenseType='trip', category='Fuel',
+                amount=80, date=timezone.now(),
+            )
+
+    def test_expense_list_query_count_is_constant(self):
+        self.assertConstantListQueries('/api/expenses/')
+
+
+class PaymentListQueryTests(ListQueryBudgetMixin, APITestCase):
+    def seed(self, count):
+        trip = create_trip()
+        for _ in range(count):
+            Payment.objects.create(trip=trip, amount=100, date=timezone.now(), type='Transfer')
+
+    def test_payment_list_query_count_is_constant(self):
+        self.assertConstantListQueries('/api/payments/')
+
+
+def _mixed_currency_payments(count):
+    trip = create_trip()
+    for i in range(count):
+        Payment.objects.create(
+            trip=trip, amount=100, currency='USD' if i % 2 else 'RWF', date=timezone.now(), type='Cash',
+        )
+
+
+class PaymentConversionQueryTests(ListQueryBudgetMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        use_exchange_rates(self)
+
+    def seed(self, count):
+        _mixed_currency_payments(count)
+
+    def test_converting_mixed_currencies_costs_no_queries_per_row(self):
+        self.assertConstantListQueries('/api/payments/?display_currency=RWF')
+
+
+class PaymentConversionTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(get_user_model().objects.create_user(email='conversion@example.com', password='x'))
+        use_exchange_rates(self)
+        _mixed_currency_payments(2)
+
+    def test_paginated_list_carries_conversion_rates(self):
+        response = self.client.get('/api/payments/?display_currency=RWF&page_size=10')
+        rates = response.data['conversion_rates']
+        self.assertEqual((rates['currency'], rates['rates']['RWF'], rates['rates']['USD']), ('RWF', 1.0, 1300.0))
+        converted = {(row['currency'], row['converted_amount']) for row in response.data['results']}
+        self.assertEqual(converted, {('USD', 130000.0), ('RWF', 100.0)})
+
+
+class ExpenseListFilterTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(get_user_model().objects.create_user(email='filters@example.com', password='x'))
+        self.trip = create_trip()
+        other = create_trip()
+        day = timezone.make_aware(datetime(2026, 3, 10, 12))
+        self.matching = Expense.objects.create(
+            vehicle=self.trip.vehicle, category='Fuel', amount=80, date=day,
+        )
+        Expense.objects.create(vehicle=self.trip.vehicle, category='Tolls', amount=5, date=day)
+        Expense.objects.create(vehicle=self.trip.vehicle, category='Fuel', amount=80, date=day.replace(month=4))
+        Expense.objects.create(vehicle=other.vehicle, category='Fuel', amount=80, date=day)
+
+    def ids(self, query):
+        response = self.client.get(f'/api/expenses/?{query}')
+        self.assertEqual(response.status_code, 200, response.data)
+        return sorted(expense['id'] for expense in response.data)
+
+    def test_filters_combine(self):
+        query = f'vehicle={self.trip.vehicle.pk}&category=Fuel&from=2026-03-01&to=2026-03-31'
+        self.assertEqual(self.ids(query), [self.matching.pk])
+
+    def test_comma_separated_values(self):
+        self.assertEqual(len(self.ids(f'vehicle={self.trip.vehicle.pk}&category=Fuel,Tolls')), 3)
+
+    def test_invalid_values_are_rejected(self):
+        self.assertEqual(self.client.get('/api/expenses/?vehicle=abc').status_code, 400)
+        self.assertEqual(self.client.get('/api/expenses/?from=10/03/2026').status_code, 400)
+
+
+class PaymentListFilterTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(get_user_model().objects.create_user(email='payment-filters@example.com', password='x'))
+        use_exchange_rates(self)
+        self.trip = create_trip()
+        other = create_trip()
+        day = timezone.make_aware(datetime(2026, 3, 10, 12))
+        self.matching = Payment.objects.create(trip=self.trip, amount=100, date=day, type='Cash')
+        self.transfer = Payment.objects.create(trip=self.trip, amount=100, date=day, type='Transfer')
+        self.francs = Payment.objects.create(trip=self.trip, amount=13000, currency='RWF', date=day, type='Cash')
+        Payment.objects.create(trip=self.trip, amount=100, date=day.replace(month=4), type='Cash')
+        self.other = Payment.objects.create(trip=other, amount=100, date=day, type='Cash')
+
+    def ids(self, query):
+        response = self.client.get(f'/api/payments/?{query}')
+        self.assertEqual(response.status_code, 200, response.data)
+        return sorted(payment['id'] for payment in response.data)
+
+    def test_filters_combine(self):
+        query = f'trip={self.trip.pk}&type=Cash&currency=USD&from=2026-03-01&to=2026-03-31'
+        self.assertEqual(self.ids(query), [self.matching.pk])
+        self.assertEqual(self.ids('type=Cash,Transfer&currency=USD&to=2026-03-31'), [self.matching.pk, self.transfer.pk, self.other.pk])
+        self.assertEqual(self.ids(f'vehicle={self.trip.vehicle_id}&currency=RWF'), [self.francs.pk])
+        self.assertEqual(self.ids(f'customer={self.other.trip.customer_id}'), [self.other.pk])
+
+    def test_invalid_values_are_rejected(self):
+        for query in ('trip=abc', 'vehicle=1,2', 'customer=-', 'from=2026-13-01', 'to=31/03/2026'):
+            self.assertEqual(self.client.get(f'/api/payments/?{query}').status_code, 400, query)
+
+
+class ExpenseExportTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(get_user_model().objects.create_user(email='export@example.com', password='x'))
+
+    def add_expenses(self, count):
+        for _ in range(count):
+            trip = create_trip()
+            Expense.objects.create(
+                vehicle=trip.vehicle, trip=trip, expenseType='trip', category='Fuel',
+                amount=80, date=timezone.now(),
+            )
+
+    def export(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode().splitlines()
+
+    def test_export_streams_one_line_per_expense(self):
+        self.add_expenses(3)
+        lines = self.export('/api/expenses/export/')
+        self.assertTrue(lines[0].startswith('ID,Date,Vehicle'))
+        self.assertEqual(len(lines), 4)
+
+    def test_export_applies_filters(self):
+        self.add_expenses(3)
+        vehicle = Expense.objects.first().vehicle
+        lines = self.export(f'/api/expenses/export/?vehicle={vehicle.pk}')
+        self.assertEqual(len(lines), 2)
+        self.assertIn(vehicle.licensePlate, lines[1])
+
+    def test_export_escapes_text_that_spreadsheets_would_evaluate(self):
+        trip = create_trip()
+        Expense.objects.create(
+            vehicle=trip.vehicle, category='+Fuel', vendor='@SUM(A1)',
+            description='=HYPERLINK("http://example.com")', amount=-80, date=timezone.now(),
+        )
+        row = self.export('/api/expenses/export/')[1]
+        self.assertIn(',\'+Fuel,\'@SUM(A1),"\'=HYPERLINK(""http://example.com"")",-80.00,', row)
+
+    def test_export_rejects_bad_dates_before_streaming(self):
+        response = self.client.get('/api/expenses/export/?from=yesterday')
+        self.assertEqual(response.status_code, 400)
+
+
+class ReceiptDownloadTests(APITestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        self.enterContext(override_settings(MEDIA_ROOT=media))
+
+        trip = create_trip()
+        self.expense = Expense.objects.create(
+            vehicle=trip.vehicle, category='Fuel', amount=80, date=timezone.now(),
+            receipt_file=SimpleUploadedFile('fuel.pdf', b'%PDF-1.4 receipt'),
+        )
+        self.url = f'/api/expenses/{self.expense.pk}/receipt/'
+        self.user = get_user_model().objects.create_user(email='receipts@example.com', password='receipts')
+
+    def test_requires_authentication_or_signed_link(self):
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+        self.assertEqual(self.client.get(f'{self.url}?signature=forged').status_code, 401)
+
+    def test_signed_link_from_serializer_downloads_without_token(self):
+        self.client.force_authenticate(self.user)
+        link = self.client.get(f'/api/expenses/{self.expense.pk}/').data['receipt_file_url']
+        self.client.force_authenticate(None)
+
+        response = self.client.get(link)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.4 receipt')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+
+    @override_settings(RECEIPT_ACCEL_REDIRECT=True)
+    def test_hands_transfer_to_nginx(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.expense.receipt_file.name}')
+        self.assertEqual(response.content, b'')
+        self.assertIn('private', response['Cache-Control'])
+
+
+def _upload(name, size, format):
+    buffer = io.BytesIO()
+    # Noisy like a phone photo, so it does not compress unrealistically well
+    channels = [Image.effect_noise(size, 20), Image.linear_gradient('L').resize(size), Image.effect_noise(size, 10)]
+    Image.merge('RGB', channels).save(buffer, format=format, quality=95)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+class ReceiptProcessingTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        self.enterContext(override_settings(MEDIA_ROOT=media))
+        self.vehicle = create_trip().vehicle
+
+    def expense(self, receipt):
+        return Expense.objects.create(
+            vehicle=self.vehicle, category='Fuel', amount=80, date=timezone.now(), receipt_file=receipt,
+        )
+
+    def test_photo_is_recompressed_and_thumbnailed(self):
+        expense = self.expense(_upload('photo.jpg', (4000, 3000), 'JPEG'))
+        original = expense.receipt_file.name
+        original_size = expense.receipt_file.size
+
+        process_receipt(expense.pk)
+        expense.refresh_from_db()
+        self.assertTrue(expense.receipt_file.name.startswith(PROCESSED_PREFIX))
+        self.assertTrue(expense.receipt_file.name.endswith('.jpg'))
+        self.assertLess(expense.receipt_file.size * 10, original_size)
+        self.assertFalse(default_storage.exists(original))
+        with Image.open(expense.receipt_file) as receipt:
+            self.assertLessEqual(max(receipt.size), 1600)
+        with Image.open(expense.receipt_thumbnail) as thumbnail:
+            self.assertEqual(thumbnail.format, 'WEBP')
+            self.assertLessEqual(max(thumbnail.size), 240)
+
+    def test_identical_uploads_share_one_file(self):
+        upload = _upload('a.jpg', (800, 600), 'JPEG')
+        first = self.expense(upload)
+        second = self.expense(SimpleUploadedFile('b.jpg', upload.file.getvalue()))
+        process_receipt(first.pk)
+        process_receipt(second.pk)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.receipt_file.name, second.receipt_file.name)
+        self.assertEqual(first.receipt_hash, second.receipt_hash)
+
+    def test_concurrent_identical_uploads_keep_the_content_addressed_name(self):
+        data = _upload('a.jpg', (800, 600), 'JPEG').file.getvalue()
+        first = store_receipt(data, 'a.jpg')
+        # A second worker whose exists() checks ran before the first one saved
+        exists, checked = default_storage.exists, set()
+
+        def exists_before_first_save(name):
+            if name in checked:
+                return exists(name)
+            checked.add(name)
+            return False
+
+        with mock.patch.object(default_storage, 'exists', side_effect=exists_before_first_save):
+            second = store_receipt(data, 'b.jpg')
+        self.assertEqual(second, first)
+        receipts = default_storage.listdir(os.path.dirname(first[0]))[1]
+        self.assertEqual(receipts, [os.path.basename(first[0])])
+
+    def test_pdf_first_page_is_thumbnailed(self):
+        expense = self.expense(_upload('invoice.pdf', (1240, 1754), 'PDF'))
+        process_receipt(expense.pk)
+        expense.refresh_from_db()
+        self.assertTrue(expense.receipt_file.name.endswith('.pdf'))
+        with Image.open(expense.receipt_thumbnail) as thumbnail:
+            self.assertEqual(thumbnail.format, 'WEBP')
+
+
+class ExpenseBulkReviewTests(APITestCase):
+    def setUp(self):
+        self.manager = get_user_model().objects.create_user(
+            email='manager@example.com', password='manager', role='manager',
+        )
+        self.client.force_authenticate(self.manager)
+        trip = create_trip()
+        self.expenses = [
+            Expense.objects.create(vehicle=trip.vehicle, category='Fuel', amount=80, date=timezone.now())
+            for _ in range(3)
+        ]
+        self.expenses[2].status = 'APPROVED'
+        self.expenses[2].save()
+
+    def test_bulk_approve_reports_each_id(self):
+        pending, _, approved = (expense.pk for expense in self.expenses)
+        # Row lock and one UPDATE, inside a savepoint because the test runs in a transaction
+        with self.assertNumQueries(4):
+            response = self.client.post(
+                '/api/expenses/bulk-approve/', {'ids': [pending, approved, 999999]}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(response.data['results'], {
+            str(pending): 'APPROVED', str(approved): 'NOT_PENDING', '999999': 'NOT_FOUND',
+        })
+        expense = Expense.objects.get(pk=pending)
+        self.assertEqual((expense.status, expense.approved_by), ('APPROVED', self.manager))
+
+    def test_bulk_reject_by_filter_only_touches_pending(self):
+        vehicle = self.expenses[0].vehicle
+        response = self.client.post(
+            '/api/expenses/bulk-reject/', {'filter': {'vehicle': vehicle.pk}, 'reason': 'Duplicate'}, format='json'
+        )
+        self.assertEqual(response.data['updated'], 2)
+        self.assertEqual(
+            sorted(Expense.objects.values_list('status', 'rejection_reason')),
+            [('APPROVED', None), ('REJECTED', 'Duplicate'), ('REJECTED', 'Duplicate')],
+        )
+
+    def test_bulk_review_rejects_unusable_filters(self):
+        for filters in ({}, {'vehicle': ''}, {'vehicle': [1, 2]}, {'from': None}, {'vehicel': 1}, {'from': 2024}):
+            response = self.client.post('/api/expenses/bulk-approve/', {'filter': filters}, format='json')
+            self.assertEqual(response.status_code, 400, filters)
+        self.assertEqual(Expense.objects.filter(status='PENDING').count(), 2)
+
+    def test_bulk_review_rejects_boolean_ids(self):
+        for ids in ([True], [self.expenses[0].pk, False]):
+            response = self.client.post('/api/expenses/bulk-approve/', {'ids': ids}, format='json')
+            self.assertEqual(response.status_code, 400, ids)
+        self.assertEqual(Expense.objects.filter(status='PENDING').count(), 2)
+
+    def test_requires_manager(self):
+        driver = get_user_model().objects.create_user(email='driver@example.com', password='driver')
+        self.client.force_authenticate(driver)
+        response = self.client.post('/api/expenses/bulk-approve/', {'ids': [self.expenses[0].pk]}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(Expense.objects.filter(status='PENDING').count(), 2)
+
+
+class RateGraphTests(SimpleTestCase):
+    def setUp(self):
+        self.graph = RateGraph([
+            ('USD', 'RWF', Decimal('1300')),
+            ('EUR', 'USD', Decimal('1.10')),
+            ('KES', 'UGX', Decimal('28')),
+            ('UGX', 'RWF', Decimal('0.35')),
+        ])
+
+    def test_direct_and_inverse_rates(self):
+        self.assertEqual(self.graph.rate('USD', 'RWF'), Decimal('1300'))
+        self.assertEqual(self.graph.rate('RWF', 'USD'), Decimal('1.0') / Decimal('1300'))
+
+    def test_cross_rate_without_usd_pivot(self):
+        self.assertEqual(self.graph.rate('KES', 'RWF'), Decimal('28') * Decimal('0.35'))
+        self.assertEqual(self.graph.rate('EUR', 'UGX'), Decimal('1.10') * Decimal('1300') / Decimal('0.35'))
+
+    def test_direct_rate_wins_over_inverse(self):
+        graph = RateGraph([('USD', 'RWF', Decimal('1300')), ('RWF', 'USD', Decimal('0.0008'))])
+        self.assertEqual(graph.rate('RWF', 'USD'), Decimal('0.0008'))
+
+    def test_unknown_pair_raises(self):
+        with self.assertRaises(ValueError):
+            self.graph.rate('USD', 'TZS')
+
+
+class RateGraphCacheTests(TestCase):
+    def setUp(self):
+        redis = mock.patch('apps.finance.rates.get_redis_client')
+        self.redis = redis.start().return_value
+        self.redis.get.return_value = b'1'
+        self.addCleanup(redis.stop)
+
+        ExchangeRate.objects.update_or_create(
+            from_currency='USD', to_currency='RWF', is_active=True, defaults={'rate': Decimal('1300')},
+        )
+        invalidate_rates()
+
+    def test_conversions_reuse_the_loaded_graph(self):
+        get_rate_graph()
+        with self.assertNumQueries(0):
+            for amount in range(10000):
+                ExchangeRate.convert(Decimal(amount), 'RWF', 'USD')
+
+    def test_reloads_when_another_process_bumps_the_version(self):
+        get_rate_graph()
+        ExchangeRate.objects.filter(to_currency='RWF').update(rate=Decimal('1400'))
+        self.redis.get.return_value = b'2'
+        with mock.patch('apps.finance.rates._checked_at', 0.0):
+            self.assertEqual(ExchangeRate.get_rate('USD', 'RWF'), Decimal('1400'))
+
+
+class ExchangeRateHistoryTests(TestCase):
+    def setUp(self):
+        ExchangeRateHistory.objects.all().delete()
+        tz = timezone.get_current_timezone()
+        for pair, rate, valid_from in [
+            (('USD', 'RWF'), '1200', datetime(2024, 1, 1)),
+            (('EUR', 'USD'), '1.10', datetime(2024, 1, 1)),
+            (('USD', 'RWF'), '1300', datetime(2025, 3, 10, 9)),
+        ]:
+            ExchangeRateHistory.objects.create(
+                from_currency=pair[0], to_currency=pair[1], rate=Decimal(rate),
+                valid_from=timezone.make_aware(valid_from, tz),
+            )
+
+    def test_rate_as_of_uses_the_rate_in_effect(self):
+        self.assertEqual(ExchangeRateHistory.rate_as_of('USD', 'RWF', date(2025, 3, 9)), Decimal('1200'))
+        self.assertEqual(ExchangeRateHistory.rate_as_of('USD', 'RWF', date(2025, 3, 10)), Decimal('1300'))
+        self.assertEqual(ExchangeRateHistory.rate_as_of('EUR', 'RWF', date(2024, 6, 1)), Decimal('1.10') * Decimal('1200'))
+
+    def test_rate_before_history_raises(self):
+        with self.assertRaises(ValueError):
+            ExchangeRateHistory.rate_as_of('USD', 'RWF', date(2023, 12, 31))
+
+    def test_convert_many_uses_one_query(self):
+        items = [(Decimal('10'), 'USD', date(2024, 6, 1)), (Decimal('10'), 'USD', date(2025, 6, 1))] * 500
+        with self.assertNumQueries(1):
+            converted = ExchangeRateHistory.convert_many(items, 'RWF')
+        self.assertEqual(converted[:2], [Decimal('12000'), Decimal('13000')])
+
+    def test_payment_stores_base_amounts_at_its_date(self):
+        trip = create_trip()
+        tz = timezone.get_current_timezone()
+        payment = Payment.objects.create(
+            trip=trip, amount=Decimal('10'), currency='USD', type='Cash',
+            date=timezone.make_aware(datetime(2024, 6, 1), tz),
+        )
+        self.assertEqual((payment.amountUsd, payment.amountRwf), (Decimal('10.00'), Decimal('12000.00')))
+
+    def test_saving_a_new_rate_records_history(self):
+        redis = mock.patch('apps.finance.rates.get_redis_client')
+        redis.start()
+        self.addCleanup(redis.stop)
+
+        rate = ExchangeRate.objects.get(from_currency='USD', to_currency='EUR', is_active=True)
+        rate.rate = Decimal('0.95')
+        rate.save()
+        rate.save()
+        self.assertEqual(
+            ExchangeRateHistory.rate_as_of('USD', 'EUR', timezone.now()), Decimal('0.95'),
+        )
+        self.assertEqual(ExchangeRateHistory.objects.filter(from_currency='USD', to_currency='EUR').count(), 1)
+
+    def backfill(self, *args):
+        out = io.StringIO()
+        call_command('backfill_base_amounts', '--model', 'expense', '--model', 'payment', '--chunk-size', '2', *args, stdout=out)
+        return out.getvalue()
+
+    def test_backfill_command_fills_missing_base_amounts_at_historical_rates(self):
+        tz = timezone.get_current_timezone()
+        before, after = timezone.make_aware(datetime(2024, 6, 1), tz), timezone.make_aware(datetime(2025, 6, 1), tz)
+        trip = create_trip()
+        expenses = {
+            (currency, amount, when): Expense.objects.create(
+                vehicle=trip.vehicle, category='Fuel', amount=Decimal(amount), currency=currency, date=when,
+            ).pk
+            for currency, amount, when in [
+                ('USD', '10', before), ('RWF', '13000', after), ('EUR', '100', after), ('KES', '500', after),
+            ]
+        }
+        payment = Payment.objects.create(trip=trip, amount=Decimal('12000'), currency='RWF', type='Cash', date=before)
+        Expense.objects.update(amountUsd=None, amountRwf=None)
+        Payment.objects.update(amountUsd=None, amountRwf=None)
+        # Rows that already have base amounts are left alone unless --all is given
+        converted = Expense.objects.create(vehicle=trip.vehicle, category='Fuel', amount=Decimal('10'), date=after)
+        Expense.objects.filter(pk=converted.pk).update(amountUsd=Decimal('1'), amountRwf=Decimal('1'))
+
+        output = self.backfill()
+        self.assertIn('expense: updated 4 row(s)', output)
+        self.assertIn('expense: 1 row(s) have no rate for their date', output)
+        self.assertIn('payment: updated 1 row(s)', output)
+
+        amounts = dict(Expense.objects.values_list('pk', 'amountUsd'))
+        expected = {
+            ('USD', '10', before): (Decimal('10.00'), Decimal('12000.00')),
+            ('RWF', '13000', after): (Decimal('10.00'), Decimal('13000.00')),
+            ('EUR', '100', after): (Decimal('110.00'), Decimal('143000.00')),
+            ('KES', '500', after): (None, None),
+        }
+        self.assertEqual(
+            {key: tuple(Expense.objects.values_list('amountUsd', 'amountRwf').get(pk=pk)) for key, pk in expenses.items()},
+            expected,
+        )
+        self.assertEqual(amounts[converted.pk], Decimal('1'))
+        payment.refresh_from_db()
+        self.assertEqual((payment.amountUsd, payment.amountRwf), (Decimal('10.00'), Decimal('12000.00')))
+
+        # A second run only revisits the row that still has no rate
+        output = self.backfill()
+        self.assertIn('expense: updated 1 row(s)', output)
+        self.assertIn('payment: updated 0 row(s)', output)
+        self.assertEqual(dict(Expense.objects.values_list('pk', 'amountUsd')), amounts)
+
+        self.backfill('--all')
+        converted.refresh_from_db()
+        self.assertEqual((converted.amountUsd, converted.amountRwf), (Decimal('10.00'), Decimal('13000.00')))
+
+
+class DailyFinancialRollupTests(TestCase):
+    def test_rebuild_matches_source_and_verify_detects_drift(self):
+        trip = create_trip()
+        Payment.objects.create(trip=trip, amount=Decimal('200'), date=trip.startDate, type='Cash')
+        Expense.objects.create(vehicle=trip.vehicle, trip=trip, category='Fuel', amount=Decimal('80'), date=trip.startDate)
+        day = timezone.localdate(trip.startDate)
+
+        rebuild_rollup(day, day)
+        totals = DailyFinancialRollup.objects.get(day=day, category='')
+        self.assertEqual((totals.revenue, totals.payments, totals.tripCount), (Decimal('500'), Decimal('200'), 1))
+        self.assertEqual(DailyFinancialRollup.objects.get(day=day, category='Fuel').customerId, trip.customer_id)
+        self.assertEqual(verify_rollup(day, day), [])
+
+        DailyFinancialRollup.objects.filter(category='Fuel').update(expenses=Decimal('1'))
+        self.assertEqual(len(verify_rollup(day, day)), 1)
+
+    def test_deleting_a_vehicle_marks_its_trip_and_payment_days_dirty(self):
+        trip = create_trip()
+        paid_at = trip.startDate - timedelta(days=3)
+        Payment.objects.create(trip=trip, amount=Decimal('200'), date=paid_at, type='Cash')
+        trip_day, payment_day = timezone.localdate(trip.startDate), timezone.localdate(paid_at)
+        rebuild_rollup(payment_day, trip_day)
+
+        with mock.patch('apps.finance.rollup._queue_refresh') as queue_refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                trip.vehicle.delete()
+        queued = set().union(*(call.args[0] for call in queue_refresh.call_args_list))
+        self.assertLessEqual({trip_day, payment_day}, queued)
+
+        for day in queued:
+            rebuild_rollup(day, day)
+        self.assertEqual(verify_rollup(payment_day, trip_day), [])
+        self.assertEqual(set(DailyFinancialRollup.objects.values_list('vehicleId', flat=True)), {0})
+
+
+class DashboardSummaryTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(get_user_model().objects.create_user(email='dashboard@example.com', password='x'))
+        use_exchange_rates(self)
+
+    def test_income_is_payments_in_range_and_pending_is_unpaid_balance(self):
+        march = timezone.make_aware(datetime(2026, 3, 10, 12))
+        april = march.replace(month=4)
+        usd_trip = create_trip(startDate=march, endDate=march)
+        rwf_trip = create_trip(startDate=march, endDate=march, currency='RWF', totalPrice=650000)
+        create_trip(startDate=april, endDate=april)
+        Payment.objects.create(trip=usd_trip, amount=200, date=march, type='Cash')
+        Payment.objects.create(trip=usd_trip, amount=100, date=april, type='Cash')
+        Payment.objects.create(trip=rwf_trip, amount=130000, currency='RWF', date=march, type='Cash')
+        rebuild_rollup(date(2026, 3, 1), date(2026, 4, 30))
+
+        response = self.client.get('/api/dashboard/summary/?from=2026-03-01&to=2026-03-31')
+        self.assertEqual(response.status_code, 200, response.data)
+        # 200 USD + 130,000 RWF paid in March; 200 USD + 520,000 RWF still owed on March trips
+        self.assertEqual(
+            (response.data['totalIncome'], response.data['pendingPayments'], response.data['tripCount']),
+            (Decimal('300'), Decimal('600'), 2),
+        )
+
+        response = self.client.get('/api/dashboard/summary/?from=2026-03-01&to=2026-03-31&display_currency=RWF')
+        self.assertEqual(
+            (response.data['totalIncome'], response.data['pendingPayments']),
+            (Decimal('390000'), Decimal('780000')),
+        )
+
+
+class ExpenseCategoryReportTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(get_user_model().objects.create_user(email='categories@example.com', password='x'))
+        use_exchange_rates(self)
+
+    def test_report_filters_by_date_and_vehicle_and_converts(self):
+        march = timezone.make_aware(datetime(2026, 3, 10, 12))
+        vehicle, other = create_trip().vehicle, create_trip().vehicle
+        Expense.objects.create(vehicle=vehicle, category='Fuel', amount=80, date=march)
+        Expense.objects.create(vehicle=vehicle, category='Fuel', amount=130000, currency='RWF', date=march)
+        Expense.objects.create(vehicle=vehicle, category='Tolls', amount=5, date=march)
+        Expense.objects.create(vehicle=vehicle, category='Fuel', amount=80, date=march.replace(month=4))
+        Expense.objects.create(vehicle=other, category='Fuel', amount=20, date=march)
+        rebuild_rollup(date(2026, 3, 1), date(2026, 4, 30))
+
+        query = f'from=2026-03-01&to=2026-03-31&vehicle={vehicle.pk}'
+        response = self.client.get(f'/api/reports/expense-categories/?{query}')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(
+            [(row['category'], row['total'], row['count']) for row in response.data['categories']],
+            [('Fuel', Decimal('180'), 2), ('Tolls', Decimal('5'), 1)],
+        )
+
+        response = self.client.get(f'/api/reports/expense-categories/?{query}&display_currency=RWF')
+        self.assertEqual(
+            [(row['category'], row['total']) for row in response.data['categories']],
+            [('Fuel', Decimal('234000')), ('Tolls', Decimal('6500'))],
+        )
@@ -1,17 +1,32 @@
 from rest_framework import viewsets, status
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view
 from rest_framework.response import Response
+from django.http import Http404
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Greatest
 from django.utils import timezone
-from .models import Payment, Expense, ExchangeRate, ExpenseCategory
+from decimal import Decimal
+from .conversion import DisplayCurrencyMixin, conversion_factors, converted
+from .receipts import HasReceiptAccess, receipt_response
+from .rollup import filtered_rollup
+from .models import Payment, Expense, ExchangeRate, ExpenseCategory, CENT, can_review_expenses
 from .serializers import PaymentSerializer, ExpenseSerializer, ExchangeRateSerializer, ExpenseCategorySerializer
+from apps.fleet.models import Vehicle, Reminder
+from apps.loans.models import BankLoan, PersonalLoan, AdvancePayment, UnpaidFuel, paid_total
+from apps.operations.models import Trip
+from fleet_management.csv_export import CsvExportMixin
+from fleet_management.filters import DateRange, IdFilter, ValueFilter, apply_list_filters, filter_parameter_names
+from fleet_management.query_params import date_range_filter, parse_int_param
 
 class ExpenseCategoryViewSet(viewsets.ModelViewSet):
     queryset = ExpenseCategory.objects.all()
     serializer_class = ExpenseCategorySerializer
+    cursor_ordering = ('name', 'id')
 
 class ExchangeRateViewSet(viewsets.ModelViewSet):
     queryset = ExchangeRate.objects.all()
     serializer_class = ExchangeRateSerializer
+    cursor_ordering = ('-effective_date', '-id')
     
     @action(detail=False, methods=['get'])
     def active(self, request):
@@ -34,20 +49,94 @@ class ExchangeRateViewSet(viewsets.ModelViewSet):
         
         return Response(rates_map)
 
-class PaymentViewSet(viewsets.ModelViewSet):
+class PaymentViewSet(DisplayCurrencyMixin, CsvExportMixin, viewsets.ModelViewSet):
     queryset = Payment.objects.all()
     serializer_class = PaymentSerializer
+    cursor_ordering = ('-date', '-id')
+    list_filters = (
+        DateRange('date'),
+        IdFilter('trip', 'trip_id'),
+        IdFilter('vehicle', 'trip__vehicle_id'),
+        IdFilter('customer', 'trip__customer_id'),
+        ValueFilter('currency'),
+        ValueFilter('type'),
+    )
+    export_filename = 'payments'
+    export_amount_field = 'amount'
+    export_columns = (
+        ('ID', 'id'),
+        ('Date', 'date'),
+        ('Trip', 'trip_id'),
+        ('Customer', 'trip__customer__name'),
+        ('Vehicle', 'trip__vehicle__licensePlate'),
+        ('Type', 'type'),
+        ('Amount', 'amount'),
+        ('Currency', 'currency'),
+        ('Amount (USD)', 'amountUsd'),
+        ('Amount (RWF)', 'amountRwf'),
+    )
 
-class ExpenseViewSet(viewsets.ModelViewSet):
+# Expenses one bulk-approve/bulk-reject request may change
+BULK_REVIEW_LIMIT = 5000
+
+class ExpenseViewSet(DisplayCurrencyMixin, CsvExportMixin, viewsets.ModelViewSet):
     queryset = Expense.objects.all()
     serializer_class = ExpenseSerializer
+    cursor_ordering = ('-date', '-id')
+    list_filters = (
+        DateRange('date'),
+        IdFilter('vehicle', 'vehicle_id'),
+        IdFilter('trip', 'trip_id'),
+        IdFilter('customer', 'trip__customer_id'),
+        ValueFilter('status'),
+        ValueFilter('currency'),
+        ValueFilter('category'),
+        ValueFilter('expenseType'),
+    )
+    export_filename = 'expenses'
+    export_amount_field = 'amount'
+    export_columns = (
+        ('ID', 'id'),
+        ('Date', 'date'),
+        ('Vehicle', 'vehicle__licensePlate'),
+        ('Trip', 'trip_id'),
+        ('Type', 'expenseType'),
+        ('Category', 'category'),
+        ('Vendor', 'vendor'),
+        ('Description', 'description'),
+        ('Amount', 'amount'),
+        ('Currency', 'currency'),
+        ('Amount (USD)', 'amountUsd'),
+        ('Amount (RWF)', 'amountRwf'),
+        ('Status', 'status'),
+    )
+
+    def get_queryset(self):
+        # vehicleName and tripDescription are rendered for every row
+        return super().get_queryset().select_related('vehicle', 'trip')
+
+    @action(detail=True, methods=['get'], permission_classes=[HasReceiptAccess])
+    def receipt(self, request, pk=None):
+        """Download the receipt file; signed links from receipt_file_url work without a token"""
+        expense = self.get_object()
+        if not expense.receipt_file:
+            raise Http404('This expense has no receipt file.')
+        return receipt_response(expense.receipt_file)
+
+    @action(detail=True, methods=['get'], url_path='receipt/thumbnail', permission_classes=[HasReceiptAccess])
+    def receipt_thumbnail(self, request, pk=None):
+        """Download the WebP thumbnail made when the receipt was processed"""
+        expense = self.get_object()
+        if not expense.receipt_thumbnail:
+            raise Http404('This expense has no receipt thumbnail.')
+        return receipt_response(expense.receipt_thumbnail)
 
     @action(detail=True, methods=['post'])
     def approve(self, request, pk=None):
         expense = self.get_object()
         user = request.user
         
-        if getattr(user, 'role', '') not in ['manager', 'admin'] and not user.is_superuser:
+        if not can_review_expenses(user):
              return Response({'error': 'Only managers can approve expenses'}, status=status.HTTP_403_FORBIDDEN)
              
         expense.status = 'APPROVED'
@@ -61,7 +150,7 @@ class ExpenseViewSet(viewsets.ModelViewSet):
         expense = self.get_object()
         user = request.user
         
-        if getattr(user, 'role', '') not in ['manager', 'admin'] and not user.is_superuser:
+        if not can_review_expenses(user):
              return Response({'error': 'Only managers can reject expenses'}, status=status.HTTP_403_FORBIDDEN)
 
         reason = request.data.get('reason', '')
@@ -71,3 +160,192 @@ class ExpenseViewSet(viewsets.ModelViewSet):
         expense.approved_at = timezone.now()
         expense.save()
         return Response(self.get_serializer(expense).data)
+
+    @action(detail=False, methods=['post'], url_path='bulk-approve')
+    def bulk_approve(self, request):
+        """Approve the pending expenses listed in ``ids``, or matching ``filter``, in one UPDATE"""
+        return self._bulk_review(request, 'APPROVED')
+
+    @action(detail=False, methods=['post'], url_path='bulk-reject')
+    def bulk_reject(self, request):
+        """Reject the pending expenses listed in ``ids``, or matching ``filter``, with one ``reason``"""
+        return self._bulk_review(request, 'REJECTED')
+
+    def _bulk_review(self, request, new_status):
+        """Apply a review to many expenses and report the outcome per ID.
+
+        ``filter`` takes the list's query parameters (``from``/``to``,
+        ``vehicle``, ``category``, ...) and selects only pending expenses.
+        """
+        if not can_review_expenses(request.user):
+            return Response({'error': 'Only managers can review expenses'}, status=status.HTTP_403_FORBIDDEN)
+
+        ids = request.data.get('ids')
+        filters = request.data.get('filter')
+        if ids is not None:
+            if not isinstance(ids, list) or not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids):
+                return Response({'error': 'ids must be a list of expense IDs'}, status=status.HTTP_400_BAD_REQUEST)
+        elif isinstance(filters, dict):
+            error = self._bulk_filter_error(filters)
+            if error:
+                return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+            # JSON numbers are accepted where a query string would carry digits
+            params = {name: str(value) for name, value in filters.items()}
+            pending = Expense.objects.filter(status='PENDING')
+            ids = list(apply_list_filters(pending, params, self.list_filters).values_list('pk', flat=True))
+        else:
+            return Response({'error': 'Provide ids or filter'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > BULK_REVIEW_LIMIT:
+            return Response(
+                {'error': f'At most {BULK_REVIEW_LIMIT} expenses can be reviewed at once'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        outcomes = Expense.review_pending(ids, request.user, new_status, request.data.get('reason', ''))
+        return Response({
+            'updated': sum(1 for outcome in outcomes.values() if outcome == new_status),
+            'results': {str(pk): outcome for pk, outcome in outcomes.items()},
+        })
+
+    def _bulk_filter_error(self, filters):
+        """Why a bulk review ``filter`` is unusable, or None.
+
+        It must name only list filter parameters, with string or integer
+        values, and narrow the selection by at least one of them, so an
+        empty filter cannot review every pending expense.
+        """
+        known = filter_parameter_names(self.list_filters)
+        unknown = sorted(set(filters) - known)
+        if unknown:
+            return f"Unknown filter parameter(s): {', '.join(unknown)}"
+        for name, value in filters.items():
+            if isinstance(value, bool) or not isinstance(value, (str, int)):
+                return f"filter {name} must be a string or an integer"
+        if not any(str(value).strip() for value in filters.values()):
+            return f"filter needs at least one of: {', '.join(sorted(known))}"
+        return None
+
+
+# Loan model, its LoanPayment foreign key and the amount owed before payments
+LOAN_BALANCES = (
+    (BankLoan, 'bank_loan', F('amount')),
+    (PersonalLoan, 'personal_loan', F('amount')),
+    (AdvancePayment, 'advance_payment', F('amount')),
+    (UnpaidFuel, 'unpaid_fuel', F('liters') * F('price_per_liter')),
+)
+
+
+@api_view(['GET'])
+def dashboard_summary(request):
+    """Dashboard KPIs aggregated in the database.
+
+    Accepts ``from``/``to`` (YYYY-MM-DD), ``vehicle`` (id) and
+    ``display_currency`` (default USD). Income is the payments dated in the
+    range and expenses the expenses dated in it, both read from the daily
+    rollup; pending payments are the unpaid balance of trips starting in the
+    range. Totals are grouped by currency in SQL and each group is converted
+    once. Loans are fleet-wide and ignore the filters.
+    """
+    params = request.query_params
+    currency = params.get('display_currency', 'USD')
+    factors = conversion_factors(currency)
+    vehicle_id = parse_int_param(params, 'vehicle')
+
+    rollup = filtered_rollup(params)
+    trips = Trip.objects.filter(**date_range_filter(params, 'startDate'))
+    vehicles = Vehicle.objects.all()
+    reminders = Reminder.objects.filter(status='Overdue')
+    if vehicle_id is not None:
+        trips = trips.filter(vehicle_id=vehicle_id)
+        vehicles = vehicles.filter(pk=vehicle_id)
+        reminders = reminders.filter(vehicle_id=vehicle_id)
+
+    totals = _rollup_totals(rollup, factors)
+    income = totals['payments']
+    expense_total = totals['expenses']
+    pending, _ = _converted_total(trips.filter(balance__gt=0), 'balance', factors)
+    fleet = vehicles.aggregate(total=Count('id'), active=Count('id', filter=Q(status='Active')))
+
+    loans_outstanding = Decimal('0')
+    loan_count = 0
+    for model, loan_field, owed in LOAN_BALANCES:
+        remaining = model.objects.annotate(
+            remaining=Greatest(owed - paid_total(loan_field), Value(Decimal('0')))
+        )
+        outstanding, count = _converted_total(remaining, 'remaining', factors)
+        loans_outstanding += outstanding
+        loan_count += count
+
+    return Response({
+        "currency": currency,
+        "totalIncome": income,
+        "totalExpenses": expense_total,
+        "netProfit": income - expense_total,
+        "pendingPayments": pending,
+        "tripCount": totals['tripCount'],
+        "expenseCount": totals['expenseCount'],
+        "vehicles": fleet,
+        "overdueReminders": reminders.count(),
+        "loans": {
+            "outstanding": loans_outstanding,
+            "count": loan_count,
+        },
+    })
+
+
+def _converted_total(queryset, field, factors):
+    """Sum ``field`` per currency in SQL and convert each group's total once.
+
+    Returns the converted total and the number of rows summed.
+    """
+    converted = Decimal('0')
+    count = 0
+    for row in queryset.order_by().values('currency').annotate(total=Sum(field), rows=Count('id')):
+        converted += (row['total'] or Decimal('0')) * factors.get(row['currency'], Decimal('1'))
+        count += row['rows']
+    return converted.quantize(CENT), count
+
+
+def _rollup_totals(rollup, factors):
+    """Sum the rollup's money columns per currency and convert each group once"""
+    totals = {'revenue': Decimal('0'), 'payments': Decimal('0'), 'expenses': Decimal('0'), 'tripCount': 0, 'expenseCount': 0}
+    groups = rollup.order_by().values('currency').annotate(
+        revenueTotal=Sum('revenue'), paymentTotal=Sum('payments'), expenseTotal=Sum('expenses'),
+        trips=Sum('tripCount'), expenseRows=Sum('expenseCount'),
+    )
+    for row in groups:
+        factor = factors.get(row['currency'], Decimal('1'))
+        totals['revenue'] += row['revenueTotal'] * factor
+        totals['payments'] += row['paymentTotal'] * factor
+        totals['expenses'] += row['expenseTotal'] * factor
+        totals['tripCount'] += row['trips']
+        totals['expenseCount'] += row['expenseRows']
+    for field in ('revenue', 'payments', 'expenses'):
+        totals[field] = totals[field].quantize(CENT)
+    return totals
+
+
+@api_view(['GET'])
+def expense_category_report(request):
+    """Expense totals per category, grouped in SQL and largest first.
+
+    Accepts ``from``/``to`` (by date), ``vehicle``, ``customer`` (expenses
+    on that customer's trips) and ``display_currency`` (default USD). Reads
+    the daily rollup.
+    """
+    params = request.query_params
+    currency = params.get('display_currency', 'USD')
+    factors = conversion_factors(currency)
+
+    categories = (
+        filtered_rollup(params)
+        .filter(expenseCount__gt=0)
+        .order_by()
+        .values('category')
+        .annotate(total=Sum(converted('expenses', factors)), count=Sum('expenseCount'))
+        .order_by('-total')
+    )
+    return Response({
+        'currency': currency,
+        'categories': [{**row, 'total': row['total'].quantize(CENT)} for row in categories],
+    })
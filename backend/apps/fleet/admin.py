@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Vehicle, Reminder, ReminderNotification
+from .models import Vehicle, OdometerReading, Reminder, ReminderNotification, ReminderNotificationDailyStats
 
 @admin.register(Vehicle)
 class VehicleAdmin(admin.ModelAdmin):
@@ -7,16 +7,29 @@ class VehicleAdmin(admin.ModelAdmin):
     search_fields = ('licensePlate', 'make', 'model', 'vin')
     list_filter = ('status', 'make')
 
+@admin.register(OdometerReading)
+class OdometerReadingAdmin(admin.ModelAdmin):
+    list_display = ('vehicle', 'recordedAt', 'odometer', 'fuelLevel', 'receivedAt')
+    search_fields = ('vehicle__licensePlate',)
+    list_select_related = ('vehicle',)
+    date_hierarchy = 'recordedAt'
+
 @admin.register(Reminder)
 class ReminderAdmin(admin.ModelAdmin):
-    list_display = ('title', 'vehicle', 'type', 'dueDate', 'status', 'emailNotification')
+    list_display = ('title', 'vehicle', 'type', 'dueDate', 'dueMileage', 'status', 'emailNotification')
     search_fields = ('title', 'vehicle__licensePlate')
     list_filter = ('type', 'status', 'emailNotification')
     date_hierarchy = 'dueDate'
 
 @admin.register(ReminderNotification)
 class ReminderNotificationAdmin(admin.ModelAdmin):
-    list_display = ('reminder', 'recipientEmail', 'status', 'sentAt')
-    search_fields = ('reminder__title', 'recipientEmail')
+    list_display = ('reminder', 'recipients', 'status', 'sentAt')
+    search_fields = ('reminder__title', 'recipients')
     list_filter = ('status', 'sentAt')
+    list_select_related = ('reminder__vehicle',)
     readonly_fields = ('sentAt',)
+
+@admin.register(ReminderNotificationDailyStats)
+class ReminderNotificationDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ('day', 'sent', 'failed', 'pending')
+    date_hierarchy = 'day'
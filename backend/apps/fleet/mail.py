@@ -0,0 +1,101 @@
+import logging
+import smtplib
+import threading
+import time
+
+from celery.signals import worker_process_shutdown
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+
+logger = logging.getLogger(__name__)
+
+
+class PooledMailSender:
+    """Send email over a long-lived, rate-limited connection.
+
+    One sender is kept per worker process (see ``get_mail_sender``), so the
+    SMTP handshake, STARTTLS and login happen once instead of once per task.
+    A dropped connection is reopened and the failed message retried once.
+    """
+
+    def __init__(self, pooled=True, rate_limit=0, **connection_kwargs):
+        self.pooled = pooled
+        self.rate_limit = rate_limit
+        self.connection_kwargs = connection_kwargs
+        self.connections_opened = 0
+        self._connection = None
+        self._next_send_at = 0.0
+        self._lock = threading.Lock()
+
+    def _open(self):
+        if self._connection is None:
+            self._connection = get_connection(fail_silently=False, **self.connection_kwargs)
+            self._connection.open()
+            self.connections_opened += 1
+        return self._connection
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception as e:
+                logger.warning(f"Error while closing mail connection: {str(e)}")
+            self._connection = None
+
+    def _throttle(self):
+        if not self.rate_limit:
+            return
+        now = time.monotonic()
+        if self._next_send_at > now:
+            time.sleep(self._next_send_at - now)
+            now = self._next_send_at
+        self._next_send_at = now + 1.0 / self.rate_limit
+
+    def _send_one(self, message):
+        self._throttle()
+        try:
+            return self._open().send_messages([message])
+        except (smtplib.SMTPServerDisconnected, ConnectionError) as e:
+            logger.warning(f"Mail connection lost ({str(e)}), reconnecting")
+            self._close()
+            return self._open().send_messages([message])
+
+    def send_messages(self, messages):
+        """Send a batch of EmailMessage objects over one connection, returning the number sent"""
+        with self._lock:
+            try:
+                return sum(self._send_one(message) or 0 for message in messages)
+            except Exception:
+                # Never reuse a connection left in an unknown state
+                self._close()
+                raise
+            finally:
+                if not self.pooled:
+                    self._close()
+
+    def send_mail(self, subject, message, from_email, recipient_list):
+        return self.send_messages([EmailMessage(subject, message, from_email, recipient_list)])
+
+
+_sender = None
+
+
+def get_mail_sender():
+    """Return this process's shared PooledMailSender"""
+    global _sender
+    if _sender is None:
+        _sender = PooledMailSender(
+            pooled=settings.EMAIL_POOLING,
+            rate_limit=settings.EMAIL_RATE_LIMIT,
+        )
+    return _sender
+
+
+@worker_process_shutdown.connect
+def close_mail_sender(**kwargs):
+    if _sender is not None:
+        _sender.close()
@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand
+from django.core.mail import EmailMessage
+from apps.fleet.mail import PooledMailSender
+from fleet_management.testing import FakeSMTPServer
+import time
+
+
+class Command(BaseCommand):
+    help = 'Measure email throughput against a local fake SMTP server with pooling on and off'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=200,
+            help='Number of messages to send per run (default: 200)',
+        )
+        parser.add_argument(
+            '--connect-delay',
+            type=float,
+            default=0.05,
+            help='Seconds the fake server waits per new connection, simulating TLS and login (default: 0.05)',
+        )
+        parser.add_argument(
+            '--rate-limit',
+            type=float,
+            default=0,
+            help='Messages per second cap applied by the sender (default: unlimited)',
+        )
+
+    def handle(self, *args, **options):
+        count = options['count']
+
+        with FakeSMTPServer(connect_delay=options['connect_delay']) as smtp:
+            self.stdout.write(f'Fake SMTP server listening on {smtp.host}:{smtp.port}')
+
+            for pooled in (False, True):
+                sender = PooledMailSender(
+                    pooled=pooled,
+                    rate_limit=options['rate_limit'],
+                    backend='django.core.mail.backends.smtp.EmailBackend',
+                    host=smtp.host,
+                    port=smtp.port,
+                    username='',
+                    password='',
+                    use_tls=False,
+                    use_ssl=False,
+                )
+
+                started = time.perf_counter()
+                for i in range(count):
+                    # One call per message, the way one Celery task sends one email
+                    sender.send_messages([
+                        EmailMessage(f'Benchmark {i}', 'Benchmark message', 'bench@localhost', ['fleet@localhost'])
+                    ])
+                elapsed = time.perf_counter() - started
+                sender.close()
+
+                label = 'pooled' if pooled else 'unpooled'
+                self.stdout.write(
+                    f'{label:>8}: {count} messages in {elapsed:.2f}s '
+                    f'({count / elapsed:.1f} msg/s, {sender.connections_opened} connection(s))'
+                )
+
+            self.stdout.write(self.style.SUCCESS(f'Fake server received {len(smtp.messages)} messages'))
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:12
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import JSONArray, TruncDate
+
+
+def compact_notifications(apps, schema_editor):
+    """Move recipientEmail into recipients and build the daily rollup from existing rows"""
+    ReminderNotification = apps.get_model('fleet', 'ReminderNotification')
+    ReminderNotificationDailyStats = apps.get_model('fleet', 'ReminderNotificationDailyStats')
+
+    ReminderNotification.objects.update(recipients=JSONArray('recipientEmail'))
+
+    daily = {}
+    counts = (
+        ReminderNotification.objects.annotate(day=TruncDate('sentAt'))
+        .values('day', 'status')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    for row in counts:
+        stats = daily.setdefault(row['day'], ReminderNotificationDailyStats(day=row['day']))
+        setattr(stats, row['status'], row['total'])
+    ReminderNotificationDailyStats.objects.bulk_create(daily.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fleet', '0002_remindernotification_alter_reminder_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReminderNotificationDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('sent', models.PositiveIntegerField(default=0)),
+                ('failed', models.PositiveIntegerField(default=0)),
+                ('pending', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Reminder notification daily stats',
+                'ordering': ['-day'],
+            },
+        ),
+        migrations.AddField(
+            model_name='remindernotification',
+            name='recipients',
+            field=models.JSONField(default=list),
+        ),
+        migrations.RunPython(compact_notifications, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='remindernotification',
+            name='recipientEmail',
+        ),
+        migrations.AddIndex(
+            model_name='remindernotification',
+            index=models.Index(fields=['sentAt'], name='fleet_remin_sentAt_7bca69_idx'),
+        ),
+    ]
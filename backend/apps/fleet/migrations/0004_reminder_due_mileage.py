@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fleet', '0003_compact_notification_log'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reminder',
+            name='dueMileage',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reminder',
+            name='notificationKmBefore',
+            field=models.IntegerField(default=500),
+        ),
+        migrations.AlterField(
+            model_name='reminder',
+            name='dueDate',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='reminder',
+            index=models.Index(condition=models.Q(('dueMileage__isnull', False), ('status', 'Pending')), fields=['vehicle', 'dueMileage'], name='fleet_reminder_mileage_idx'),
+        ),
+    ]
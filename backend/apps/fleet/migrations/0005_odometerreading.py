@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fleet', '0004_reminder_due_mileage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OdometerReading',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recordedAt', models.DateTimeField()),
+                ('odometer', models.IntegerField()),
+                ('latitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('longitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('fuelLevel', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('receivedAt', models.DateTimeField(auto_now_add=True)),
+                ('vehicle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='odometerReadings', to='fleet.vehicle')),
+            ],
+            options={
+                'ordering': ['-recordedAt'],
+                'indexes': [models.Index(fields=['vehicle', 'recordedAt'], name='fleet_odome_vehicle_daf20a_idx')],
+            },
+        ),
+    ]
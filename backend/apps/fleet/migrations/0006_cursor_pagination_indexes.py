@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fleet', '0005_odometerreading'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reminder',
+            index=models.Index(fields=['createdAt', 'id'], name='fleet_reminder_cursor_idx'),
+        ),
+    ]
@@ -1,5 +1,13 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
+from django.utils import timezone
+from datetime import datetime, time, timedelta
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Minimum gap between two notifications for the same reminder
+RESEND_COOLDOWN = timedelta(days=3)
 
 class Vehicle(models.Model):
     STATUS_CHOICES = (
@@ -22,6 +30,51 @@ class Vehicle(models.Model):
     def __str__(self):
         return f"{self.make} {self.model} ({self.licensePlate})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_mileage = instance.__dict__.get('currentMileage')
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Check mileage reminders when the odometer reading changes"""
+        mileage_changed = (
+            not self._state.adding
+            and self.currentMileage != getattr(self, '_loaded_mileage', self.currentMileage)
+        )
+        super().save(*args, **kwargs)
+        self._loaded_mileage = self.currentMileage
+
+        if mileage_changed:
+            transaction.on_commit(self._check_mileage_reminders)
+
+    def _check_mileage_reminders(self):
+        from .tasks import check_mileage_reminders
+
+        try:
+            check_mileage_reminders.delay([self.pk])
+        except Exception as e:
+            logger.error(f"Failed to queue mileage reminder check for vehicle {self.pk}: {str(e)}")
+
+class OdometerReading(models.Model):
+    """Append-only odometer/telematics readings; Vehicle.currentMileage holds the latest"""
+    vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name='odometerReadings')
+    recordedAt = models.DateTimeField()
+    odometer = models.IntegerField()
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    fuelLevel = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    receivedAt = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-recordedAt']
+        indexes = [
+            models.Index(fields=['vehicle', 'recordedAt']),
+        ]
+
+    def __str__(self):
+        return f"{self.vehicle_id}: {self.odometer} km at {self.recordedAt}"
+
 class Reminder(models.Model):
     TYPE_CHOICES = (
         ('Insurance', 'Insurance'),
@@ -38,11 +91,14 @@ class Reminder(models.Model):
     vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name='reminders')
     title = models.CharField(max_length=200)
     type = models.CharField(max_length=20, choices=TYPE_CHOICES)
-    dueDate = models.DateField()
+    # Date-based reminders set dueDate, mileage-based ones dueMileage; either or both
+    dueDate = models.DateField(null=True, blank=True)
+    dueMileage = models.IntegerField(null=True, blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Pending')
     notes = models.TextField(blank=True, null=True)
     emailNotification = models.BooleanField(default=False)
     notificationDaysBefore = models.IntegerField(default=7)
+    notificationKmBefore = models.IntegerField(default=500)
     
     # New fields for notification tracking
     lastNotificationSent = models.DateTimeField(null=True, blank=True)
@@ -55,14 +111,73 @@ class Reminder(models.Model):
         indexes = [
             models.Index(fields=['dueDate', 'status']),
             models.Index(fields=['emailNotification']),
+            models.Index(
+                fields=['vehicle', 'dueMileage'],
+                condition=models.Q(status='Pending', dueMileage__isnull=False),
+                name='fleet_reminder_mileage_idx',
+            ),
+            # Keyset pagination order
+            models.Index(fields=['createdAt', 'id'], name='fleet_reminder_cursor_idx'),
         ]
 
+    # Changing any of these moves the moment the next notification is due
+    SCHEDULING_FIELDS = (
+        'dueDate', 'notificationDaysBefore', 'dueMileage', 'notificationKmBefore',
+        'status', 'emailNotification',
+    )
+
     def __str__(self):
         return f"{self.title} - {self.vehicle}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_scheduling_state = instance._scheduling_state()
+        return instance
+
+    def _scheduling_state(self):
+        return tuple(self.__dict__.get(field) for field in self.SCHEDULING_FIELDS)
+
+    def next_notification_at(self):
+        """Return when the next date-based email for this reminder is due, or None if it needs none"""
+        if not self.emailNotification or self.status != 'Pending' or self.dueDate is None:
+            return None
+
+        tz = timezone.get_current_timezone()
+        notify_from = self.dueDate - timedelta(days=self.notificationDaysBefore)
+        next_at = timezone.make_aware(datetime.combine(notify_from, time.min), tz)
+        if self.lastNotificationSent:
+            next_at = max(next_at, self.lastNotificationSent + RESEND_COOLDOWN)
+
+        window_end = timezone.make_aware(datetime.combine(self.dueDate + timedelta(days=1), time.min), tz)
+        if next_at >= window_end:
+            return None
+        return next_at
+
+    def save(self, *args, **kwargs):
+        """Reschedule the notification when a field that drives it changes"""
+        state = self._scheduling_state()
+        needs_schedule = self._state.adding or state != getattr(self, '_loaded_scheduling_state', None)
+        super().save(*args, **kwargs)
+        self._loaded_scheduling_state = state
+
+        if needs_schedule:
+            transaction.on_commit(self._schedule_notification)
+
+    def _schedule_notification(self):
+        from .tasks import check_mileage_reminders, schedule_reminder_notification
+
+        try:
+            schedule_reminder_notification(self)
+            if self.dueMileage is not None:
+                check_mileage_reminders.delay([self.vehicle_id])
+        except Exception as e:
+            # The safety-net check will pick the reminder up on its next run
+            logger.error(f"Failed to schedule notification for reminder {self.pk}: {str(e)}")
+
 
 class ReminderNotification(models.Model):
-    """Track all email notifications sent for reminders"""
+    """Track every email notification attempt for a reminder"""
     STATUS_CHOICES = (
         ('sent', 'Sent'),
         ('failed', 'Failed'),
@@ -71,12 +186,48 @@ class ReminderNotification(models.Model):
     
     reminder = models.ForeignKey(Reminder, on_delete=models.CASCADE, related_name='notifications')
     sentAt = models.DateTimeField(auto_now_add=True)
-    recipientEmail = models.EmailField()
+    # Every address the attempt went to, one row per attempt rather than per recipient
+    recipients = models.JSONField(default=list)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     errorMessage = models.TextField(blank=True, null=True)
     
     class Meta:
         ordering = ['-sentAt']
+        indexes = [
+            models.Index(fields=['sentAt']),
+        ]
     
     def __str__(self):
         return f"{self.reminder.title} - {self.status} at {self.sentAt}"
+
+    @classmethod
+    def log(cls, reminder_ids, recipients, status, error_message=None):
+        """Record one attempt per reminder and count them in the daily rollup"""
+        recipients = list(recipients)
+        rows = cls.objects.bulk_create(
+            cls(reminder_id=reminder_id, recipients=recipients, status=status, errorMessage=error_message)
+            for reminder_id in reminder_ids
+        )
+        if rows:
+            ReminderNotificationDailyStats.increment(timezone.localdate(), status, len(rows))
+        return rows
+
+
+class ReminderNotificationDailyStats(models.Model):
+    """Per-day notification counts, kept after raw ReminderNotification rows are pruned"""
+    day = models.DateField(unique=True)
+    sent = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    pending = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-day']
+        verbose_name_plural = "Reminder notification daily stats"
+
+    def __str__(self):
+        return f"{self.day}: {self.sent} sent, {self.failed} failed, {self.pending} pending"
+
+    @classmethod
+    def increment(cls, day, status, count=1):
+        cls.objects.get_or_create(day=day)
+        cls.objects.filter(day=day).update(**{status: models.F(status) + count})
@@ -15,3 +15,10 @@ class ReminderSerializer(serializers.ModelSerializer):
 
     def get_vehicleName(self, obj):
         return str(obj.vehicle)
+
+    def validate(self, data):
+        due_date = data.get('dueDate', getattr(self.instance, 'dueDate', None))
+        due_mileage = data.get('dueMileage', getattr(self.instance, 'dueMileage', None))
+        if due_date is None and due_mileage is None:
+            raise serializers.ValidationError("A reminder needs a dueDate, a dueMileage or both")
+        return data
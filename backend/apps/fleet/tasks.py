@@ -1,76 +1,344 @@
 from celery import shared_task
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage
+from django.db import transaction
+from django.db.models import Case, DateField, DateTimeField, ExpressionWrapper, F, Q, Value, When
+from django.db.models.functions import Cast
 from django.utils import timezone
 from django.conf import settings
-from datetime import timedelta
-from .models import Reminder, ReminderNotification
+from datetime import datetime, timedelta
+from .mail import get_mail_sender
+from .models import Reminder, ReminderNotification, RESEND_COOLDOWN
+from fleet_management.redis_client import get_redis_client
+from redis.exceptions import LockError
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-@shared_task
-def check_and_send_reminders():
-    """Check for upcoming reminders and send email notifications"""
-    logger.info("Starting reminder check task")
-    today = timezone.now().date()
-    
-    # Get reminders that need notification
+# How far ahead notifications are queued with an ETA. Anything further out is
+# queued by a later safety-net run, so this must exceed the beat interval.
+SCHEDULE_HORIZON = timedelta(hours=26)
+
+# Only one safety-net check may run at a time
+CHECK_LOCK_KEY = 'fleet:reminders:check-lock'
+CHECK_LOCK_TIMEOUT = 15 * 60
+QUEUED_KEY_PREFIX = 'fleet:reminders:queued:'
+
+
+def _notifying_reminders():
+    """Date-based reminders with email on, annotated with the day notifications start.
+
+    Mileage-only reminders have no dueDate and so never match the window
+    filters built on this; they go through ``due_mileage_reminders``.
+    """
+    return Reminder.objects.filter(
+        emailNotification=True,
+        status='Pending',
+    ).annotate(
+        notifyFrom=ExpressionWrapper(
+            F('dueDate') - F('notificationDaysBefore'),
+            output_field=DateField(),
+        )
+    )
+
+
+def due_reminders(now=None):
+    """Reminders inside their notification window and outside the resend cooldown.
+
+    The window (``dueDate - notificationDaysBefore <= today``) and the cooldown
+    are evaluated in SQL so the caller never has to load ineligible rows.
+    """
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+    return _notifying_reminders().filter(
+        Q(lastNotificationSent__isnull=True) | Q(lastNotificationSent__lte=now - RESEND_COOLDOWN),
+        dueDate__gte=today,
+        notifyFrom__lte=today,
+    )
+
+
+def due_mileage_reminders(vehicle_ids=None, now=None):
+    """Mileage reminders whose vehicle has reached dueMileage - notificationKmBefore.
+
+    One query joined to the vehicle's odometer reading, served by the partial
+    (vehicle, dueMileage) index; there is no per-vehicle loop.
+    """
+    now = now or timezone.now()
     reminders = Reminder.objects.filter(
+        Q(lastNotificationSent__isnull=True) | Q(lastNotificationSent__lte=now - RESEND_COOLDOWN),
         emailNotification=True,
         status='Pending',
-        dueDate__gte=today
+        dueMileage__isnull=False,
+        dueMileage__lte=F('vehicle__currentMileage') + F('notificationKmBefore'),
     )
-    
-    logger.info(f"Found {reminders.count()} pending reminders with email notification enabled")
-    
+    if vehicle_ids is not None:
+        reminders = reminders.filter(vehicle_id__in=vehicle_ids)
+    return reminders
+
+
+def _send_individually(reminders, now):
+    """Claim and email each reminder on its own, as the scheduled date path does"""
     sent_count = 0
-    skipped_count = 0
-    
     for reminder in reminders:
-        days_until_due = (reminder.dueDate - today).days
-        
-        logger.info(
-            f"Processing reminder: {reminder.title} (ID: {reminder.id}) - "
-            f"Due in {days_until_due} days, notification threshold: {reminder.notificationDaysBefore} days"
-        )
-        
-        # Send if within notification window and not recently sent
-        if days_until_due <= reminder.notificationDaysBefore:
-            should_send = True
-            
-            if reminder.lastNotificationSent:
-                days_since_last = (timezone.now() - reminder.lastNotificationSent).days
-                logger.info(f"Last notification sent {days_since_last} days ago")
-                should_send = days_since_last >= 3  # Don't spam, wait 3 days between emails
-            
-            if should_send:
-                logger.info(f"Scheduling email for reminder: {reminder.title}")
-                send_reminder_email.delay(reminder.id)
-                sent_count += 1
-            else:
-                logger.info(f"Skipping reminder {reminder.title} - recently sent")
-                skipped_count += 1
+        if not _claim_reminder(reminder, now):
+            continue
+        if send_reminder_email(reminder.id):
+            sent_count += 1
         else:
-            logger.info(
-                f"Skipping reminder {reminder.title} - not yet in notification window "
-                f"({days_until_due} days until due > {reminder.notificationDaysBefore} day threshold)"
-            )
-            skipped_count += 1
-    
-    logger.info(f"Reminder check complete: {sent_count} scheduled, {skipped_count} skipped")
+            _release_claims({reminder.id: reminder.lastNotificationSent}, now)
     return sent_count
 
 
+def schedule_reminder_notification(reminder):
+    """Queue the reminder's next notification for the moment it becomes due.
+
+    Tasks queued earlier for the same reminder are not revoked; they notice on
+    delivery that the reminder has moved on and do nothing.
+    """
+    next_at = reminder.next_notification_at()
+    now = timezone.now()
+    if next_at is None or next_at > now + SCHEDULE_HORIZON:
+        return None
+
+    eta = max(next_at, now)
+    task_id = f"reminder-{reminder.id}-{int(next_at.timestamp())}"
+
+    # Several saves or safety-net runs may try to queue the same notification;
+    # only the first one to claim the task ID actually enqueues it.
+    redis = get_redis_client()
+    queued_key = QUEUED_KEY_PREFIX + task_id
+    ttl = int((eta - now).total_seconds()) + 60 * 60
+    if not redis.set(queued_key, 1, nx=True, ex=ttl):
+        logger.info(f"Notification {task_id} is already queued")
+        return None
+
+    logger.info(f"Scheduling notification for reminder ID: {reminder.id} at {next_at}")
+    try:
+        return send_scheduled_reminder.apply_async(
+            args=[reminder.id, next_at.isoformat()],
+            eta=eta,
+            task_id=task_id,
+        )
+    except Exception:
+        # Nothing was queued, so let the next save or safety-net run try again
+        redis.delete(queued_key)
+        raise
+
+
+def _claim_reminder(reminder, now):
+    """Atomically mark a reminder as notified, unless another worker already has"""
+    previous = reminder.lastNotificationSent
+    unchanged = Q(lastNotificationSent__isnull=True) if previous is None else Q(lastNotificationSent=previous)
+    return Reminder.objects.filter(unchanged, pk=reminder.pk).update(lastNotificationSent=now) == 1
+
+
+def _release_claims(previous_sent, now):
+    """Undo claims for notifications that could not be sent, so they are retried"""
+    Reminder.objects.filter(id__in=previous_sent, lastNotificationSent=now).update(
+        # Cast so Postgres does not type an all-NULL CASE as text
+        lastNotificationSent=Cast(
+            Case(*[When(id=reminder_id, then=Value(sent_at)) for reminder_id, sent_at in previous_sent.items()]),
+            output_field=DateTimeField(),
+        )
+    )
+
+
+@shared_task
+def check_and_send_reminders():
+    """Safety net: send anything overdue for notification and queue the next day's notifications.
+
+    Reminders schedule their own notifications when they are saved, so this
+    only has to catch up on tasks that were lost and on reminders whose
+    notification was too far ahead to queue at save time. Mileage reminders
+    are re-checked across the fleet, since they otherwise run only when an
+    odometer reading changes.
+    """
+    lock = get_redis_client().lock(CHECK_LOCK_KEY, timeout=CHECK_LOCK_TIMEOUT)
+    if not lock.acquire(blocking=False):
+        logger.info("Another reminder check is already running, skipping")
+        return 0
+
+    try:
+        return _check_reminders()
+    finally:
+        try:
+            lock.release()
+        except LockError:
+            logger.warning("Reminder check lock expired before the check finished")
+
+
+def _check_reminders():
+    logger.info("Starting reminder check task")
+    now = timezone.now()
+
+    sent_count = 0
+    if settings.REMINDER_DIGEST_MODE:
+        sent_count = send_reminder_digest()
+    sent_count += check_mileage_reminders(None)
+
+    horizon_date = timezone.localdate(now + SCHEDULE_HORIZON)
+    upcoming = _notifying_reminders().filter(
+        dueDate__gte=timezone.localdate(now),
+        notifyFrom__lte=horizon_date,
+    )
+
+    scheduled_count = 0
+    for reminder in upcoming.iterator():
+        if schedule_reminder_notification(reminder):
+            scheduled_count += 1
+
+    logger.info(f"Reminder check complete: {sent_count} sent, {scheduled_count} scheduled")
+    return sent_count + scheduled_count
+
+
+@shared_task
+def send_scheduled_reminder(reminder_id, scheduled_for):
+    """Send the notification queued for a reminder, unless it has been rescheduled since"""
+    try:
+        reminder = Reminder.objects.get(id=reminder_id)
+    except Reminder.DoesNotExist:
+        logger.info(f"Reminder {reminder_id} no longer exists, dropping scheduled notification")
+        return False
+
+    next_at = reminder.next_notification_at()
+    if next_at is None or next_at != datetime.fromisoformat(scheduled_for):
+        logger.info(f"Dropping stale notification for reminder ID: {reminder_id} (scheduled for {scheduled_for})")
+        return False
+
+    if settings.REMINDER_DIGEST_MODE:
+        sent = send_reminder_digest() > 0
+    else:
+        # A redelivered or duplicate task finds the reminder already claimed
+        now = timezone.now()
+        if not _claim_reminder(reminder, now):
+            logger.info(f"Notification for reminder ID: {reminder_id} already sent by another worker")
+            return False
+        sent = send_reminder_email(reminder_id)
+        if not sent:
+            _release_claims({reminder.id: reminder.lastNotificationSent}, now)
+
+    # Queue the follow-up once the resend cooldown has passed
+    reminder.refresh_from_db()
+    schedule_reminder_notification(reminder)
+    return sent
+
+
+def _format_reminder_line(reminder, today):
+    vehicle = reminder.vehicle
+    lines = [
+        f"- {reminder.title} [{reminder.type}]",
+        f"  Vehicle: {vehicle.make} {vehicle.model} ({vehicle.licensePlate})",
+    ]
+    lines += [f"  {detail}" for detail in _due_details(reminder, today)]
+    if reminder.notes:
+        lines.append(f"  Notes: {reminder.notes}")
+    return "\n".join(lines)
+
+
+def _due_details(reminder, today):
+    details = []
+    if reminder.dueDate is not None:
+        days_until_due = (reminder.dueDate - today).days
+        details.append(
+            f"Due Date: {reminder.dueDate.strftime('%B %d, %Y')} "
+            f"({days_until_due} day{'s' if days_until_due != 1 else ''})"
+        )
+    if reminder.dueMileage is not None:
+        details.append(
+            f"Due Mileage: {reminder.dueMileage:,} km "
+            f"(current: {reminder.vehicle.currentMileage:,} km)"
+        )
+    return details
+
+
+@shared_task
+def send_reminder_digest():
+    """Send one email per recipient listing every reminder that is due by date"""
+    now = timezone.now()
+    return _send_digest(due_reminders(now), now)
+
+
+def _send_digest(reminders, now):
+    """Claim the given reminders and send one email per recipient listing them.
+
+    Runs a fixed number of queries (one locking select, one update, one insert
+    plus the rollup increment) and a single SMTP session regardless of how many
+    reminders are due.
+    """
+    recipients = settings.REMINDER_NOTIFICATION_RECIPIENTS
+    if not recipients:
+        logger.error("No REMINDER_NOTIFICATION_RECIPIENTS configured in settings")
+        return 0
+
+    today = timezone.localdate(now)
+
+    # Claim the due reminders before sending. Rows locked by a concurrent run
+    # are skipped, and once committed the claim takes them out of due_reminders.
+    previous_sent = {}
+    lines = []
+    with transaction.atomic():
+        due = (
+            reminders
+            .select_related('vehicle')
+            .select_for_update(skip_locked=True, of=('self',))
+            .order_by('dueDate', 'id')
+        )
+        for reminder in due.iterator():
+            previous_sent[reminder.id] = reminder.lastNotificationSent
+            lines.append(_format_reminder_line(reminder, today))
+        Reminder.objects.filter(id__in=previous_sent).update(lastNotificationSent=now)
+
+    reminder_ids = list(previous_sent)
+    if not reminder_ids:
+        logger.info("Reminder digest: nothing due")
+        return 0
+
+    count = len(reminder_ids)
+    subject = f"🔔 {count} fleet reminder{'s' if count != 1 else ''} due"
+    body = "\n\n".join(lines)
+    message = f"""Dear Team,
+
+The following reminders are due soon:
+
+{body}
+
+Please take necessary action before the due dates.
+
+Best regards,
+IDA Fleet Management System
+
+---
+This is an automated notification. Please do not reply to this email.
+"""
+
+    messages = [
+        EmailMessage(subject, message, settings.DEFAULT_FROM_EMAIL, [recipient])
+        for recipient in recipients
+    ]
+
+    try:
+        get_mail_sender().send_messages(messages)
+    except Exception as e:
+        logger.error(f"Failed to send reminder digest: {str(e)}", exc_info=True)
+        _release_claims(previous_sent, now)
+        ReminderNotification.log(reminder_ids, recipients, 'failed', str(e))
+        return 0
+
+    ReminderNotification.log(reminder_ids, recipients, 'sent')
+
+    logger.info(f"Reminder digest sent to {len(recipients)} recipient(s) covering {count} reminder(s)")
+    return count
+
+
 @shared_task
 def send_reminder_email(reminder_id):
     """Send a single reminder email"""
     try:
         logger.info(f"Starting to send email for reminder ID: {reminder_id}")
         
-        reminder = Reminder.objects.get(id=reminder_id)
+        reminder = Reminder.objects.select_related('vehicle').get(id=reminder_id)
         vehicle = reminder.vehicle
-        days_until_due = (reminder.dueDate - timezone.now().date()).days
+        due_details = "\n".join(_due_details(reminder, timezone.localdate()))
         
         # Get recipient list from settings
         recipients = settings.REMINDER_NOTIFICATION_RECIPIENTS
@@ -89,8 +357,7 @@ This is a reminder for: {reminder.title}
 
 Vehicle: {vehicle.make} {vehicle.model} ({vehicle.licensePlate})
 Type: {reminder.type}
-Due Date: {reminder.dueDate.strftime('%B %d, %Y')}
-Days until due: {days_until_due} day{'s' if days_until_due != 1 else ''}
+{due_details}
 
 {f'Notes: {reminder.notes}' if reminder.notes else ''}
 
@@ -105,23 +372,16 @@ This is an automated notification. Please do not reply to this email.
         
         logger.info(f"Sending email with subject: {subject}")
         
-        send_mail(
+        get_mail_sender().send_mail(
             subject,
             message,
             settings.DEFAULT_FROM_EMAIL,
             recipients,
-            fail_silently=False,
         )
         
         logger.info(f"Email sent successfully for reminder: {reminder.title}")
         
-        # Log successful notification for each recipient
-        for recipient_email in recipients:
-            ReminderNotification.objects.create(
-                reminder=reminder,
-                recipientEmail=recipient_email,
-                status='sent'
-            )
+        ReminderNotification.log([reminder.id], recipients, 'sent')
         
         # Update reminder
         reminder.lastNotificationSent = timezone.now()
@@ -139,19 +399,41 @@ This is an automated notification. Please do not reply to this email.
         # Log failed notification
         try:
             recipients = getattr(settings, 'REMINDER_NOTIFICATION_RECIPIENTS', [settings.DEFAULT_FROM_EMAIL])
-            for recipient_email in recipients:
-                ReminderNotification.objects.create(
-                    reminder_id=reminder_id,
-                    recipientEmail=recipient_email,
-                    status='failed',
-                    errorMessage=str(e)
-                )
+            ReminderNotification.log([reminder_id], recipients, 'failed', str(e))
         except Exception as log_error:
             logger.error(f"Failed to log notification error: {str(log_error)}")
         
         return False
 
 
+@shared_task
+def check_mileage_reminders(vehicle_ids=None):
+    """Notify and expire mileage reminders after odometer readings change.
+
+    Pass the IDs of the vehicles whose mileage changed, or None to check the
+    whole fleet. The cost is a handful of queries however many vehicles changed,
+    plus one email per due reminder when REMINDER_DIGEST_MODE is off.
+    """
+    now = timezone.now()
+    due = due_mileage_reminders(vehicle_ids, now)
+    if settings.REMINDER_DIGEST_MODE:
+        sent_count = _send_digest(due, now)
+    else:
+        sent_count = _send_individually(due, now)
+
+    overdue = Reminder.objects.filter(
+        status='Pending',
+        dueMileage__isnull=False,
+        dueMileage__lte=F('vehicle__currentMileage'),
+    )
+    if vehicle_ids is not None:
+        overdue = overdue.filter(vehicle_id__in=vehicle_ids)
+    overdue_count = overdue.update(status='Overdue')
+
+    logger.info(f"Mileage reminder check: {sent_count} notified, {overdue_count} marked overdue")
+    return sent_count
+
+
 @shared_task
 def mark_overdue_reminders():
     """Mark reminders as overdue if past due date"""
@@ -163,3 +445,24 @@ def mark_overdue_reminders():
     
     logger.info(f"Marked {updated} reminders as overdue")
     return updated
+
+
+@shared_task
+def prune_reminder_notifications(batch_size=1000):
+    """Delete raw notification log rows past the retention period, in chunks.
+
+    Daily counts survive in ReminderNotificationDailyStats.
+    """
+    cutoff = timezone.now() - timedelta(days=settings.REMINDER_NOTIFICATION_RETENTION_DAYS)
+    expired = ReminderNotification.objects.filter(sentAt__lt=cutoff).order_by('sentAt')
+
+    deleted = 0
+    while True:
+        ids = list(expired.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        count, _ = ReminderNotification.objects.filter(id__in=ids).delete()
+        deleted += count
+
+    logger.info(f"Pruned {deleted} reminder notifications older than {cutoff}")
+    return deleted
@@ -0,0 +1,193 @@
+from decimal import Decimal, InvalidOperation
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import OdometerReading, Vehicle
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Largest values the bigint vehicle id and integer odometer columns hold
+MAX_VEHICLE_ID = 2 ** 63 - 1
+MAX_ODOMETER = 2 ** 31 - 1
+
+
+class ReadingError(ValueError):
+    pass
+
+
+def _decimal_or_none(value, field, minimum, maximum, places):
+    """Parse an optional number, rounded to the column's decimal places and checked against its range"""
+    if value is None or value == '':
+        return None
+    try:
+        number = Decimal(str(value))
+    except InvalidOperation:
+        raise ReadingError(f"{field} must be a number")
+    if not number.is_finite() or not minimum <= number <= maximum:
+        raise ReadingError(f"{field} must be between {minimum} and {maximum}")
+    return number.quantize(Decimal(1).scaleb(-places))
+
+
+def _integer(value):
+    """int(value), refusing booleans and floats with a fractional part instead of truncating them"""
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError(value)
+    return int(value)
+
+
+def parse_readings(body):
+    """Split a request body into reading dicts.
+
+    Accepts JSON lines (one object per line) or a single JSON array.
+    Returns ``(readings, errors)`` where each reading and error carries the
+    zero-based ``line`` it came from.
+    """
+    text = body.decode('utf-8') if isinstance(body, bytes) else body
+    is_array = text.lstrip().startswith('[')
+    if is_array:
+        items = enumerate(json.loads(text))
+    else:
+        items = ((number, line) for number, line in enumerate(text.splitlines()) if line.strip())
+
+    readings, errors = [], []
+    for number, item in items:
+        try:
+            data = item if is_array else json.loads(item)
+            if not isinstance(data, dict):
+                raise ReadingError("reading must be a JSON object")
+            readings.append(_clean_reading(data, number))
+        except (ReadingError, ValueError) as e:
+            errors.append({"line": number, "error": str(e)})
+    return readings, errors
+
+
+def _clean_reading(data, number):
+    vehicle_id = data.get('vehicle')
+    if vehicle_id is None:
+        vehicle_id = data.get('id')
+    plate = data.get('licensePlate')
+    if plate is not None and not (isinstance(plate, str) and plate.strip()):
+        raise ReadingError("licensePlate must be a non-empty string")
+    if vehicle_id is None and plate is None:
+        raise ReadingError("vehicle id or licensePlate is required")
+    if vehicle_id is not None:
+        try:
+            vehicle_id = _integer(vehicle_id)
+        except (TypeError, ValueError):
+            raise ReadingError("vehicle must be an integer id")
+        if not 0 < vehicle_id <= MAX_VEHICLE_ID:
+            raise ReadingError("vehicle id is out of range")
+
+    recorded_at = parse_datetime(str(data.get('timestamp') or ''))
+    if recorded_at is None:
+        raise ReadingError("timestamp must be an ISO 8601 datetime")
+    if timezone.is_naive(recorded_at):
+        recorded_at = timezone.make_aware(recorded_at)
+
+    try:
+        odometer = _integer(data['odometer'])
+    except (KeyError, TypeError, ValueError):
+        raise ReadingError("odometer must be an integer")
+    if odometer < 0:
+        raise ReadingError("odometer cannot be negative")
+    if odometer > MAX_ODOMETER:
+        raise ReadingError(f"odometer cannot exceed {MAX_ODOMETER}")
+
+    return {
+        'line': number,
+        'vehicle_id': vehicle_id,
+        'licensePlate': plate,
+        'recordedAt': recorded_at,
+        'odometer': odometer,
+        'latitude': _decimal_or_none(data.get('lat'), 'lat', -90, 90, 6),
+        'longitude': _decimal_or_none(data.get('lon'), 'lon', -180, 180, 6),
+        'fuelLevel': _decimal_or_none(data.get('fuelLevel'), 'fuelLevel', 0, 100, 2),
+    }
+
+
+def _apply_latest_mileage(latest):
+    """Write each vehicle's newest odometer value back in one UPDATE ... FROM (VALUES ...).
+
+    Returns the IDs of vehicles whose mileage went up. A batch that arrives
+    late never rolls an odometer back.
+    """
+    if not latest:
+        return []
+
+    table = connection.ops.quote_name(Vehicle._meta.db_table)
+    mileage = connection.ops.quote_name('currentMileage')
+    updated_at = connection.ops.quote_name('updatedAt')
+    values = ', '.join(['(%s::bigint, %s::integer)'] * len(latest))
+    params = [timezone.now()]
+    for vehicle_id, odometer in latest.items():
+        params += [vehicle_id, odometer]
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {table} AS v SET {mileage} = r.odometer, {updated_at} = %s "
+            f"FROM (VALUES {values}) AS r(id, odometer) "
+            f"WHERE v.id = r.id AND r.odometer > v.{mileage} "
+            f"RETURNING v.id",
+            params,
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def ingest_readings(readings, errors=None):
+    """Store a batch of cleaned readings and update vehicle mileage.
+
+    Costs one query to resolve licence plates and vehicle IDs, one batched
+    insert and one UPDATE, however many readings are in the batch.
+    """
+    from .tasks import check_mileage_reminders
+
+    errors = list(errors or [])
+    plates = {r['licensePlate'] for r in readings if r['vehicle_id'] is None}
+    ids = {r['vehicle_id'] for r in readings if r['vehicle_id'] is not None}
+    vehicles = Vehicle.objects.filter(
+        Q(licensePlate__in=plates) | Q(id__in=ids)
+    ).values_list('id', 'licensePlate') if readings else []
+    ids_by_plate = {plate: vehicle_id for vehicle_id, plate in vehicles}
+    known_ids = set(ids_by_plate.values())
+
+    rows = []
+    latest = {}
+    for reading in readings:
+        vehicle_id = reading['vehicle_id']
+        if vehicle_id is None:
+            vehicle_id = ids_by_plate.get(reading['licensePlate'])
+        if vehicle_id not in known_ids:
+            errors.append({"line": reading['line'], "error": "unknown vehicle"})
+            continue
+
+        rows.append(OdometerReading(
+            vehicle_id=vehicle_id,
+            recordedAt=reading['recordedAt'],
+            odometer=reading['odometer'],
+            latitude=reading['latitude'],
+            longitude=reading['longitude'],
+            fuelLevel=reading['fuelLevel'],
+        ))
+        newest = latest.get(vehicle_id)
+        if newest is None or reading['recordedAt'] >= newest[0]:
+            latest[vehicle_id] = (reading['recordedAt'], reading['odometer'])
+
+    with transaction.atomic():
+        OdometerReading.objects.bulk_create(rows, batch_size=2000)
+        changed = _apply_latest_mileage({vid: odometer for vid, (_, odometer) in latest.items()})
+
+    if changed:
+        try:
+            check_mileage_reminders.delay(changed)
+        except Exception as e:
+            logger.error(f"Failed to queue mileage reminder check: {str(e)}")
+
+    return {
+        "accepted": len(rows),
+        "rejected": sorted(errors, key=lambda error: error['line']),
+        "vehiclesUpdated": len(changed),
+    }
@@ -1,3 +1,689 @@
-from django.test import TestCase
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.db import connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from redis.exceptions import LockError
+from rest_framework.test import APITestCase
+from fleet_management.testing import FakeSMTPServer, ListQueryBudgetMixin, create_trip, create_vehicle, use_exchange_rates
+from .mail import PooledMailSender
+from apps.finance.models import Expense
+from .models import OdometerReading, Vehicle, Reminder, ReminderNotification, ReminderNotificationDailyStats, RESEND_COOLDOWN
+from .tasks import (
+    CHECK_LOCK_KEY, CHECK_LOCK_TIMEOUT, QUEUED_KEY_PREFIX,
+    _claim_reminder, _release_claims, check_and_send_reminders, check_mileage_reminders,
+    due_mileage_reminders, due_reminders, prune_reminder_notifications, schedule_reminder_notification,
+    send_reminder_digest, send_scheduled_reminder,
+)
+import json
+import smtplib
+import threading
+import time
 
-# Create your tests here.
+
+def _message(i=0):
+    return EmailMessage(f'Test {i}', 'Body', 'from@localhost', ['to@localhost'])
+
+
+class PooledMailSenderTests(SimpleTestCase):
+    def setUp(self):
+        self.smtp = FakeSMTPServer().start()
+        self.addCleanup(self.smtp.stop)
+
+    def make_sender(self, **kwargs):
+        sender = PooledMailSender(
+            backend='django.core.mail.backends.smtp.EmailBackend',
+            host=self.smtp.host, port=self.smtp.port,
+            username='', password='', use_tls=False, use_ssl=False,
+            **kwargs
+        )
+        self.addCleanup(sender.close)
+        return sender
+
+    def test_pooled_sender_reuses_one_connection(self):
+        sender = self.make_sender()
+        for i in range(5):
+            sender.send_messages([_message(i)])
+        self.assertEqual(len(self.smtp.messages), 5)
+        self.assertEqual(self.smtp.connections, 1)
+
+    def test_unpooled_sender_opens_a_connection_per_call(self):
+        sender = self.make_sender(pooled=False)
+        for i in range(3):
+            sender.send_messages([_message(i)])
+        self.assertEqual(self.smtp.connections, 3)
+
+    def test_send_messages_batches_over_one_connection(self):
+        sender = self.make_sender(pooled=False)
+        self.assertEqual(sender.send_messages([_message(i) for i in range(4)]), 4)
+        self.assertEqual(self.smtp.connections, 1)
+
+    def test_reconnects_after_dropped_connection(self):
+        sender = self.make_sender()
+        sender.send_messages([_message(1)])
+        # Simulate the server closing an idle connection
+        sender._connection.connection.close()
+        sender.send_messages([_message(2)])
+        self.assertEqual(len(self.smtp.messages), 2)
+        self.assertEqual(sender.connections_opened, 2)
+
+    def test_rate_limit_spaces_out_messages(self):
+        sender = self.make_sender(rate_limit=20)
+        started = time.monotonic()
+        sender.send_messages([_message(i) for i in range(5)])
+        self.assertGreaterEqual(time.monotonic() - started, 4 / 20)
+
+
+class VehicleListQueryTests(ListQueryBudgetMixin, APITestCase):
+    def seed(self, count):
+        for _ in range(count):
+            create_vehicle()
+
+    def test_vehicle_list_query_count_is_constant(self):
+        self.assertConstantListQueries('/api/vehicles/')
+
+
+class ReminderListQueryTests(ListQueryBudgetMixin, APITestCase):
+    def seed(self, count):
+        for _ in range(count):
+            Reminder.objects.create(
+                vehicle=create_vehicle(), title='Insurance renewal', type='Insurance',
+                dueDate=timezone.localdate(),
+            )
+
+    def test_reminder_list_query_count_is_constant(self):
+        self.assertConstantListQueries('/api/reminders/')
+
+
+class FleetListFilterTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(get_user_model().objects.create_user(email='fleet-filters@example.com', password='x'))
+        self.vehicle = create_vehicle()
+        self.in_repair = create_vehicle(status='Under Maintenance')
+        self.retired = create_vehicle(status='Inactive')
+
+        def remind(vehicle, due, **extra):
+            fields = {'title': 'Insurance renewal', 'type': 'Insurance', **extra}
+            return Reminder.objects.create(vehicle=vehicle, dueDate=due, **fields)
+
+        self.matching = remind(self.vehicle, date(2026, 3, 10))
+        self.service = remind(self.vehicle, date(2026, 3, 12), type='Service')
+        self.done = remind(self.vehicle, date(2026, 3, 14), status='Completed')
+        remind(self.vehicle, date(2026, 4, 10))
+        self.elsewhere = remind(self.in_repair, date(2026, 3, 10))
+
+    def ids(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.data)
+        return sorted(row['id'] for row in response.data)
+
+    def test_vehicle_status_filter(self):
+        self.assertEqual(self.ids('/api/vehicles/?status=Inactive'), [self.retired.pk])
+        self.assertEqual(self.ids('/api/vehicles/?status=Active,Under Maintenance'), [self.vehicle.pk, self.in_repair.pk])
+
+    def test_reminder_filters_combine(self):
+        query = f'vehicle={self.vehicle.pk}&status=Pending&type=Insurance&from=2026-03-01&to=2026-03-31'
+        self.assertEqual(self.ids(f'/api/reminders/?{query}'), [self.matching.pk])
+        self.assertEqual(
+            self.ids('/api/reminders/?type=Insurance,Service&status=Pending&to=2026-03-31'),
+            [self.matching.pk, self.service.pk, self.elsewhere.pk],
+        )
+        self.assertEqual(self.ids(f'/api/reminders/?vehicle={self.vehicle.pk}&status=Completed'), [self.done.pk])
+
+    def test_invalid_values_are_rejected(self):
+        for query in ('vehicle=abc', 'vehicle=2.0', 'from=2026-3-1x', 'to=March'):
+            self.assertEqual(self.client.get(f'/api/reminders/?{query}').status_code, 400, query)
+        # An empty value means no filter
+        self.assertEqual(len(self.ids('/api/reminders/?vehicle=&from=')), 5)
+
+
+class TelemetryIngestTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(get_user_model().objects.create_user(email='telemetry@example.com', password='x'))
+        self.vehicle = create_vehicle()
+        delay = mock.patch('apps.fleet.tasks.check_mileage_reminders.delay')
+        delay.start()
+        self.addCleanup(delay.stop)
+
+    def post(self, readings):
+        body = '\n'.join(json.dumps(reading) for reading in readings)
+        return self.client.post('/api/vehicles/ingest-readings/', body, content_type='application/x-ndjson')
+
+    def reading(self, **extra):
+        return {'vehicle': self.vehicle.pk, 'timestamp': '2026-05-01T08:00:00Z', 'odometer': 1200, **extra}
+
+    def test_invalid_readings_are_rejected_per_line(self):
+        response = self.post([
+            self.reading(lat='-1.9441234567', lon='30.0619', fuelLevel=55.555),
+            self.reading(fuelLevel=1000),
+            self.reading(lat=91),
+            self.reading(lon='-Infinity'),
+            self.reading(fuelLevel='NaN'),
+            self.reading(vehicle=2 ** 63),
+            self.reading(odometer=2 ** 31),
+            self.reading(vehicle=None, licensePlate=['KBC']),
+            self.reading(vehicle=None, licensePlate=''),
+            self.reading(vehicle=True),
+            self.reading(vehicle=self.vehicle.pk + 0.7),
+            self.reading(vehicle=None, id=False),
+            self.reading(odometer=1234.9),
+            self.reading(odometer=1300.0),
+        ])
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.data['accepted'], 2)
+        self.assertEqual([error['line'] for error in response.data['rejected']], list(range(1, 13)))
+
+        reading = OdometerReading.objects.get(odometer=1200)
+        self.assertEqual(
+            (str(reading.latitude), str(reading.longitude), str(reading.fuelLevel)),
+            ('-1.944123', '30.061900', '55.56'),
+        )
+        self.vehicle.refresh_from_db()
+        self.assertEqual(self.vehicle.currentMileage, 1300)
+
+    def test_unknown_vehicle_does_not_fail_the_batch(self):
+        response = self.post([self.reading(vehicle=self.vehicle.pk + 1000), self.reading()])
+        self.assertEqual(response.data['accepted'], 1)
+        self.assertEqual(response.data['rejected'], [{'line': 0, 'error': 'unknown vehicle'}])
+
+
+class ReminderDispatchTests(TestCase):
+    def setUp(self):
+        redis = mock.patch('apps.fleet.tasks.get_redis_client')
+        self.redis = redis.start().return_value
+        self.redis.set.return_value = True
+        self.addCleanup(redis.stop)
+        apply_async = mock.patch('apps.fleet.tasks.send_scheduled_reminder.apply_async')
+        self.apply_async = apply_async.start()
+        self.addCleanup(apply_async.stop)
+
+        self.vehicle = create_vehicle()
+        self.reminder = self.remind()
+
+    def remind(self, **extra):
+        return Reminder.objects.create(
+            vehicle=self.vehicle, title='Insurance renewal', type='Insurance',
+            dueDate=timezone.localdate() + timedelta(days=3), emailNotification=True, **extra,
+        )
+
+    def test_queues_under_a_deterministic_task_id(self):
+        next_at = self.reminder.next_notification_at()
+        schedule_reminder_notification(self.reminder)
+
+        task_id = f'reminder-{self.reminder.pk}-{int(next_at.timestamp())}'
+        self.assertEqual(self.apply_async.call_args.kwargs['task_id'], task_id)
+        self.redis.set.assert_called_once_with(QUEUED_KEY_PREFIX + task_id, 1, nx=True, ex=mock.ANY)
+
+    def test_duplicate_queue_is_dropped(self):
+        self.redis.set.return_value = None
+        self.assertIsNone(schedule_reminder_notification(self.reminder))
+        self.apply_async.assert_not_called()
+
+    def test_queued_key_is_released_when_the_broker_fails(self):
+        self.apply_async.side_effect = ConnectionError('broker down')
+        with self.assertRaises(ConnectionError):
+            schedule_reminder_notification(self.reminder)
+        self.redis.delete.assert_called_once_with(self.redis.set.call_args.args[0])
+
+    def test_only_one_worker_claims_a_reminder(self):
+        stale = Reminder.objects.get(pk=self.reminder.pk)
+        now = timezone.now()
+        self.assertTrue(_claim_reminder(self.reminder, now))
+        self.assertFalse(_claim_reminder(stale, now + timedelta(seconds=1)))
+        self.reminder.refresh_from_db()
+        self.assertEqual(self.reminder.lastNotificationSent, now)
+
+    def test_release_restores_claims_not_taken_over_since(self):
+        earlier = timezone.now() - timedelta(days=5)
+        resent = self.remind(lastNotificationSent=earlier)
+        taken_over = self.remind()
+        now = timezone.now()
+        Reminder.objects.update(lastNotificationSent=now)
+        later = now + timedelta(minutes=1)
+        Reminder.objects.filter(pk=taken_over.pk).update(lastNotificationSent=later)
+
+        _release_claims({self.reminder.pk: None, resent.pk: earlier, taken_over.pk: None}, now)
+
+        sent = dict(Reminder.objects.values_list('pk', 'lastNotificationSent'))
+        self.assertEqual(sent, {self.reminder.pk: None, resent.pk: earlier, taken_over.pk: later})
+
+    def test_safety_net_skips_while_another_check_holds_the_lock(self):
+        self.redis.lock.return_value.acquire.return_value = False
+        with mock.patch('apps.fleet.tasks._check_reminders') as check:
+            self.assertEqual(check_and_send_reminders(), 0)
+        check.assert_not_called()
+        self.redis.lock.assert_called_once_with(CHECK_LOCK_KEY, timeout=CHECK_LOCK_TIMEOUT)
+
+    def test_expired_lock_does_not_fail_the_check(self):
+        lock = self.redis.lock.return_value
+        lock.acquire.return_value = True
+        lock.release.side_effect = LockError('expired')
+        with mock.patch('apps.fleet.tasks._check_reminders', return_value=3):
+            self.assertEqual(check_and_send_reminders(), 3)
+
+    def test_saving_schedules_and_rescheduling_drops_the_stale_task(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            reminder = self.remind()
+        first_at = reminder.next_notification_at()
+        self.assertEqual(self.apply_async.call_args.kwargs['args'], [reminder.pk, first_at.isoformat()])
+
+        reminder.notes = 'Call the broker'
+        with self.captureOnCommitCallbacks(execute=True):
+            reminder.save()
+        self.assertEqual(self.apply_async.call_count, 1)
+
+        reminder.dueDate += timedelta(days=2)
+        with self.captureOnCommitCallbacks(execute=True):
+            reminder.save()
+        self.assertEqual(self.apply_async.call_count, 2)
+        self.assertNotEqual(reminder.next_notification_at(), first_at)
+
+        with mock.patch('apps.fleet.tasks.send_reminder_email') as send, \
+                mock.patch('apps.fleet.tasks.send_reminder_digest') as digest:
+            self.assertFalse(send_scheduled_reminder(reminder.pk, first_at.isoformat()))
+        send.assert_not_called()
+        digest.assert_not_called()
+
+    @override_settings(REMINDER_DIGEST_MODE=False)
+    def test_follow_up_is_queued_for_after_the_cooldown(self):
+        scheduled_for = self.reminder.next_notification_at()
+        with mock.patch('apps.fleet.tasks.send_reminder_email', return_value=True) as send, \
+                mock.patch('apps.fleet.tasks.SCHEDULE_HORIZON', timedelta(days=4)):
+            self.assertTrue(send_scheduled_reminder(self.reminder.pk, scheduled_for.isoformat()))
+        send.assert_called_once_with(self.reminder.pk)
+
+        self.reminder.refresh_from_db()
+        follow_up = self.reminder.lastNotificationSent + RESEND_COOLDOWN
+        self.assertEqual(self.apply_async.call_args.kwargs['args'], [self.reminder.pk, follow_up.isoformat()])
+
+
+@override_settings(REMINDER_NOTIFICATION_RECIPIENTS=['fleet@example.com'])
+class MileageReminderTests(TestCase):
+    def setUp(self):
+        sender = mock.patch('apps.fleet.tasks.get_mail_sender')
+        self.sender = sender.start().return_value
+        self.send_messages = self.sender.send_messages
+        self.addCleanup(sender.stop)
+
+        self.vehicle = create_vehicle()
+        Vehicle.objects.filter(pk=self.vehicle.pk).update(currentMileage=9600)
+
+    def remind(self, due_mileage, vehicle=None, **extra):
+        return Reminder.objects.create(
+            vehicle=vehicle or self.vehicle, title='Oil change', type='Service',
+            dueMileage=due_mileage, emailNotification=True, **extra,
+        )
+
+    def test_due_mileage_reminders_apply_the_km_window_and_cooldown(self):
+        due = self.remind(10000)
+        self.remind(10200)
+        self.remind(10000, lastNotificationSent=timezone.now() - timedelta(days=1))
+        self.remind(10000, vehicle=create_vehicle())
+
+        self.assertEqual(list(due_mileage_reminders([self.vehicle.pk])), [due])
+        self.assertEqual(list(due_mileage_reminders([self.vehicle.pk + 1000])), [])
+
+    @override_settings(REMINDER_DIGEST_MODE=True)
+    def test_reached_mileage_marks_the_reminder_overdue(self):
+        reached = self.remind(9600)
+        upcoming = self.remind(10000)
+        self.assertEqual(check_mileage_reminders([self.vehicle.pk]), 2)
+
+        statuses = dict(Reminder.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses, {reached.pk: 'Overdue', upcoming.pk: 'Pending'})
+        self.send_messages.assert_called_once()
+        self.sender.send_mail.assert_not_called()
+
+    @override_settings(REMINDER_DIGEST_MODE=False)
+    def test_without_digest_mode_each_reminder_gets_its_own_email(self):
+        self.remind(9800)
+        self.remind(10000)
+        self.assertEqual(check_mileage_reminders([self.vehicle.pk]), 2)
+
+        self.assertEqual(self.sender.send_mail.call_count, 2)
+        self.send_messages.assert_not_called()
+        self.assertFalse(Reminder.objects.filter(lastNotificationSent__isnull=True).exists())
+
+    @override_settings(REMINDER_DIGEST_MODE=False)
+    def test_without_digest_mode_a_failed_email_is_retried_later(self):
+        reminder = self.remind(10000)
+        self.sender.send_mail.side_effect = ConnectionError('SMTP down')
+        self.assertEqual(check_mileage_reminders([self.vehicle.pk]), 0)
+
+        reminder.refresh_from_db()
+        self.assertIsNone(reminder.lastNotificationSent)
+        self.assertEqual(list(due_mileage_reminders([self.vehicle.pk])), [reminder])
+
+    @override_settings(REMINDER_DIGEST_MODE=False)
+    def test_safety_net_checks_mileage_reminders(self):
+        reminder = self.remind(10000)
+        with mock.patch('apps.fleet.tasks.get_redis_client') as redis:
+            redis.return_value.lock.return_value.acquire.return_value = True
+            self.assertEqual(check_and_send_reminders(), 1)
+
+        reminder.refresh_from_db()
+        self.assertIsNotNone(reminder.lastNotificationSent)
+        self.sender.send_mail.assert_called_once()
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    EMAIL_RATE_LIMIT=0,
+    REMINDER_NOTIFICATION_RECIPIENTS=['fleet@example.com', 'ops@example.com'],
+)
+class ReminderDigestTests(TestCase):
+    def setUp(self):
+        # A fresh sender picks up the locmem backend instead of a cached SMTP one
+        sender = mock.patch('apps.fleet.mail._sender', None)
+        sender.start()
+        self.addCleanup(sender.stop)
+        redis = mock.patch('apps.fleet.tasks.get_redis_client')
+        redis.start().return_value.set.return_value = True
+        self.addCleanup(redis.stop)
+        apply_async = mock.patch('apps.fleet.tasks.send_scheduled_reminder.apply_async')
+        self.apply_async = apply_async.start()
+        self.addCleanup(apply_async.stop)
+
+        self.vehicle = create_vehicle()
+        self.today = timezone.localdate()
+
+    def remind(self, due_in=3, **extra):
+        fields = {'title': 'Insurance renewal', 'type': 'Insurance', 'emailNotification': True, **extra}
+        return Reminder.objects.create(vehicle=self.vehicle, dueDate=self.today + timedelta(days=due_in), **fields)
+
+    def test_due_reminders_apply_the_window_and_cooldown(self):
+        now = timezone.now()
+        inside = self.remind()
+        due_today = self.remind(due_in=0)
+        cooled_down = self.remind(lastNotificationSent=now - RESEND_COOLDOWN - timedelta(minutes=1))
+        self.remind(due_in=8)
+        self.remind(due_in=-1)
+        self.remind(lastNotificationSent=now - timedelta(days=1))
+        self.remind(emailNotification=False)
+        self.remind(status='Completed')
+
+        self.assertCountEqual(due_reminders(now), [inside, due_today, cooled_down])
+
+    def test_saved_reminder_is_sent_as_one_email_per_recipient(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            reminder = self.remind(notes='Policy 42')
+        self.remind(title='Annual service', type='Service', due_in=5)
+
+        self.assertTrue(send_scheduled_reminder(*self.apply_async.call_args.kwargs['args']))
+
+        self.assertEqual([message.to for message in mail.outbox], [['fleet@example.com'], ['ops@example.com']])
+        self.assertEqual(mail.outbox[0].subject, '🔔 2 fleet reminders due')
+        self.assertIn('Policy 42', mail.outbox[0].body)
+        self.assertIn('Annual service', mail.outbox[0].body)
+        self.assertFalse(Reminder.objects.filter(lastNotificationSent__isnull=True).exists())
+        self.assertEqual(ReminderNotification.objects.filter(reminder=reminder, status='sent').count(), 1)
+
+        self.assertEqual(send_reminder_digest(), 0)
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_failed_send_releases_the_claims(self):
+        earlier = timezone.now() - RESEND_COOLDOWN - timedelta(days=1)
+        first = self.remind()
+        resent = self.remind(lastNotificationSent=earlier)
+
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages',
+            side_effect=smtplib.SMTPRecipientsRefused({}),
+        ):
+            self.assertEqual(send_reminder_digest(), 0)
+
+        sent = dict(Reminder.objects.values_list('pk', 'lastNotificationSent'))
+        self.assertEqual(sent, {first.pk: None, resent.pk: earlier})
+        self.assertEqual(ReminderNotification.objects.filter(status='failed').count(), 2)
+        self.assertEqual(ReminderNotificationDailyStats.objects.get(day=self.today).failed, 2)
+
+        self.assertEqual(send_reminder_digest(), 2)
+        self.assertEqual(len(mail.outbox), 2)
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    EMAIL_RATE_LIMIT=0,
+    REMINDER_NOTIFICATION_RECIPIENTS=['fleet@example.com'],
+)
+class ReminderDigestLockingTests(TransactionTestCase):
+    def setUp(self):
+        sender = mock.patch('apps.fleet.mail._sender', None)
+        sender.start()
+        self.addCleanup(sender.stop)
+
+        vehicle = create_vehicle()
+        due = timezone.localdate() + timedelta(days=3)
+        # Plain bulk_create so nothing is scheduled on commit
+        self.locked, self.free = Reminder.objects.bulk_create(
+            Reminder(vehicle=vehicle, title=title, type='Insurance', dueDate=due, emailNotification=True)
+            for title in ('Locked elsewhere', 'Free')
+        )
+
+    def test_digest_skips_reminders_locked_by_a_concurrent_run(self):
+        locked, release = threading.Event(), threading.Event()
+
+        def hold_lock():
+            try:
+                with transaction.atomic():
+                    Reminder.objects.select_for_update().get(pk=self.locked.pk)
+                    locked.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        holder = threading.Thread(target=hold_lock)
+        holder.start()
+        try:
+            self.assertTrue(locked.wait(10))
+            self.assertEqual(send_reminder_digest(), 1)
+        finally:
+            release.set()
+            holder.join()
+
+        self.assertIn('Free', mail.outbox[0].body)
+        self.assertNotIn('Locked elsewhere', mail.outbox[0].body)
+        self.locked.refresh_from_db()
+        self.assertIsNone(self.locked.lastNotificationSent)
+
+
+class ReminderNotificationLogTests(TestCase):
+    def setUp(self):
+        vehicle = create_vehicle()
+        self.reminders = [
+            Reminder.objects.create(vehicle=vehicle, title=f'Reminder {i}', type='Other', dueDate=timezone.localdate())
+            for i in range(3)
+        ]
+        self.ids = [reminder.pk for reminder in self.reminders]
+
+    def test_log_writes_one_row_per_reminder_and_counts_the_day(self):
+        today = timezone.localdate()
+        # Counts already in the table are added to, not overwritten from a stale read
+        ReminderNotificationDailyStats.objects.create(day=today, sent=5)
+
+        with self.assertNumQueries(3):
+            rows = ReminderNotification.log(self.ids, ('fleet@example.com', 'ops@example.com'), 'sent')
+        ReminderNotification.log(self.ids[:1], ['fleet@example.com'], 'failed', 'Connection refused')
+
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(
+            set(ReminderNotification.objects.filter(status='sent').values_list('reminder_id', flat=True)),
+            set(self.ids),
+        )
+        self.assertEqual(rows[0].recipients, ['fleet@example.com', 'ops@example.com'])
+        self.assertEqual(ReminderNotification.objects.get(status='failed').errorMessage, 'Connection refused')
+        stats = ReminderNotificationDailyStats.objects.get()
+        self.assertEqual((stats.day, stats.sent, stats.failed, stats.pending), (today, 8, 1, 0))
+
+    def test_log_of_nothing_leaves_the_stats_alone(self):
+        self.assertEqual(ReminderNotification.log([], ['fleet@example.com'], 'sent'), [])
+        self.assertFalse(ReminderNotificationDailyStats.objects.exists())
+
+    @override_settings(REMINDER_NOTIFICATION_RETENTION_DAYS=90)
+    def test_prune_deletes_only_rows_past_retention(self):
+        ReminderNotification.log(self.ids, ['fleet@example.com'], 'sent')
+        ReminderNotification.log(self.ids, ['fleet@example.com'], 'failed')
+        kept = ReminderNotification.log(self.ids[:1], ['fleet@example.com'], 'sent')[0]
+        now = timezone.now()
+        ReminderNotification.objects.exclude(pk=kept.pk).update(sentAt=now - timedelta(days=91))
+        ReminderNotification.objects.filter(pk=kept.pk).update(sentAt=now - timedelta(days=89))
+
+        # Several batches, so the loop has to come back for the rest
+        self.assertEqual(prune_reminder_notifications(batch_size=4), 6)
+
+        self.assertEqual(list(ReminderNotification.objects.values_list('pk', flat=True)), [kept.pk])
+        stats = ReminderNotificationDailyStats.objects.get()
+        self.assertEqual((stats.sent, stats.failed), (4, 3))
+
+
+class CompactNotificationLogMigrationTests(TransactionTestCase):
+    before = [('fleet', '0002_remindernotification_alter_reminder_options_and_more')]
+    after = [('fleet', '0003_compact_notification_log')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def setUp(self):
+        self.addCleanup(lambda: self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes()))
+        self.old_apps = self.migrate(self.before)
+
+    def test_recipients_are_moved_into_a_list_and_the_stats_seeded(self):
+        Vehicle = self.old_apps.get_model('fleet', 'Vehicle')
+        Reminder = self.old_apps.get_model('fleet', 'Reminder')
+        ReminderNotification = self.old_apps.get_model('fleet', 'ReminderNotification')
+        vehicle = Vehicle.objects.create(make='Toyota', model='Hilux', year=2020, licensePlate='RAB001A')
+        reminder = Reminder.objects.create(vehicle=vehicle, title='Insurance renewal', type='Insurance', dueDate=date(2026, 3, 1))
+        for status in ('sent', 'sent', 'failed', 'sent'):
+            ReminderNotification.objects.create(reminder=reminder, recipientEmail='fleet@example.com', status=status)
+        # Noon keeps each row on the same local day whatever the time zone
+        first_day = timezone.make_aware(datetime(2026, 2, 20, 12))
+        ReminderNotification.objects.filter(status='sent').update(sentAt=first_day)
+        ReminderNotification.objects.filter(pk=ReminderNotification.objects.latest('pk').pk).update(
+            sentAt=first_day + timedelta(days=1),
+        )
+        ReminderNotification.objects.filter(status='failed').update(sentAt=first_day)
+
+        new_apps = self.migrate(self.after)
+
+        recipients = new_apps.get_model('fleet', 'ReminderNotification').objects.values_list('recipients', flat=True)
+        self.assertEqual(list(recipients), [['fleet@example.com']] * 4)
+        stats = new_apps.get_model('fleet', 'ReminderNotificationDailyStats').objects.order_by('day')
+        self.assertEqual(
+            [(row.day, row.sent, row.failed, row.pending) for row in stats],
+            [(date(2026, 2, 20), 2, 1, 0), (date(2026, 2, 21), 1, 0, 0)],
+        )
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ReminderHealthTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(get_user_model().objects.create_user(
+            email='health@example.com', password='x', is_staff=True,
+        ))
+        redis = mock.patch('apps.fleet.views.get_redis_client')
+        redis.start()
+        self.addCleanup(redis.stop)
+        cache.clear()
+
+    def test_notification_totals_cover_today_and_the_six_days_before(self):
+        today = timezone.localdate()
+        ReminderNotificationDailyStats.objects.create(day=today, sent=1)
+        ReminderNotificationDailyStats.objects.create(day=today - timedelta(days=6), sent=2, failed=1)
+        ReminderNotificationDailyStats.objects.create(day=today - timedelta(days=7), sent=5)
+
+        response = self.client.get('/api/reminder-health?fresh=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data['notifications'],
+            {'total_last_7_days': 4, 'sent': 3, 'failed': 1, 'pending': 0},
+        )
+
+    def test_pending_count_includes_mileage_reminders(self):
+        vehicle = create_vehicle()
+        today = timezone.localdate()
+        for fields in (
+            {'dueDate': today},
+            {'dueMileage': 10000},
+            {'dueDate': today - timedelta(days=1)},
+            {'dueMileage': 10000, 'status': 'Completed'},
+            {'dueMileage': 10000, 'emailNotification': False},
+        ):
+            Reminder.objects.create(**{
+                'vehicle': vehicle, 'title': 'Service', 'type': 'Service', 'emailNotification': True, **fields,
+            })
+
+        response = self.client.get('/api/reminder-health?fresh=1')
+        self.assertEqual(response.data['reminders'], {'pending_with_notification': 2})
+
+    def test_report_is_served_from_the_cache(self):
+        self.assertFalse(self.client.get('/api/reminder-health').data['cached'])
+        self.assertTrue(self.client.get('/api/reminder-health').data['cached'])
+
+
+class VehicleOverviewTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(get_user_model().objects.create_user(email='overview@example.com', password='x'))
+        use_exchange_rates(self)
+        self.march = timezone.make_aware(datetime(2026, 3, 10, 12))
+
+    def seed(self, count):
+        for _ in range(count):
+            trip = create_trip(startDate=self.march, endDate=self.march)
+            Expense.objects.create(vehicle=trip.vehicle, category='Fuel', amount=80, date=self.march)
+            Reminder.objects.create(vehicle=trip.vehicle, title='Service', type='Service', dueDate=date(2026, 5, 1))
+
+    def overview(self, query=''):
+        response = self.client.get(f'/api/vehicles/overview/?{query}')
+        self.assertEqual(response.status_code, 200, response.data)
+        return {vehicle['id']: vehicle for vehicle in response.data['vehicles']}
+
+    def test_overview_aggregates_trips_expenses_and_reminders(self):
+        trip = create_trip(startDate=self.march, endDate=self.march)
+        vehicle = trip.vehicle
+        create_trip(vehicle=vehicle, startDate=self.march, endDate=self.march, currency='RWF', totalPrice=650000)
+        create_trip(vehicle=vehicle, startDate=self.march.replace(month=4), endDate=self.march.replace(month=4))
+        Expense.objects.create(vehicle=vehicle, category='Fuel', amount=130000, currency='RWF', date=self.march)
+        Expense.objects.create(vehicle=vehicle, category='Fuel', amount=80, date=self.march.replace(month=4))
+        Reminder.objects.create(vehicle=vehicle, title='Service', type='Service', dueDate=date(2026, 5, 1))
+        Reminder.objects.create(vehicle=vehicle, title='Insurance', type='Insurance', dueDate=date(2026, 4, 1))
+        Reminder.objects.create(vehicle=vehicle, title='License', type='License', dueDate=date(2026, 2, 1), status='Overdue')
+        idle = create_vehicle()
+
+        vehicles = self.overview('from=2026-03-01&to=2026-03-31')
+        row = vehicles[vehicle.pk]
+        self.assertEqual(
+            (row['tripCount'], row['revenue'], row['expenseTotal'], row['profit']),
+            (2, Decimal('1000'), Decimal('100'), Decimal('900')),
+        )
+        self.assertEqual(
+            (row['nextReminderDate'], row['nextReminderTitle'], row['overdueReminders']),
+            (date(2026, 4, 1), 'Insurance', 1),
+        )
+        idle_row = vehicles[idle.pk]
+        self.assertEqual(
+            (idle_row['tripCount'], idle_row['revenue'], idle_row['nextReminderTitle'], idle_row['overdueReminders']),
+            (0, Decimal('0'), None, 0),
+        )
+
+    def test_overview_query_count_is_constant(self):
+        self.seed(2)
+        self.overview()
+        with self.assertNumQueries(1):
+            self.assertEqual(len(self.overview()), 2)
+        self.seed(10)
+        with self.assertNumQueries(1):
+            self.assertEqual(len(self.overview()), 12)
+
+    def test_overview_honours_the_status_filter(self):
+        active = create_vehicle()
+        inactive = create_vehicle(status='Inactive')
+        self.assertEqual(list(self.overview('status=Inactive')), [inactive.pk])
+        self.assertEqual(list(self.overview('status=Active')), [active.pk])
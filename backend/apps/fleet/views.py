@@ -1,13 +1,23 @@
-from rest_framework import viewsets
-from rest_framework.decorators import action, api_view, permission_classes
-from rest_framework.permissions import IsAdminUser
+from rest_framework import status, viewsets
+from rest_framework.decorators import action, api_view, authentication_classes, permission_classes
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
 from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
 from datetime import timedelta
-from .models import Vehicle, Reminder, ReminderNotification
+from django.db.models import Count, DecimalField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from decimal import Decimal
+from fleet_management.filters import DateRange, IdFilter, ValueFilter
+from .models import Vehicle, Reminder, ReminderNotificationDailyStats
 from .serializers import VehicleSerializer, ReminderSerializer
-import redis
+from .telemetry import ingest_readings, parse_readings
+from apps.finance.conversion import conversion_factors, converted
+from apps.finance.models import CENT, Expense
+from apps.operations.models import Trip
+from fleet_management.query_params import date_range_filter
+from fleet_management.redis_client import get_redis_client
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,11 +26,105 @@ logger = logging.getLogger(__name__)
 class VehicleViewSet(viewsets.ModelViewSet):
     queryset = Vehicle.objects.all()
     serializer_class = VehicleSerializer
+    cursor_ordering = ('-createdAt', '-id')
+    list_filters = (ValueFilter('status'),)
+
+    @action(detail=False, methods=['post'], url_path='ingest-readings')
+    def ingest_readings(self, request):
+        """Accept a batch of odometer readings as JSON lines or a JSON array.
+
+        Each reading has ``vehicle`` (id) or ``licensePlate``, ``timestamp``,
+        ``odometer`` and optionally ``lat``, ``lon`` and ``fuelLevel``. Valid
+        readings are stored even when others in the batch are rejected.
+        """
+        try:
+            readings, errors = parse_readings(request.body)
+        except ValueError:
+            return Response(
+                {'error': 'Body must be JSON lines or a JSON array of readings'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if len(readings) + len(errors) > settings.TELEMETRY_MAX_BATCH_SIZE:
+            return Response(
+                {'error': f'At most {settings.TELEMETRY_MAX_BATCH_SIZE} readings per request'},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+
+        return Response(ingest_readings(readings, errors))
+
+    @action(detail=False, methods=['get'])
+    def overview(self, request):
+        """Per-vehicle trip count, revenue, expenses and reminder status in one query.
+
+        Optional ``from``/``to`` (YYYY-MM-DD) limit trips by startDate and
+        expenses by date; amounts are converted to ``display_currency``
+        (default USD). The list filters (``status``) select the vehicles.
+        """
+        currency = request.query_params.get('display_currency', 'USD')
+        factors = conversion_factors(currency)
+        money = DecimalField(max_digits=20, decimal_places=2)
+
+        trips = Trip.objects.filter(
+            vehicle=OuterRef('pk'),
+            **date_range_filter(request.query_params, 'startDate'),
+        ).order_by().values('vehicle')
+        expenses = Expense.objects.filter(
+            vehicle=OuterRef('pk'),
+            **date_range_filter(request.query_params, 'date'),
+        ).order_by().values('vehicle')
+        next_reminder = Reminder.objects.filter(
+            vehicle=OuterRef('pk'),
+            status='Pending',
+            dueDate__isnull=False,
+        ).order_by('dueDate')
+        overdue = Reminder.objects.filter(
+            vehicle=OuterRef('pk'),
+            status='Overdue',
+        ).order_by().values('vehicle')
+
+        vehicles = self.filter_queryset(self.get_queryset()).order_by('licensePlate').annotate(
+            tripCount=Coalesce(Subquery(trips.annotate(n=Count('id')).values('n')), 0),
+            revenue=Coalesce(
+                Subquery(trips.annotate(total=Sum(converted('totalPrice', factors))).values('total')),
+                Value(Decimal('0')), output_field=money,
+            ),
+            expenseTotal=Coalesce(
+                Subquery(expenses.annotate(total=Sum(converted('amount', factors))).values('total')),
+                Value(Decimal('0')), output_field=money,
+            ),
+            nextReminderDate=Subquery(next_reminder.values('dueDate')[:1]),
+            nextReminderTitle=Subquery(next_reminder.values('title')[:1]),
+            overdueReminders=Coalesce(Subquery(overdue.annotate(n=Count('id')).values('n')), 0),
+        ).values(
+            'id', 'licensePlate', 'make', 'model', 'status', 'currentMileage',
+            'tripCount', 'revenue', 'expenseTotal',
+            'nextReminderDate', 'nextReminderTitle', 'overdueReminders',
+        )
+
+        results = []
+        for vehicle in vehicles:
+            vehicle['revenue'] = vehicle['revenue'].quantize(CENT)
+            vehicle['expenseTotal'] = vehicle['expenseTotal'].quantize(CENT)
+            vehicle['profit'] = vehicle['revenue'] - vehicle['expenseTotal']
+            results.append(vehicle)
+        return Response({'currency': currency, 'vehicles': results})
 
 
 class ReminderViewSet(viewsets.ModelViewSet):
     queryset = Reminder.objects.all()
     serializer_class = ReminderSerializer
+    cursor_ordering = ('-createdAt', '-id')
+    list_filters = (
+        DateRange('dueDate'),
+        IdFilter('vehicle', 'vehicle_id'),
+        ValueFilter('status'),
+        ValueFilter('type'),
+    )
+
+    def get_queryset(self):
+        # vehicleName renders the vehicle for every row
+        return super().get_queryset().select_related('vehicle')
 
     @action(detail=False, methods=['post'], url_path='check-notifications')
     def check_notifications(self, request):
@@ -33,16 +137,48 @@ class ReminderViewSet(viewsets.ModelViewSet):
         return Response({"status": "sent"})
 
 
+HEALTH_CACHE_KEY = 'fleet:reminder-health'
+
+
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def reminder_system_liveness(request):
+    """Liveness probe for uptime monitors; touches neither the database nor Redis"""
+    return Response({"status": "alive", "timestamp": timezone.now()})
+
+
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
 def reminder_system_health(request):
-    """Check the health of the reminder notification system"""
-    
+    """Check the health of the reminder notification system.
+
+    The report is cached in Redis, shared by every worker, for
+    REMINDER_HEALTH_CACHE_SECONDS; pass ``?fresh=1`` to rebuild it. With
+    Redis down the report is rebuilt on every request and says so.
+    """
+    if request.query_params.get('fresh') != '1':
+        try:
+            payload = cache.get(HEALTH_CACHE_KEY)
+        except Exception as e:
+            logger.warning(f"Could not read cached health report: {str(e)}")
+            payload = None
+        if payload is not None:
+            return Response({**payload, "cached": True})
+
+    payload = _build_health_report()
+    try:
+        cache.set(HEALTH_CACHE_KEY, payload, settings.REMINDER_HEALTH_CACHE_SECONDS)
+    except Exception as e:
+        logger.warning(f"Could not cache health report: {str(e)}")
+    return Response({**payload, "cached": False})
+
+
+def _build_health_report():
     # Check Redis/Celery broker connection
     redis_status = "unknown"
     try:
-        r = redis.Redis.from_url(settings.CELERY_BROKER_URL)
-        r.ping()
+        get_redis_client().ping()
         redis_status = "connected"
     except Exception as e:
         redis_status = f"failed: {str(e)}"
@@ -60,24 +196,27 @@ def reminder_system_health(request):
         "recipients_count": len(settings.REMINDER_NOTIFICATION_RECIPIENTS),
     }
     
-    # Check pending reminders
-    today = timezone.now().date()
+    # Check pending reminders, by date or by mileage
+    today = timezone.localdate()
     pending_reminders = Reminder.objects.filter(
+        Q(dueDate__gte=today) | Q(dueMileage__isnull=False),
         emailNotification=True,
         status='Pending',
-        dueDate__gte=today
     ).count()
     
-    # Check notifications sent in last 7 days
-    recent_notifications = ReminderNotification.objects.filter(
-        sentAt__gte=timezone.now() - timedelta(days=7)
+    # Check notifications sent in last 7 days, in one query over the daily rollup
+    week_totals = ReminderNotificationDailyStats.objects.filter(
+        day__gte=today - timedelta(days=6)
+    ).aggregate(
+        sent=Sum('sent'),
+        failed=Sum('failed'),
+        pending=Sum('pending'),
     )
+    week_totals = {status: count or 0 for status, count in week_totals.items()}
     
     notifications_stats = {
-        "total_last_7_days": recent_notifications.count(),
-        "sent": recent_notifications.filter(status='sent').count(),
-        "failed": recent_notifications.filter(status='failed').count(),
-        "pending": recent_notifications.filter(status='pending').count(),
+        "total_last_7_days": sum(week_totals.values()),
+        **week_totals,
     }
     
     # Overall health status
@@ -88,7 +227,7 @@ def reminder_system_health(request):
         email_config["recipients_count"] > 0
     )
     
-    return Response({
+    return {
         "status": "healthy" if is_healthy else "unhealthy",
         "timestamp": timezone.now(),
         "celery_broker": redis_status,
@@ -97,5 +236,5 @@ def reminder_system_health(request):
             "pending_with_notification": pending_reminders,
         },
         "notifications": notifications_stats,
-    })
+    }
 
@@ -1,26 +1,31 @@
 from django.contrib import admin
 from .models import BankLoan, PersonalLoan, AdvancePayment, UnpaidFuel, LoanPayment
 
+class LoanAdmin(admin.ModelAdmin):
+    def get_queryset(self, request):
+        # Remaining balances in list_display read the annotated paid_amount
+        return super().get_queryset(request).with_paid_amount()
+
 @admin.register(BankLoan)
-class BankLoanAdmin(admin.ModelAdmin):
+class BankLoanAdmin(LoanAdmin):
     list_display = ('bank_name', 'amount', 'remaining_amount', 'status', 'start_date')
     list_filter = ('status', 'currency')
     search_fields = ('bank_name', 'notes')
 
 @admin.register(PersonalLoan)
-class PersonalLoanAdmin(admin.ModelAdmin):
+class PersonalLoanAdmin(LoanAdmin):
     list_display = ('creditor_name', 'amount', 'remaining_balance', 'status', 'payment_due_date')
     list_filter = ('status', 'currency')
     search_fields = ('creditor_name', 'notes')
 
 @admin.register(AdvancePayment)
-class AdvancePaymentAdmin(admin.ModelAdmin):
+class AdvancePaymentAdmin(LoanAdmin):
     list_display = ('recipient_name', 'amount', 'remaining_amount', 'status', 'date_issued')
     list_filter = ('status', 'currency')
     search_fields = ('recipient_name', 'reason')
 
 @admin.register(UnpaidFuel)
-class UnpaidFuelAdmin(admin.ModelAdmin):
+class UnpaidFuelAdmin(LoanAdmin):
     list_display = ('supplier', 'liters', 'total_amount', 'remaining_balance', 'status', 'date')
     list_filter = ('status',)
     search_fields = ('supplier',)
@@ -30,6 +35,7 @@ class LoanPaymentAdmin(admin.ModelAdmin):
     list_display = ('date', 'amount', 'method', 'related_loan')
     list_filter = ('method', 'date')
     search_fields = ('reference_number',)
+    list_select_related = ('bank_loan', 'personal_loan', 'advance_payment', 'unpaid_fuel')
     
     def related_loan(self, obj):
         if obj.bank_loan: return f"Bank Loan: {obj.bank_loan}"
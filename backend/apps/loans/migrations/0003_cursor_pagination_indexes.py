@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loans', '0002_loanpayment_base_currency_amounts'),
+        ('operations', '0003_cursor_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='loanpayment',
+            index=models.Index(fields=['created_at', 'id'], name='loans_payment_cursor_idx'),
+        ),
+    ]
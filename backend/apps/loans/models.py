@@ -1,7 +1,44 @@
 from django.db import models
 from django.conf import settings
 from decimal import Decimal
+from django.db.models.functions import Coalesce
 from django.utils import timezone
+from apps.finance.models import ExchangeRateHistory, base_currency_amounts
+
+def paid_total(loan_field):
+    """Subquery expression summing the LoanPayment amounts made against each loan.
+
+    ``loan_field`` is the LoanPayment foreign key to the annotated loan model,
+    e.g. ``'bank_loan'``.
+    """
+    paid = (
+        LoanPayment.objects.filter(**{loan_field: models.OuterRef('pk')})
+        .order_by()
+        .values(loan_field)
+        .annotate(total=models.Sum('amount'))
+        .values('total')
+    )
+    return Coalesce(
+        models.Subquery(paid),
+        models.Value(Decimal('0.00')),
+        output_field=models.DecimalField(max_digits=20, decimal_places=2),
+    )
+
+
+class LoanQuerySet(models.QuerySet):
+    """Queryset of a loan model whose ``payment_field`` names its LoanPayment foreign key"""
+
+    def with_paid_amount(self):
+        """Annotate ``paid_amount``, the total paid against each loan, in the same query"""
+        return self.annotate(paid_amount=paid_total(self.model.payment_field))
+
+
+def _paid_amount(loan):
+    """The annotated paid_amount when loaded through with_paid_amount(), else one aggregate query"""
+    if hasattr(loan, 'paid_amount'):
+        return loan.paid_amount
+    return loan.payments.aggregate(total=models.Sum('amount'))['total'] or Decimal('0.00')
+
 
 class BankLoan(models.Model):
     STATUS_CHOICES = (
@@ -24,6 +61,9 @@ class BankLoan(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
 
+    objects = LoanQuerySet.as_manager()
+    payment_field = 'bank_loan'
+
     def calculate_end_date(self):
         if self.start_date and self.payment_period_months:
             # Simple approximation, can be improved with dateutil
@@ -42,7 +82,7 @@ class BankLoan(models.Model):
 
     @property
     def remaining_amount(self):
-        paid = self.payments.aggregate(total=models.Sum('amount'))['total'] or Decimal('0.00')
+        paid = _paid_amount(self)
         return max(Decimal('0.00'), self.amount - paid)
 
     def __str__(self):
@@ -68,9 +108,12 @@ class PersonalLoan(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
 
+    objects = LoanQuerySet.as_manager()
+    payment_field = 'personal_loan'
+
     @property
     def remaining_balance(self):
-        paid = self.payments.aggregate(total=models.Sum('amount'))['total'] or Decimal('0.00')
+        paid = _paid_amount(self)
         return max(Decimal('0.00'), self.amount - paid)
 
     def __str__(self):
@@ -95,9 +138,12 @@ class AdvancePayment(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
 
+    objects = LoanQuerySet.as_manager()
+    payment_field = 'advance_payment'
+
     @property
     def remaining_amount(self):
-        paid = self.payments.aggregate(total=models.Sum('amount'))['total'] or Decimal('0.00')
+        paid = _paid_amount(self)
         return max(Decimal('0.00'), self.amount - paid)
 
     def __str__(self):
@@ -122,13 +168,16 @@ class UnpaidFuel(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
 
+    objects = LoanQuerySet.as_manager()
+    payment_field = 'unpaid_fuel'
+
     @property
     def total_amount(self):
         return self.liters * self.price_per_liter
 
     @property
     def remaining_balance(self):
-        paid = self.payments.aggregate(total=models.Sum('amount'))['total'] or Decimal('0.00')
+        paid = _paid_amount(self)
         return max(Decimal('0.00'), self.total_amount - paid)
 
     def __str__(self):
@@ -153,6 +202,9 @@ class LoanPayment(models.Model):
     date = models.DateField(default=timezone.now)
     method = models.CharField(max_length=20, choices=METHOD_CHOICES)
     reference_number = models.CharField(max_length=100, blank=True, null=True)
+    # amount in the base currencies at the rate in effect on date, set on save
+    amount_usd = models.DecimalField(max_digits=20, decimal_places=2, blank=True, null=True)
+    amount_rwf = models.DecimalField(max_digits=20, decimal_places=2, blank=True, null=True)
     
     # Optional link to a Trip if paid via Trip Revenue
     trip = models.ForeignKey('operations.Trip', on_delete=models.SET_NULL, null=True, blank=True, related_name='loan_payments')
@@ -160,12 +212,21 @@ class LoanPayment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination order
+            models.Index(fields=['created_at', 'id'], name='loans_payment_cursor_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         # Validation to ensure only one loan type is selected
         loans = [self.bank_loan, self.personal_loan, self.advance_payment, self.unpaid_fuel]
         if sum(1 for l in loans if l is not None) != 1:
             raise ValueError("Payment must be linked to exactly one loan type")
-        
+
+        self.amount_usd, self.amount_rwf = base_currency_amounts(
+            self.amount, self.currency, ExchangeRateHistory.graph_as_of(self.date)
+        )
         super().save(*args, **kwargs)
         
         # Update status of the related loan
@@ -39,7 +39,7 @@ class LoanPaymentSerializer(serializers.ModelSerializer):
     class Meta:
         model = LoanPayment
         fields = '__all__'
-        read_only_fields = ('created_by',)
+        read_only_fields = ('created_by', 'amount_usd', 'amount_rwf')
     
     def validate(self, data):
         # Ensure exactly one loan type is selected (already in model, but good for API feedback)
@@ -0,0 +1,137 @@
+from datetime import date
+from decimal import Decimal
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from fleet_management.testing import ListQueryBudgetMixin
+from .models import AdvancePayment, BankLoan, LoanPayment, PersonalLoan, UnpaidFuel
+
+
+def _bank_loan(amount=1000):
+    return BankLoan.objects.create(
+        bank_name='BK', amount=amount, payment_period_months=12, start_date=date(2026, 1, 1),
+    )
+
+
+def _pay(amount, **loan):
+    return LoanPayment.objects.create(amount=amount, method='Cash', date=date(2026, 2, 1), **loan)
+
+
+class BankLoanListQueryTests(ListQueryBudgetMixin, APITestCase):
+    def seed(self, count):
+        for _ in range(count):
+            _pay(100, bank_loan=_bank_loan())
+
+    def test_bank_loan_list_query_count_is_constant(self):
+        self.assertConstantListQueries('/api/loans/bank-loans/')
+
+    def test_remaining_amount_reads_the_annotation(self):
+        loan = _bank_loan(1000)
+        _pay(150, bank_loan=loan)
+        _pay(250, bank_loan=loan)
+        response = self.client.get('/api/loans/bank-loans/')
+        self.assertEqual(Decimal(response.data[0]['remaining_amount']), Decimal('600'))
+
+        loan = BankLoan.objects.get(pk=loan.pk)
+        self.assertEqual(loan.remaining_amount, Decimal('600'))
+        self.assertEqual(loan.status, 'Pending')
+
+    @override_settings(STORAGES={
+        **settings.STORAGES, 'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    })
+    def test_admin_changelist_query_count_is_constant(self):
+        self.client.force_login(self.user)
+        counts = []
+        for count in (self.seed_size, self.seed_size * 9):
+            self.seed(count)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get('/admin/loans/bankloan/')
+            self.assertEqual(response.status_code, 200)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+
+class PersonalLoanListQueryTests(ListQueryBudgetMixin, APITestCase):
+    def seed(self, count):
+        for _ in range(count):
+            loan = PersonalLoan.objects.create(
+                creditor_name='Jean', amount=500, date_taken=date(2026, 1, 1), payment_due_date=date(2026, 6, 1),
+            )
+            _pay(100, personal_loan=loan)
+
+    def test_personal_loan_list_query_count_is_constant(self):
+        self.assertConstantListQueries('/api/loans/personal-loans/')
+
+
+class AdvancePaymentListQueryTests(ListQueryBudgetMixin, APITestCase):
+    def seed(self, count):
+        for _ in range(count):
+            advance = AdvancePayment.objects.create(
+                recipient_name='Driver', amount=300, date_issued=date(2026, 1, 1), reason='Fuel advance',
+            )
+            _pay(100, advance_payment=advance)
+
+    def test_advance_payment_list_query_count_is_constant(self):
+        self.assertConstantListQueries('/api/loans/advance-payments/')
+
+
+class UnpaidFuelListQueryTests(ListQueryBudgetMixin, APITestCase):
+    def seed(self, count):
+        for _ in range(count):
+            fuel = UnpaidFuel.objects.create(
+                supplier='SP', liters=100, price_per_liter=Decimal('1.50'), date=date(2026, 1, 1),
+            )
+            _pay(50, unpaid_fuel=fuel)
+
+    def test_unpaid_fuel_list_query_count_is_constant(self):
+        self.assertConstantListQueries('/api/loans/unpaid-fuel/')
+
+    def test_partial_payment_sets_the_status(self):
+        fuel = UnpaidFuel.objects.create(
+            supplier='SP', liters=100, price_per_liter=Decimal('1.50'), date=date(2026, 1, 1),
+        )
+        _pay(50, unpaid_fuel=fuel)
+        fuel = UnpaidFuel.objects.with_paid_amount().get(pk=fuel.pk)
+        self.assertEqual((fuel.status, fuel.remaining_balance), ('Partial', Decimal('100.00')))
+
+
+class LoanListFilterTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(get_user_model().objects.create_user(email='loan-filters@example.com', password='x'))
+        self.january = _bank_loan()
+        self.paid_off = BankLoan.objects.create(
+            bank_name='Equity', amount=500, currency='USD', payment_period_months=6, start_date=date(2026, 1, 20),
+        )
+        _pay(500, bank_loan=self.paid_off)
+        self.march = BankLoan.objects.create(
+            bank_name='BK', amount=800, payment_period_months=12, start_date=date(2026, 3, 1),
+        )
+        self.cash = _pay(100, bank_loan=self.january)
+        self.transfer = LoanPayment.objects.create(
+            amount=200, method='Bank Transfer', date=date(2026, 3, 5), bank_loan=self.january,
+        )
+
+    def ids(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.data)
+        return sorted(row['id'] for row in response.data)
+
+    def test_loan_filters_combine(self):
+        url = '/api/loans/bank-loans/'
+        self.assertEqual(self.ids(f'{url}?from=2026-01-01&to=2026-01-31'), [self.january.pk, self.paid_off.pk])
+        self.assertEqual(self.ids(f'{url}?from=2026-01-01&to=2026-01-31&currency=USD'), [self.paid_off.pk])
+        self.assertEqual(self.ids(f'{url}?status=Pending,Active'), [self.january.pk, self.march.pk])
+
+    def test_loan_payment_filters_combine(self):
+        url = f'/api/loans/payments/?bank_loan={self.january.pk}'
+        self.assertEqual(self.ids(url), [self.cash.pk, self.transfer.pk])
+        self.assertEqual(self.ids(f'{url}&method=Cash'), [self.cash.pk])
+        self.assertEqual(self.ids(f'{url}&from=2026-03-01'), [self.transfer.pk])
+
+    def test_invalid_values_are_rejected(self):
+        for query in ('bank_loan=abc', 'trip=1e3', 'from=2026-01', 'to=01-31-2026'):
+            self.assertEqual(self.client.get(f'/api/loans/payments/?{query}').status_code, 400, query)
+        self.assertEqual(self.client.get('/api/loans/bank-loans/?from=someday').status_code, 400)
@@ -1,6 +1,8 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from fleet_management.csv_export import CsvExportMixin
+from fleet_management.filters import DateRange, IdFilter, ValueFilter
 from .models import BankLoan, PersonalLoan, AdvancePayment, UnpaidFuel, LoanPayment
 from .serializers import (
     BankLoanSerializer, 
@@ -10,47 +12,64 @@ from .serializers import (
     LoanPaymentSerializer
 )
 
+# Filters every loan list accepts besides its own date range
+LOAN_FILTERS = (ValueFilter('status'), ValueFilter('currency'))
+
 class BaseLoanViewSet(viewsets.ModelViewSet):
+    # Loan querysets annotate paid_amount so remaining balances cost no query per row
+    cursor_ordering = ('-created_at', '-id')
+
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
 class BankLoanViewSet(BaseLoanViewSet):
-    queryset = BankLoan.objects.all().order_by('-created_at')
+    queryset = BankLoan.objects.with_paid_amount().order_by('-created_at')
     serializer_class = BankLoanSerializer
+    list_filters = (DateRange('start_date'),) + LOAN_FILTERS
 
 class PersonalLoanViewSet(BaseLoanViewSet):
-    queryset = PersonalLoan.objects.all().order_by('-created_at')
+    queryset = PersonalLoan.objects.with_paid_amount().order_by('-created_at')
     serializer_class = PersonalLoanSerializer
+    list_filters = (DateRange('date_taken'),) + LOAN_FILTERS
 
 class AdvancePaymentViewSet(BaseLoanViewSet):
-    queryset = AdvancePayment.objects.all().order_by('-created_at')
+    queryset = AdvancePayment.objects.with_paid_amount().order_by('-created_at')
     serializer_class = AdvancePaymentSerializer
+    list_filters = (DateRange('date_issued'),) + LOAN_FILTERS
 
 class UnpaidFuelViewSet(BaseLoanViewSet):
-    queryset = UnpaidFuel.objects.all().order_by('-date')
+    queryset = UnpaidFuel.objects.with_paid_amount().order_by('-date')
     serializer_class = UnpaidFuelSerializer
+    cursor_ordering = ('-date', '-id')
+    list_filters = (DateRange('date'),) + LOAN_FILTERS
 
-class LoanPaymentViewSet(BaseLoanViewSet):
+class LoanPaymentViewSet(CsvExportMixin, BaseLoanViewSet):
     queryset = LoanPayment.objects.all().order_by('-date')
     serializer_class = LoanPaymentSerializer
-    
-    def get_queryset(self):
-        queryset = super().get_queryset()
-        # Filter by loan type if needed
-        bank_loan_id = self.request.query_params.get('bank_loan')
-        if bank_loan_id:
-            queryset = queryset.filter(bank_loan_id=bank_loan_id)
-        
-        personal_loan_id = self.request.query_params.get('personal_loan')
-        if personal_loan_id:
-            queryset = queryset.filter(personal_loan_id=personal_loan_id)
-            
-        advance_id = self.request.query_params.get('advance_payment')
-        if advance_id:
-            queryset = queryset.filter(advance_payment_id=advance_id)
-            
-        fuel_id = self.request.query_params.get('unpaid_fuel')
-        if fuel_id:
-            queryset = queryset.filter(unpaid_fuel_id=fuel_id)
-            
-        return queryset
+    list_filters = (
+        DateRange('date'),
+        IdFilter('bank_loan', 'bank_loan_id'),
+        IdFilter('personal_loan', 'personal_loan_id'),
+        IdFilter('advance_payment', 'advance_payment_id'),
+        IdFilter('unpaid_fuel', 'unpaid_fuel_id'),
+        IdFilter('trip', 'trip_id'),
+        ValueFilter('currency'),
+        ValueFilter('method'),
+    )
+    export_filename = 'loan-payments'
+    export_amount_field = 'amount'
+    export_columns = (
+        ('ID', 'id'),
+        ('Date', 'date'),
+        ('Bank loan', 'bank_loan__bank_name'),
+        ('Personal loan', 'personal_loan__creditor_name'),
+        ('Advance payment', 'advance_payment__recipient_name'),
+        ('Unpaid fuel', 'unpaid_fuel__supplier'),
+        ('Method', 'method'),
+        ('Reference', 'reference_number'),
+        ('Trip', 'trip_id'),
+        ('Amount', 'amount'),
+        ('Currency', 'currency'),
+        ('Amount (USD)', 'amount_usd'),
+        ('Amount (RWF)', 'amount_rwf'),
+    )
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fleet', '0006_cursor_pagination_indexes'),
+        ('operations', '0002_trip_base_currency_amounts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['startDate', 'id'], name='operations_trip_cursor_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fleet', '0006_cursor_pagination_indexes'),
+        ('operations', '0003_cursor_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['vehicle', 'startDate'], name='operations_trip_vehicle_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['customer', 'startDate'], name='operations_trip_customer_idx'),
+        ),
+    ]
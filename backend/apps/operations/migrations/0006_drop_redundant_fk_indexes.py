@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fleet', '0006_cursor_pagination_indexes'),
+        ('operations', '0005_trip_payment_state'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='trip',
+            name='customer',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='trips', to='operations.customer'),
+        ),
+        migrations.AlterField(
+            model_name='trip',
+            name='vehicle',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='trips', to='fleet.vehicle'),
+        ),
+    ]
@@ -1,5 +1,24 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.lookups import GreaterThanOrEqual, LessThanOrEqual
+from apps.finance.models import ExchangeRateHistory, Payment, base_currency_amounts
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Maintained by Payment.save()/delete() and Trip.reconcile_payments(); a
+# regular trip save never writes them, so it cannot overwrite a concurrent payment
+PAYMENT_STATE_FIELDS = ('paidAmount', 'balance', 'paymentStatus')
+
+
+def payment_status(paid, total):
+    """SQL expression for paymentStatus given the paid and total amount expressions"""
+    return Case(
+        When(LessThanOrEqual(paid, 0), then=Value('UNPAID')),
+        When(GreaterThanOrEqual(paid, total), then=Value('PAID')),
+        default=Value('PARTIAL'),
+    )
 
 class Customer(models.Model):
     name = models.CharField(max_length=200)
@@ -12,8 +31,9 @@ class Customer(models.Model):
         return self.name
 
 class Trip(models.Model):
-    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='trips')
-    vehicle = models.ForeignKey('fleet.Vehicle', on_delete=models.SET_NULL, null=True, related_name='trips')
+    # Served by the (customer, startDate) and (vehicle, startDate) indexes below
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='trips', db_index=False)
+    vehicle = models.ForeignKey('fleet.Vehicle', on_delete=models.SET_NULL, null=True, related_name='trips', db_index=False)
     description = models.CharField(max_length=255)
     startDate = models.DateTimeField()
     endDate = models.DateTimeField()
@@ -21,11 +41,122 @@ class Trip(models.Model):
     endLocation = models.CharField(max_length=255, blank=True, null=True)
     totalPrice = models.DecimalField(max_digits=10, decimal_places=2)
     currency = models.CharField(max_length=3, default='USD')
+    # totalPrice in the base currencies at the rate in effect on startDate, set on save
+    totalPriceUsd = models.DecimalField(max_digits=20, decimal_places=2, blank=True, null=True)
+    totalPriceRwf = models.DecimalField(max_digits=20, decimal_places=2, blank=True, null=True)
     tripType = models.CharField(max_length=50, blank=True, null=True)
     cargoWeight = models.FloatField(blank=True, null=True)
     weightUnit = models.CharField(max_length=10, blank=True, null=True)
     createdBy = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
     createdAt = models.DateTimeField(auto_now_add=True)
 
+    PAYMENT_STATUS_CHOICES = (
+        ('UNPAID', 'Unpaid'),
+        ('PARTIAL', 'Partially paid'),
+        ('PAID', 'Paid'),
+    )
+    # Sum of the trip's payments in the trip currency (each at the rate on its
+    # date), and totalPrice minus that; see PAYMENT_STATE_FIELDS
+    paidAmount = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    balance = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    paymentStatus = models.CharField(max_length=10, choices=PAYMENT_STATUS_CHOICES, default='UNPAID')
+
+    class Meta:
+        indexes = [
+            # Keyset pagination order
+            models.Index(fields=['startDate', 'id'], name='operations_trip_cursor_idx'),
+            # List filters, each combined with a date range
+            models.Index(fields=['vehicle', 'startDate'], name='operations_trip_vehicle_idx'),
+            models.Index(fields=['customer', 'startDate'], name='operations_trip_customer_idx'),
+            models.Index(fields=['paymentStatus', 'startDate'], name='operations_trip_payment_idx'),
+            # Unpaid trips by balance, largest first
+            models.Index(fields=['-balance'], condition=Q(balance__gt=0), name='operations_trip_unpaid_idx'),
+        ]
+
     def __str__(self):
         return f"{self.description} ({self.customer})"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_currency = instance.__dict__.get('currency')
+        return instance
+
+    def save(self, *args, **kwargs):
+        self.totalPriceUsd, self.totalPriceRwf = base_currency_amounts(
+            self.totalPrice, self.currency, ExchangeRateHistory.graph_as_of(self.startDate)
+        )
+        if self._state.adding:
+            self.balance = self.totalPrice - self.paidAmount
+            super().save(*args, **kwargs)
+            self._loaded_currency = self.currency
+            return
+
+        if kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in PAYMENT_STATE_FIELDS
+            ]
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if getattr(self, '_loaded_currency', self.currency) != self.currency:
+                # Every payment has to be converted into the new currency
+                Trip.reconcile_payments([self.pk])
+            else:
+                Trip.objects.filter(pk=self.pk).update(
+                    balance=F('totalPrice') - F('paidAmount'),
+                    paymentStatus=payment_status(F('paidAmount'), F('totalPrice')),
+                )
+        self._loaded_currency = self.currency
+        self.refresh_from_db(fields=PAYMENT_STATE_FIELDS)
+
+    @classmethod
+    def add_paid(cls, trip_id, amount):
+        """Add amount (negative to remove) to a trip's paidAmount, updating balance and paymentStatus in one UPDATE.
+
+        F() expressions make concurrent payments on the same trip add up
+        instead of overwriting each other.
+        """
+        paid = F('paidAmount') + amount
+        cls.objects.filter(pk=trip_id).update(
+            paidAmount=paid,
+            balance=F('totalPrice') - paid,
+            paymentStatus=payment_status(paid, F('totalPrice')),
+        )
+
+    @classmethod
+    def reconcile_payments(cls, trip_ids):
+        """Recompute paidAmount, balance and paymentStatus of these trips from their payments.
+
+        Returns the number of trips whose stored values were wrong.
+        """
+        with transaction.atomic():
+            trips = list(cls.objects.select_for_update().filter(pk__in=trip_ids).only(
+                'totalPrice', 'currency', *PAYMENT_STATE_FIELDS
+            ))
+            paid = {trip.pk: 0 for trip in trips}
+            currencies = {trip.pk: trip.currency for trip in trips}
+            payments = list(Payment.objects.filter(trip_id__in=paid))
+            timeline = ExchangeRateHistory.timeline(max(payment.date for payment in payments)) if payments else None
+            for payment in payments:
+                try:
+                    paid[payment.trip_id] += payment.amount_in(currencies[payment.trip_id], timeline)
+                except ValueError:
+                    logger.warning(
+                        f"Payment {payment.pk} has no rate into trip {payment.trip_id}'s currency; left out of its paid amount"
+                    )
+
+            changed = []
+            for trip in trips:
+                balance = trip.totalPrice - paid[trip.pk]
+                if paid[trip.pk] >= trip.totalPrice and paid[trip.pk] > 0:
+                    status = 'PAID'
+                elif paid[trip.pk] > 0:
+                    status = 'PARTIAL'
+                else:
+                    status = 'UNPAID'
+                if (trip.paidAmount, trip.balance, trip.paymentStatus) != (paid[trip.pk], balance, status):
+                    trip.paidAmount, trip.balance, trip.paymentStatus = paid[trip.pk], balance, status
+                    changed.append(trip)
+            cls.objects.bulk_update(changed, PAYMENT_STATE_FIELDS)
+        return len(changed)
@@ -15,10 +15,12 @@ class TripSerializer(serializers.ModelSerializer):
     class Meta:
         model = Trip
         fields = '__all__'
+        read_only_fields = ['totalPriceUsd', 'totalPriceRwf', 'paidAmount', 'balance', 'paymentStatus']
 
     def get_vehicleName(self, obj):
         return str(obj.vehicle) if obj.vehicle else None
 
     def get_payments(self, obj):
         from apps.finance.serializers import PaymentSerializer
-        return PaymentSerializer(obj.payments.all(), many=True).data
+        # Sharing the context shares the request's conversion matrix
+        return PaymentSerializer(obj.payments.all(), many=True, context=self.context).data
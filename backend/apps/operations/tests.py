@@ -1,3 +1,235 @@
-from django.test import TestCase
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from apps.finance.models import ExchangeRateHistory, Expense, Payment
+from apps.finance.rollup import rebuild_rollup
+from fleet_management.testing import ListQueryBudgetMixin, create_trip, use_exchange_rates
+from .models import Customer, Trip
+import importlib
+import io
 
-# Create your tests here.
+
+class CustomerListQueryTests(ListQueryBudgetMixin, APITestCase):
+    def seed(self, count):
+        Customer.objects.bulk_create(Customer(name=f'Customer {i}') for i in range(count))
+
+    def test_customer_list_query_count_is_constant(self):
+        self.assertConstantListQueries('/api/customers/')
+
+
+class TripListQueryTests(ListQueryBudgetMixin, APITestCase):
+    def seed(self, count):
+        for _ in range(count):
+            trip = create_trip()
+            for amount in (100, 200):
+                Payment.objects.create(trip=trip, amount=amount, date=timezone.now(), type='Cash')
+
+    def test_trip_list_query_count_is_constant(self):
+        self.assertConstantListQueries('/api/trips/')
+
+
+class TripCursorPaginationTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(get_user_model().objects.create_user(email='pages@example.com', password='x'))
+        # Several trips share a start date, so the cursor has to fall back on the id
+        start = timezone.now()
+        for i in range(7):
+            create_trip(startDate=start - timedelta(days=i // 3))
+
+    def test_list_is_unpaginated_without_page_size(self):
+        response = self.client.get('/api/trips/')
+        self.assertEqual(len(response.data), 7)
+
+    def test_pages_cover_every_trip_once(self):
+        seen = []
+        url = '/api/trips/?page_size=3'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.data)
+            seen.extend(trip['id'] for trip in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(sorted(seen), sorted(Trip.objects.values_list('id', flat=True)))
+        self.assertEqual(len(seen), len(set(seen)))
+
+
+class TripListFilterTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(get_user_model().objects.create_user(email='trip-filters@example.com', password='x'))
+        march = timezone.make_aware(datetime(2026, 3, 10, 12))
+        self.paid = create_trip(startDate=march, endDate=march)
+        Payment.objects.create(trip=self.paid, amount=500, date=march, type='Cash')
+        self.unpaid = create_trip(customer=self.paid.customer, startDate=march, endDate=march)
+        self.april = create_trip(customer=self.paid.customer, startDate=march.replace(month=4), endDate=march.replace(month=4))
+        self.other_customer = create_trip(startDate=march, endDate=march)
+
+    def ids(self, query):
+        response = self.client.get(f'/api/trips/?{query}')
+        self.assertEqual(response.status_code, 200, response.data)
+        return sorted(trip['id'] for trip in response.data)
+
+    def test_filters_combine(self):
+        query = f'customer={self.paid.customer_id}&from=2026-03-01&to=2026-03-31'
+        self.assertEqual(self.ids(query), [self.paid.pk, self.unpaid.pk])
+        self.assertEqual(self.ids(f'{query}&paymentStatus=UNPAID'), [self.unpaid.pk])
+        self.assertEqual(self.ids('paymentStatus=PAID,PARTIAL'), [self.paid.pk])
+        self.assertEqual(self.ids(f'vehicle={self.april.vehicle_id}'), [self.april.pk])
+
+    def test_invalid_values_are_rejected(self):
+        for query in ('customer=abc', 'vehicle=1.5', 'from=2026-02-30', 'to=tomorrow'):
+            self.assertEqual(self.client.get(f'/api/trips/?{query}').status_code, 400, query)
+
+
+class TripPaymentStateTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(get_user_model().objects.create_user(email='payments@example.com', password='x'))
+        ExchangeRateHistory.objects.all().delete()
+        ExchangeRateHistory.objects.create(
+            from_currency='USD', to_currency='RWF', rate=Decimal('1300'),
+            valid_from=timezone.make_aware(datetime(2024, 1, 1)),
+        )
+        self.trip = create_trip()
+
+    def state(self, trip=None):
+        trip = Trip.objects.get(pk=(trip or self.trip).pk)
+        return trip.paidAmount, trip.balance, trip.paymentStatus
+
+    def test_new_trip_is_unpaid(self):
+        self.assertEqual(self.state(), (Decimal('0'), Decimal('500'), 'UNPAID'))
+
+    def test_payments_in_other_currencies_count_at_their_rate(self):
+        response = self.client.post(
+            f'/api/trips/{self.trip.pk}/payments/',
+            {'trip': self.trip.pk, 'amount': '130000', 'currency': 'RWF', 'date': timezone.now().isoformat(), 'type': 'Cash'},
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(self.state(), (Decimal('100'), Decimal('400'), 'PARTIAL'))
+
+        Payment.objects.create(trip=self.trip, amount=400, date=timezone.now(), type='Cash')
+        self.assertEqual(self.state(), (Decimal('500'), Decimal('0'), 'PAID'))
+
+    def test_editing_and_deleting_a_payment_moves_its_amount(self):
+        payment = Payment.objects.create(trip=self.trip, amount=200, date=timezone.now(), type='Cash')
+        payment.amount = 300
+        payment.save()
+        self.assertEqual(self.state(), (Decimal('300'), Decimal('200'), 'PARTIAL'))
+
+        other = create_trip()
+        payment.trip = other
+        payment.save()
+        self.assertEqual(self.state(), (Decimal('0'), Decimal('500'), 'UNPAID'))
+        self.assertEqual(self.state(other), (Decimal('300'), Decimal('200'), 'PARTIAL'))
+
+        self.client.delete(f'/api/payments/{payment.pk}/')
+        self.assertEqual(self.state(other), (Decimal('0'), Decimal('500'), 'UNPAID'))
+
+    def test_saving_a_stale_trip_keeps_the_paid_amount(self):
+        stale = Trip.objects.get(pk=self.trip.pk)
+        Payment.objects.create(trip=self.trip, amount=200, date=timezone.now(), type='Cash')
+        stale.totalPrice = 200
+        stale.save()
+        self.assertEqual(self.state(), (Decimal('200'), Decimal('0'), 'PAID'))
+        self.assertEqual(stale.paymentStatus, 'PAID')
+
+    def test_changing_the_trip_currency_converts_its_payments(self):
+        Payment.objects.create(trip=self.trip, amount=100, date=timezone.now(), type='Cash')
+        self.trip.currency = 'RWF'
+        self.trip.totalPrice = 650000
+        self.trip.save()
+        self.assertEqual(self.state(), (Decimal('130000'), Decimal('520000'), 'PARTIAL'))
+
+    def test_admin_bulk_delete_updates_the_trips(self):
+        Payment.objects.create(trip=self.trip, amount=200, date=timezone.now(), type='Cash')
+        Payment.objects.create(trip=self.trip, amount=100, date=timezone.now(), type='Cash')
+        admin.site._registry[Payment].delete_queryset(None, Payment.objects.filter(amount=200))
+        self.assertEqual(self.state(), (Decimal('100'), Decimal('400'), 'PARTIAL'))
+
+    def test_payment_without_a_rate_into_the_trip_currency_is_refused(self):
+        response = self.client.post('/api/payments/', {
+            'trip': self.trip.pk, 'amount': '100', 'currency': 'KES', 'date': timezone.now().isoformat(), 'type': 'Cash',
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('currency', response.data)
+        with self.assertRaises(ValueError):
+            Payment.objects.create(trip=self.trip, amount=100, currency='KES', date=timezone.now(), type='Cash')
+        self.assertEqual(self.state(), (Decimal('0'), Decimal('500'), 'UNPAID'))
+
+    def test_reconcile_command_repairs_drift(self):
+        Payment.objects.create(trip=self.trip, amount=200, date=timezone.now(), type='Cash')
+        Trip.objects.filter(pk=self.trip.pk).update(paidAmount=0, balance=500, paymentStatus='UNPAID')
+        out = io.StringIO()
+        call_command('reconcile_trip_payments', stdout=out)
+        self.assertIn('Corrected 1 of 1', out.getvalue())
+        self.assertEqual(self.state(), (Decimal('200'), Decimal('300'), 'PARTIAL'))
+
+    def test_migration_backfill_leaves_other_currencies_to_reconcile(self):
+        migration = importlib.import_module('apps.operations.migrations.0005_trip_payment_state')
+        ExchangeRateHistory.objects.create(
+            from_currency='EUR', to_currency='USD', rate=Decimal('1.25'),
+            valid_from=timezone.make_aware(datetime(2024, 1, 1)),
+        )
+        euro_trip = create_trip(currency='EUR')
+        Payment.objects.create(trip=euro_trip, amount=125, currency='USD', date=timezone.now(), type='Cash')
+        Payment.objects.create(trip=self.trip, amount=130000, currency='RWF', date=timezone.now(), type='Cash')
+        Trip.objects.update(paidAmount=0, balance=0, paymentStatus='UNPAID')
+
+        with connection.cursor() as cursor:
+            cursor.execute(migration.BACKFILL_SQL)
+        self.assertEqual(self.state(), (Decimal('100'), Decimal('400'), 'PARTIAL'))
+        # Not 125 EUR: the USD payment needs the rate history
+        self.assertEqual(self.state(euro_trip), (Decimal('0'), Decimal('500'), 'UNPAID'))
+
+        call_command('reconcile_trip_payments', stdout=io.StringIO())
+        self.assertEqual(self.state(euro_trip), (Decimal('100'), Decimal('400'), 'PARTIAL'))
+
+    def test_outstanding_report_and_filter_use_the_stored_balance(self):
+        paid = create_trip()
+        Payment.objects.create(trip=paid, amount=500, date=timezone.now(), type='Cash')
+        response = self.client.get('/api/reports/outstanding-trips/')
+        self.assertEqual([row['id'] for row in response.data['trips']], [self.trip.pk])
+        self.assertEqual(response.data['totalOutstanding'], Decimal('500'))
+
+        response = self.client.get('/api/trips/?paymentStatus=PAID')
+        self.assertEqual([row['id'] for row in response.data], [paid.pk])
+
+    def test_outstanding_report_rejects_a_non_positive_limit(self):
+        for limit in ('0', '-1'):
+            response = self.client.get(f'/api/reports/outstanding-trips/?limit={limit}')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('limit', response.data)
+
+
+class VehicleProfitReportTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(get_user_model().objects.create_user(email='profit@example.com', password='x'))
+        use_exchange_rates(self)
+
+    def test_report_filters_by_date_and_vehicle_and_converts(self):
+        march = timezone.make_aware(datetime(2026, 3, 10, 12))
+        april = march.replace(month=4)
+        trip = create_trip(startDate=march, endDate=march)
+        vehicle = trip.vehicle
+        create_trip(vehicle=vehicle, startDate=march, endDate=march, currency='RWF', totalPrice=650000)
+        create_trip(vehicle=vehicle, startDate=april, endDate=april)
+        Expense.objects.create(vehicle=vehicle, trip=trip, category='Fuel', amount=130000, currency='RWF', date=march)
+        Expense.objects.create(vehicle=vehicle, category='Fuel', amount=50, date=april)
+        other = create_trip(startDate=march, endDate=march, totalPrice=300).vehicle
+        rebuild_rollup(date(2026, 3, 1), date(2026, 4, 30))
+
+        response = self.client.get(f'/api/reports/vehicle-profit/?from=2026-03-01&to=2026-03-31&vehicle={vehicle.pk}')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['vehicles'], [{
+            'id': vehicle.pk, 'licensePlate': vehicle.licensePlate, 'trips': 2,
+            'income': Decimal('1000'), 'expenses': Decimal('100'), 'profit': Decimal('900'),
+        }])
+
+        response = self.client.get('/api/reports/vehicle-profit/?from=2026-03-01&to=2026-03-31&display_currency=RWF')
+        profit = {row['id']: (row['income'], row['expenses']) for row in response.data['vehicles']}
+        self.assertEqual(profit, {
+            vehicle.pk: (Decimal('1300000'), Decimal('130000')),
+            other.pk: (Decimal('390000'), Decimal('0')),
+        })
@@ -1,24 +1,155 @@
 from rest_framework import viewsets, status
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view
 from rest_framework.response import Response
+from django.db.models import Count, F, Sum
+from decimal import Decimal
 from .models import Customer, Trip
 from .serializers import CustomerSerializer, TripSerializer
-from apps.finance.models import Payment
+from apps.finance.conversion import DisplayCurrencyMixin, conversion_factors, converted
+from apps.finance.models import CENT
+from apps.finance.rollup import filtered_rollup
 from apps.finance.serializers import PaymentSerializer
+from apps.fleet.models import Vehicle
+from fleet_management.csv_export import CsvExportMixin
+from fleet_management.filters import DateRange, IdFilter, ValueFilter
+from fleet_management.query_params import date_range_filter, parse_int_param
 
 class CustomerViewSet(viewsets.ModelViewSet):
     queryset = Customer.objects.all()
     serializer_class = CustomerSerializer
+    cursor_ordering = ('-createdAt', '-id')
 
-class TripViewSet(viewsets.ModelViewSet):
+class TripViewSet(DisplayCurrencyMixin, CsvExportMixin, viewsets.ModelViewSet):
     queryset = Trip.objects.all()
     serializer_class = TripSerializer
+    cursor_ordering = ('-startDate', '-id')
+    list_filters = (
+        DateRange('startDate'),
+        IdFilter('vehicle', 'vehicle_id'),
+        IdFilter('customer', 'customer_id'),
+        ValueFilter('currency'),
+        ValueFilter('tripType'),
+        ValueFilter('paymentStatus'),
+    )
+    export_filename = 'trips'
+    export_amount_field = 'totalPrice'
+    export_columns = (
+        ('ID', 'id'),
+        ('Start date', 'startDate'),
+        ('End date', 'endDate'),
+        ('Customer', 'customer__name'),
+        ('Vehicle', 'vehicle__licensePlate'),
+        ('Description', 'description'),
+        ('From', 'startLocation'),
+        ('To', 'endLocation'),
+        ('Trip type', 'tripType'),
+        ('Total price', 'totalPrice'),
+        ('Currency', 'currency'),
+        ('Total price (USD)', 'totalPriceUsd'),
+        ('Total price (RWF)', 'totalPriceRwf'),
+    )
+
+    def get_queryset(self):
+        # customerName, vehicleName and the nested payments are rendered for every row
+        return super().get_queryset().select_related('customer', 'vehicle').prefetch_related('payments')
 
     @action(detail=True, methods=['post'])
     def payments(self, request, pk=None):
         trip = self.get_object()
-        serializer = PaymentSerializer(data=request.data)
+        serializer = PaymentSerializer(data=request.data, context=self.get_serializer_context())
         if serializer.is_valid():
             serializer.save(trip=trip)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+def filtered_trips(params):
+    """Trips matching the report parameters ``from``/``to`` (startDate), ``vehicle`` and ``customer``"""
+    trips = Trip.objects.filter(**date_range_filter(params, 'startDate'))
+    vehicle_id = parse_int_param(params, 'vehicle')
+    if vehicle_id is not None:
+        trips = trips.filter(vehicle_id=vehicle_id)
+    customer_id = parse_int_param(params, 'customer')
+    if customer_id is not None:
+        trips = trips.filter(customer_id=customer_id)
+    return trips
+
+
+@api_view(['GET'])
+def vehicle_profit_report(request):
+    """Income (trip totals), expenses and profit per vehicle, grouped in SQL.
+
+    Accepts ``from``/``to``, ``vehicle``, ``customer`` and ``display_currency``
+    (default USD). With ``customer`` only expenses on that customer's trips
+    are counted. Reads the daily rollup.
+    """
+    params = request.query_params
+    currency = params.get('display_currency', 'USD')
+    factors = conversion_factors(currency)
+
+    vehicles = Vehicle.objects.order_by('licensePlate')
+    vehicle_id = parse_int_param(params, 'vehicle')
+    if vehicle_id is not None:
+        vehicles = vehicles.filter(pk=vehicle_id)
+
+    totals = {
+        row['vehicleId']: row
+        for row in filtered_rollup(params).order_by().values('vehicleId').annotate(
+            income=Sum(converted('revenue', factors)),
+            expenses=Sum(converted('expenses', factors)),
+            trips=Sum('tripCount'),
+        )
+    }
+
+    results = []
+    for vehicle in vehicles.values('id', 'licensePlate'):
+        vehicle_totals = totals.get(vehicle['id'], {})
+        total_income = (vehicle_totals.get('income') or Decimal('0')).quantize(CENT)
+        total_expenses = (vehicle_totals.get('expenses') or Decimal('0')).quantize(CENT)
+        results.append({
+            **vehicle,
+            'trips': vehicle_totals.get('trips', 0),
+            'income': total_income,
+            'expenses': total_expenses,
+            'profit': total_income - total_expenses,
+        })
+    return Response({'currency': currency, 'vehicles': results})
+
+
+@api_view(['GET'])
+def outstanding_trips_report(request):
+    """Trips with an unpaid balance, largest first, sorted and limited in SQL.
+
+    Balances are the trips' stored balance (total minus payments, each
+    payment at the rate on its date) converted to the display currency. The
+    unpaid-balance index narrows the scan to unpaid trips; it also serves the
+    sort only when no conversion is needed, since a converted balance is a
+    CASE expression the index cannot order. Accepts
+    ``from``/``to``, ``vehicle``, ``customer``, ``display_currency`` and
+    ``limit`` (default 10, at most 100).
+    """
+    params = request.query_params
+    currency = params.get('display_currency', 'USD')
+    factors = conversion_factors(currency)
+    limit = parse_int_param(params, 'limit', default=10, maximum=100, minimum=1)
+
+    trips = filtered_trips(params).filter(balance__gt=0).annotate(
+        outstanding=converted('balance', factors),
+    )
+
+    summary = trips.aggregate(count=Count('id'), total=Sum('outstanding'))
+    largest_first = '-balance' if all(rate == 1 for rate in factors.values()) else '-outstanding'
+    rows = trips.order_by(largest_first, 'id').values(
+        'id', 'description', 'startDate', 'totalPrice', 'currency', 'paymentStatus', 'outstanding',
+        customerName=F('customer__name'), licensePlate=F('vehicle__licensePlate'),
+    )[:limit]
+
+    return Response({
+        'currency': currency,
+        'count': summary['count'],
+        'totalOutstanding': (summary['total'] or Decimal('0')).quantize(CENT),
+        'trips': [
+            {**{key: value for key, value in row.items() if key != 'outstanding'}, 'balance': row['outstanding'].quantize(CENT)}
+            for row in rows
+        ],
+    })
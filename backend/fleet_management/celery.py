@@ -15,14 +15,22 @@ app.autodiscover_tasks()
 
 # Scheduled tasks configuration
 app.conf.beat_schedule = {
-    'check-reminders-hourly': {  # Changed from daily to hourly for better reliability
+    'check-reminders-safety-net': {  # Reminders schedule their own notifications on save
         'task': 'apps.fleet.tasks.check_and_send_reminders',
-        'schedule': crontab(minute=0),  # Every hour on the hour
+        'schedule': crontab(hour=0, minute=30),  # Run daily at 12:30 AM
     },
     'mark-overdue-reminders': {
         'task': 'apps.fleet.tasks.mark_overdue_reminders',
         'schedule': crontab(hour=0, minute=5),  # Run daily at 12:05 AM
     },
+    'prune-reminder-notifications': {
+        'task': 'apps.fleet.tasks.prune_reminder_notifications',
+        'schedule': crontab(hour=1, minute=0),  # Run daily at 1:00 AM
+    },
+    'refresh-financial-rollup': {  # Saves queue their own refresh; this drains anything left behind
+        'task': 'apps.finance.tasks.refresh_financial_rollup',
+        'schedule': crontab(minute='*/5'),  # Run every 5 minutes
+    },
 }
 
 app.conf.timezone = 'Africa/Kigali'
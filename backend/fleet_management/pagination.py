@@ -0,0 +1,24 @@
+from rest_framework.pagination import CursorPagination
+
+
+class OptInCursorPagination(CursorPagination):
+    """Keyset pagination that list endpoints only apply when the client asks for it.
+
+    Requests with ``page_size`` (or a ``cursor`` from a previous page) get
+    ``{"next", "previous", "results"}`` pages; all other requests keep
+    receiving the whole list, so existing clients are unaffected. Views set
+    ``cursor_ordering`` to an indexed column followed by ``id`` so the order
+    is stable when timestamps tie.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('-createdAt', '-id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.page_size_query_param not in params and self.cursor_query_param not in params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_ordering(self, request, queryset, view):
+        return getattr(view, 'cursor_ordering', None) or super().get_ordering(request, queryset, view)
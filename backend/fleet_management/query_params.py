@@ -0,0 +1,53 @@
+from datetime import datetime, time, timedelta
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+
+def parse_date_param(params, name):
+    """Return the ``YYYY-MM-DD`` query parameter ``name`` as a date, or None if absent"""
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        parsed = parse_date(value)
+    except (TypeError, ValueError):
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: 'Expected a date in YYYY-MM-DD format.'})
+    return parsed
+
+
+def parse_int_param(params, name, default=None, maximum=None, minimum=None):
+    """Return the integer query parameter ``name``, ``default`` if absent, capped at ``maximum``.
+
+    Values below ``minimum`` are rejected with a 400.
+    """
+    value = params.get(name)
+    if not value:
+        return default
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValidationError({name: 'Expected an integer.'})
+    if minimum is not None and value < minimum:
+        raise ValidationError({name: f'Must be at least {minimum}.'})
+    if maximum is not None:
+        value = min(value, maximum)
+    return value
+
+
+def date_range_filter(params, field, start_param='from', end_param='to'):
+    """Build filter kwargs restricting a DateTimeField to the requested inclusive date range.
+
+    The bounds are turned into local-midnight datetimes so the filter stays a
+    plain range over the column and can use its index.
+    """
+    start = parse_date_param(params, start_param)
+    end = parse_date_param(params, end_param)
+    filters = {}
+    if start:
+        filters[f'{field}__gte'] = timezone.make_aware(datetime.combine(start, time.min))
+    if end:
+        filters[f'{field}__lt'] = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min))
+    return filters
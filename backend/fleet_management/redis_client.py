@@ -0,0 +1,20 @@
+import redis
+from django.conf import settings
+
+_client = None
+
+
+def get_redis_client():
+    """Return the process-wide Redis client.
+
+    The client owns a connection pool, so callers share connections instead of
+    opening a new one per request or task.
+    """
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(
+            settings.REDIS_URL,
+            socket_connect_timeout=5,
+            socket_timeout=5,
+        )
+    return _client
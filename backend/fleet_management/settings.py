@@ -193,6 +193,11 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # Viewsets declare their query-string filters as list_filters
+    'DEFAULT_FILTER_BACKENDS': ['fleet_management.filters.ListFilterBackend'],
+    # Opt-in: lists are only paginated when the request passes page_size or cursor
+    'DEFAULT_PAGINATION_CLASS': 'fleet_management.pagination.OptInCursorPagination',
+    'PAGE_SIZE': int(os.environ.get('API_PAGE_SIZE', '50')),
 }
 
 SPECTACULAR_SETTINGS = {
@@ -211,6 +216,12 @@ EMAIL_HOST_USER = os.environ.get('ZOHO_EMAIL_USER', '')
 EMAIL_HOST_PASSWORD = os.environ.get('ZOHO_EMAIL_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.environ.get('ZOHO_EMAIL_USER', 'noreply@idaltd.com')
 SERVER_EMAIL = os.environ.get('ZOHO_EMAIL_USER', 'noreply@idaltd.com')
+EMAIL_TIMEOUT = 30
+
+# Celery workers keep their SMTP connection open between tasks (see apps.fleet.mail)
+EMAIL_POOLING = os.environ.get('EMAIL_POOLING', 'True') == 'True'
+# Maximum messages per second per worker process, 0 for no limit
+EMAIL_RATE_LIMIT = float(os.environ.get('EMAIL_RATE_LIMIT', '5'))
 
 # Reminder notification recipients (comma-separated emails)
 REMINDER_NOTIFICATION_RECIPIENTS = [
@@ -222,6 +233,37 @@ REMINDER_NOTIFICATION_RECIPIENTS = [
     if email.strip()
 ]
 
+# Send one digest email per recipient instead of one email per reminder
+REMINDER_DIGEST_MODE = os.environ.get('REMINDER_DIGEST_MODE', 'True') == 'True'
+
+# Days to keep individual notification log rows; daily counts are kept forever
+REMINDER_NOTIFICATION_RETENTION_DAYS = int(os.environ.get('REMINDER_NOTIFICATION_RETENTION_DAYS', '90'))
+
+# Seconds /api/reminder-health reuses its last report
+REMINDER_HEALTH_CACHE_SECONDS = int(os.environ.get('REMINDER_HEALTH_CACHE_SECONDS', '15'))
+
+# Maximum readings accepted per /api/vehicles/ingest-readings/ request
+TELEMETRY_MAX_BATCH_SIZE = int(os.environ.get('TELEMETRY_MAX_BATCH_SIZE', '10000'))
+
+# Seconds a process trusts its in-memory exchange rate graph before checking
+# the shared version key for changes made by other processes
+EXCHANGE_RATE_VERSION_CHECK_SECONDS = int(os.environ.get('EXCHANGE_RATE_VERSION_CHECK_SECONDS', '5'))
+
+# Serve receipt downloads through nginx's internal location (X-Accel-Redirect)
+# instead of streaming them from Django; requires the /protected-media/ location
+RECEIPT_ACCEL_REDIRECT = os.environ.get('RECEIPT_ACCEL_REDIRECT', 'False') == 'True'
+RECEIPT_ACCEL_LOCATION = '/protected-media/'
+
+# Seconds a signed receipt link stays valid, and browsers may cache a receipt
+RECEIPT_LINK_MAX_AGE = int(os.environ.get('RECEIPT_LINK_MAX_AGE', '3600'))
+RECEIPT_CACHE_SECONDS = int(os.environ.get('RECEIPT_CACHE_SECONDS', '86400'))
+
+# Uploaded receipt images are recompressed to JPEG at most this many pixels on
+# either side; thumbnails for the expenses list are WebP of RECEIPT_THUMBNAIL_SIZE
+RECEIPT_MAX_DIMENSION = int(os.environ.get('RECEIPT_MAX_DIMENSION', '1600'))
+RECEIPT_JPEG_QUALITY = int(os.environ.get('RECEIPT_JPEG_QUALITY', '75'))
+RECEIPT_THUMBNAIL_SIZE = int(os.environ.get('RECEIPT_THUMBNAIL_SIZE', '240'))
+
 # Logging Configuration
 LOGGING = {
     'version': 1,
@@ -264,6 +306,7 @@ LOGGING = {
 # Celery Configuration
 CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://redis:6379/0')
 CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', 'redis://redis:6379/0')
+REDIS_URL = os.environ.get('REDIS_URL', CELERY_BROKER_URL)
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
@@ -271,3 +314,21 @@ CELERY_TIMEZONE = 'Africa/Kigali'
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutes
 CELERY_RESULT_EXTENDED = True
+# Reminder notifications are queued with an ETA up to a day ahead; Redis would
+# otherwise redeliver them every visibility timeout (1 hour by default).
+# The timeout applies to every task, not just ETA reminders: a task whose
+# worker dies before acknowledging it is redelivered only after 27 hours.
+# Reminders are still covered by the daily safety-net check.
+CELERY_BROKER_TRANSPORT_OPTIONS = {'visibility_timeout': 27 * 60 * 60}
+
+# Cache shared by every gunicorn worker and Celery process
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+        'OPTIONS': {
+            'socket_connect_timeout': 5,
+            'socket_timeout': 5,
+        },
+    }
+}
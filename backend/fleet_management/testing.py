@@ -0,0 +1,211 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from datetime import datetime
+from decimal import Decimal
+from unittest import mock
+import itertools
+import socketserver
+import threading
+import time
+
+_plates = itertools.count()
+
+
+def create_vehicle(**fields):
+    """A vehicle with a licence plate no other test vehicle has"""
+    from apps.fleet.models import Vehicle
+
+    return Vehicle.objects.create(**{
+        'make': 'Toyota', 'model': 'Hilux', 'year': 2020, 'licensePlate': f'RAB{next(_plates):04d}', **fields,
+    })
+
+
+def create_trip(**fields):
+    """A 500 USD trip starting now, with its own vehicle and customer unless given"""
+    from apps.operations.models import Customer, Trip
+
+    if 'vehicle' not in fields:
+        fields['vehicle'] = create_vehicle()
+    if 'customer' not in fields:
+        fields['customer'] = Customer.objects.create(name=f"Customer {fields['vehicle'].licensePlate}")
+    now = timezone.now()
+    return Trip.objects.create(**{
+        'description': 'Kigali - Huye', 'startDate': now, 'endDate': now, 'totalPrice': 500, **fields,
+    })
+
+
+def use_exchange_rates(test_case, usd_to_rwf=Decimal('1300')):
+    """Make USD -> RWF the only exchange rate, current and since 2024, for one test.
+
+    RWF then converts at the exact inverse rather than the seeded 0.000769.
+    The rate graph's Redis version check is mocked.
+    """
+    from apps.finance.models import ExchangeRate, ExchangeRateHistory
+    from apps.finance.rates import invalidate_rates
+
+    redis = mock.patch('apps.finance.rates.get_redis_client')
+    redis.start().return_value.get.return_value = b'1'
+    test_case.addCleanup(redis.stop)
+    ExchangeRate.objects.all().delete()
+    ExchangeRate.objects.create(from_currency='USD', to_currency='RWF', rate=usd_to_rwf)
+    invalidate_rates()
+    ExchangeRateHistory.objects.all().delete()
+    ExchangeRateHistory.objects.create(
+        from_currency='USD', to_currency='RWF', rate=usd_to_rwf,
+        valid_from=timezone.make_aware(datetime(2024, 1, 1)),
+    )
+
+
+class ListQueryBudgetMixin:
+    """Assert that a list endpoint costs the same number of queries for N and 10N rows.
+
+    Test cases define ``seed(count)`` to create ``count`` more rows for the
+    endpoint under test.
+    """
+    seed_size = 5
+
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(
+            email='budget@example.com', password='budget', role='admin',
+            is_staff=True, is_superuser=True,
+        )
+        self.client.force_authenticate(self.user)
+
+    def count_list_queries(self, url):
+        # Warm process-wide caches first. The exchange rate graph, for one, is
+        # rechecked every few seconds, and that reload would otherwise land on
+        # whichever measured request crossed the interval.
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return len(queries), response
+
+    def assertConstantListQueries(self, url):
+        self.seed(self.seed_size)
+        small, response = self.count_list_queries(url)
+        self.assertEqual(len(response.data), self.seed_size)
+
+        self.seed(self.seed_size * 9)
+        large, response = self.count_list_queries(url)
+        self.assertEqual(len(response.data), self.seed_size * 10)
+
+        self.assertEqual(
+            large, small,
+            f'{url} ran {small} queries for {self.seed_size} rows but {large} for {self.seed_size * 10}',
+        )
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Speak just enough SMTP for smtplib: EHLO, AUTH, MAIL, RCPT, DATA, RSET, NOOP, QUIT"""
+
+    def _reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        if server.connect_delay:
+            # Stand-in for the TCP + TLS + AUTH round-trips of a real provider
+            time.sleep(server.connect_delay)
+
+        self._reply("220 localhost fake SMTP ready")
+        recipients = []
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            command = raw.decode(errors='replace').strip()
+            verb = command[:4].upper()
+
+            if verb == 'EHLO':
+                self._reply("250-localhost")
+                self._reply("250 AUTH PLAIN LOGIN")
+            elif verb == 'HELO':
+                self._reply("250 localhost")
+            elif verb == 'AUTH':
+                self._reply("235 Authentication successful")
+            elif verb == 'MAIL':
+                recipients = []
+                self._reply("250 OK")
+            elif verb == 'RCPT':
+                recipients.append(command.split(':', 1)[1].strip(' <>'))
+                self._reply("250 OK")
+            elif verb == 'DATA':
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    line = self.rfile.readline()
+                    if not line or line in (b".\r\n", b".\n"):
+                        break
+                    lines.append(line)
+                with server.lock:
+                    server.messages.append({'to': recipients, 'data': b"".join(lines)})
+                self._reply("250 OK queued")
+            elif verb in ('RSET', 'NOOP'):
+                self._reply("250 OK")
+            elif verb == 'QUIT':
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+
+class _ThreadingSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class FakeSMTPServer:
+    """In-process SMTP sink for tests and mail benchmarks.
+
+    Usage::
+
+        with FakeSMTPServer() as smtp:
+            sender = PooledMailSender(host=smtp.host, port=smtp.port, use_tls=False)
+            ...
+            assert len(smtp.messages) == 1
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, connect_delay=0):
+        self._server = _ThreadingSMTPServer((host, port), _SMTPHandler)
+        self._server.lock = threading.Lock()
+        self._server.messages = []
+        self._server.connections = 0
+        self._server.connect_delay = connect_delay
+        self._thread = None
+
+    @property
+    def host(self):
+        return self._server.server_address[0]
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    @property
+    def messages(self):
+        return self._server.messages
+
+    @property
+    def connections(self):
+        return self._server.connections
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -5,9 +5,9 @@ from django.conf.urls.static import static
 from rest_framework.routers import DefaultRouter
 from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
 from apps.accounts.views import SignUpView, LoginView, UserView, RoleListView
-from apps.fleet.views import VehicleViewSet, ReminderViewSet, reminder_system_health
-from apps.operations.views import CustomerViewSet, TripViewSet
-from apps.finance.views import ExpenseViewSet, PaymentViewSet, ExchangeRateViewSet, ExpenseCategoryViewSet
+from apps.fleet.views import VehicleViewSet, ReminderViewSet, reminder_system_health, reminder_system_liveness
+from apps.operations.views import CustomerViewSet, TripViewSet, vehicle_profit_report, outstanding_trips_report
+from apps.finance.views import ExpenseViewSet, PaymentViewSet, ExchangeRateViewSet, ExpenseCategoryViewSet, dashboard_summary, expense_category_report
 
 router = DefaultRouter()
 router.register(r'vehicles', VehicleViewSet)
@@ -30,7 +30,12 @@ urlpatterns = [
     path('api/', include(router.urls)),
     path('api/loans/', include('apps.loans.urls')),
     path('api/support/', include('apps.support.urls')),
+    path('api/dashboard/summary/', dashboard_summary, name='dashboard-summary'),
+    path('api/reports/vehicle-profit/', vehicle_profit_report, name='report-vehicle-profit'),
+    path('api/reports/expense-categories/', expense_category_report, name='report-expense-categories'),
+    path('api/reports/outstanding-trips/', outstanding_trips_report, name='report-outstanding-trips'),
     path('api/reminder-health', reminder_system_health, name='reminder-health'),
+    path('api/reminder-health/live', reminder_system_liveness, name='reminder-liveness'),
     # Swagger
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
     path('api/schema/swagger-ui/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),